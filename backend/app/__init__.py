@@ -1,6 +1,5 @@
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_cors import CORS
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
@@ -10,7 +9,6 @@ from config import Config
 
 # Initialize extensions
 db = SQLAlchemy()
-migrate = Migrate()
 bcrypt = Bcrypt()
 jwt = JWTManager()
 cors = CORS()
@@ -24,7 +22,6 @@ def create_app(config_class=Config):
     
     # Initialize extensions with app
     db.init_app(app)
-    migrate.init_app(app, db)
     bcrypt.init_app(app)
     jwt.init_app(app)
     
@@ -38,7 +35,7 @@ def create_app(config_class=Config):
                 "http://localhost:5000"
             ],
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
+            "allow_headers": ["Content-Type", "Authorization", "Last-Event-ID"]
         }
     })
     
@@ -50,16 +47,64 @@ def create_app(config_class=Config):
     from app.services.email_service import email_service
     email_service.init_app(app)
     
+    # Initialize the book cover cache
+    from app.services.cover_cache import cover_cache
+    cover_cache.init_app(app)
+    
+    # Initialize recommendations
+    from app.services.recommendations import recommendation_service
+    recommendation_service.init_app(app)
+    
+    # Initialize trending counters
+    from app.services.trending import trending_service
+    trending_service.init_app(app)
+    
+    # Initialize group reading dashboards
+    from app.services.group_reading import group_reading_service
+    group_reading_service.init_app(app)
+    
+    # Initialize group activity feeds
+    from app.services.activity_feed import activity_feed
+    activity_feed.init_app(app)
+    
+    # Initialize the stale book refresher
+    from app.services.catalog_refresh import catalog_refresher
+    catalog_refresher.init_app(app)
+    
+    # Initialize the bulk catalog loader (flask catalog ingest)
+    from app.services.catalog_ingest import catalog_ingester
+    catalog_ingester.init_app(app)
+    
+    # Initialize the group-commit write queue
+    from app.services.write_queue import write_queue
+    write_queue.init_app(app)
+    
+    # Initialize live event streams
+    from app.services.live_events import event_hub
+    event_hub.init_app(app)
+    
+    # Initialize request metrics (before compression so its timing includes it)
+    from app.utils.metrics import metrics
+    metrics.init_app(app)
+    
+    # Initialize response caching and compression
+    from app.utils.cache import response_cache
+    from app.utils.compression import compressor
+    response_cache.init_app(app)
+    compressor.init_app(app)
+    
     # Register Blueprints
     from app.routes.auth import auth_bp
     from app.routes.books import books_bp
     from app.routes.bookshelf import bookshelf_bp
     from app.routes.community import community_bp
+    from app.routes.events import events_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(books_bp, url_prefix='/api/books')
     app.register_blueprint(bookshelf_bp, url_prefix='/api/bookshelf')
     app.register_blueprint(community_bp, url_prefix='/api/community')
+    app.register_blueprint(events_bp, url_prefix='/api/events')
     
     # Register API Routes
     @app.route('/')
@@ -73,7 +118,20 @@ def create_app(config_class=Config):
     
     @app.route('/health')
     def health():
-        return jsonify({"status": "healthy"})
+        from app.utils.circuit_breaker import OPEN, breakers
+        from app.utils.registry import services
+        # Breakers are built on first use; report Google Books before the first call too
+        services.get('google_books_breaker')
+        dependencies = {name: breaker.snapshot() for name, breaker in breakers.items()}
+        degraded = any(d['state'] == OPEN for d in dependencies.values())
+        return jsonify({
+            "status": "degraded" if degraded else "healthy",
+            "dependencies": dependencies
+        })
+    
+    @app.route('/metrics')
+    def metrics_endpoint():
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
     # Custom JSON Error Handling
     @app.errorhandler(HTTPException)
@@ -93,6 +151,15 @@ def create_app(config_class=Config):
             "description": "An internal server error occurred"
         }), 500
 
+    # Background threads; a pre-forking server starts them in each worker instead (see app.worker)
+    if app.config.get('START_BACKGROUND_TASKS', True):
+        from app.worker import start_background_tasks
+        start_background_tasks(app)
+    
+    # Flask CLI commands
+    from app.cli import register_commands
+    register_commands(app)
+    
     # Shell context for Flask CLI
     @app.shell_context_processor
     def make_shell_context():
@@ -0,0 +1,61 @@
+import json
+import click
+from flask.cli import AppGroup, ScriptInfo
+
+recommendations_cli = AppGroup('recommendations', help='Book recommendation jobs.')
+
+@recommendations_cli.command('rebuild')
+def rebuild_recommendations():
+    """Recompute item-to-item neighbors for every book (run from cron or another scheduler)."""
+    from app.services.recommendations import recommendation_service
+    summary = recommendation_service.rebuild()
+    click.echo(json.dumps(summary))
+
+catalog_cli = AppGroup('catalog', help='Book catalog maintenance.')
+
+@catalog_cli.command('refresh')
+@click.option('--budget', type=int, help='Books to refresh in this run (default CATALOG_REFRESH_BUDGET).')
+def refresh_catalog(budget):
+    """Re-sync the stalest, most shelved books with Google Books, resuming an unfinished run."""
+    from app.services.catalog_refresh import catalog_refresher
+    summary = catalog_refresher.run(budget)
+    click.echo(json.dumps(summary))
+
+@catalog_cli.command('ingest')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--batch-size', type=int, help='Rows per insert (default CATALOG_INGEST_BATCH_SIZE).')
+@click.option('--synced-at', type=click.DateTime(), help='When the records were fetched from Google (UTC). '
+              'Without it the imported books count as never synced and are refreshed first.')
+def ingest_catalog(source, batch_size, synced_at):
+    """Pre-seed the books table from a JSONL file of Google Books volumes ('-' reads stdin)."""
+    from app.services.catalog_ingest import catalog_ingester
+
+    def progress(counts, rows_per_second):
+        click.echo(f"{counts['read']} rows, {counts['inserted']} inserted, {rows_per_second} rows/s", err=True)
+
+    summary = catalog_ingester.ingest(source, batch_size, progress, synced_at)
+    click.echo(json.dumps(summary))
+
+class MigrateGroup(click.Group):
+    """`flask db`, with Flask-Migrate and Alembic imported only when the command is used"""
+
+    def _commands(self, ctx):
+        from flask_migrate import Migrate
+        from flask_migrate.cli import db as db_cli
+        from app import db
+
+        app = ctx.ensure_object(ScriptInfo).load_app()
+        if 'migrate' not in app.extensions:
+            Migrate(app, db)
+        return db_cli
+
+    def list_commands(self, ctx):
+        return self._commands(ctx).list_commands(ctx)
+
+    def get_command(self, ctx, name):
+        return self._commands(ctx).get_command(ctx, name)
+
+def register_commands(app):
+    app.cli.add_command(recommendations_cli)
+    app.cli.add_command(catalog_cli)
+    app.cli.add_command(MigrateGroup('db', help='Perform database migrations.'))
@@ -2,5 +2,11 @@ from app.models.user import User
 from app.models.book import Book
 from app.models.bookshelf import Bookshelf
 from app.models.group import ReadingGroup, GroupMember
+from app.models.email_outbox import EmailOutbox
+from app.models.job_state import JobState
+from app.models.recommendation import BookSimilarity
+from app.models.popularity import BookPopularity
+from app.models.activity import GroupActivity
+from app.models.live_event import LiveEvent
 
-__all__ = ['User', 'Book', 'Bookshelf', 'ReadingGroup', 'GroupMember']
\ No newline at end of file
+__all__ = ['User', 'Book', 'Bookshelf', 'ReadingGroup', 'GroupMember', 'EmailOutbox', 'JobState', 'BookSimilarity', 'BookPopularity', 'GroupActivity', 'LiveEvent']
\ No newline at end of file
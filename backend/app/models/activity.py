@@ -0,0 +1,20 @@
+from app import db
+from datetime import datetime
+
+class GroupActivity(db.Model):
+    """One entry in a reading group's timeline, written when a member's shelf or the membership changes"""
+    __tablename__ = 'group_activities'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    group_id = db.Column(db.Integer, db.ForeignKey('reading_groups.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    action = db.Column(db.Enum('added', 'moved', 'removed', 'joined', 'left'), nullable=False)
+    book_id = db.Column(db.Integer, db.ForeignKey('books.id'))
+    shelf_type = db.Column(db.String(20))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Timelines are read newest first per group, and trimmed the same way
+    __table_args__ = (db.Index('ix_group_activities_group_id', 'group_id', 'id'),)
+    
+    def __repr__(self):
+        return f'<GroupActivity group:{self.group_id} user:{self.user_id} {self.action}>'
\ No newline at end of file
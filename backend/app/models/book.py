@@ -1,6 +1,29 @@
 from app import db
+from datetime import datetime
 import json
 
+# Named projections accepted by ?fields=; None means every field
+PROJECTIONS = {
+    'card': ('id', 'google_books_id', 'title', 'authors', 'thumbnail', 'rating'),
+    'full': None
+}
+
+def json_list(value):
+    """Decode a list column stored as a JSON string"""
+    if value:
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return [value]  # Fallback if it's not valid JSON
+    return []
+
+def book_dict(book, fields=None):
+    """
+    Serialize a Book or any row with its column names as attributes, such as
+    a Core select of Book.columns_for(fields); fields limits the keys.
+    """
+    return {name: FIELDS[name][1](book) for name in (fields or FIELDS)}
+
 class Book(db.Model):
     __tablename__ = 'books'
     
@@ -19,6 +42,7 @@ class Book(db.Model):
     preview_link = db.Column(db.String(500))
     info_link = db.Column(db.String(500))
     created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)  # Last time the row was synced from Google
     
     # Relationships
     bookshelf_entries = db.relationship('Bookshelf', backref='book', lazy=True, cascade='all, delete-orphan')
@@ -28,67 +52,127 @@ class Book(db.Model):
             self.authors = json.dumps(authors_list)
     
     def get_authors(self):
-        if self.authors:
-            try:
-                return json.loads(self.authors)
-            except json.JSONDecodeError:
-                return [self.authors]  # Fallback if it's not valid JSON
-        return []
+        return json_list(self.authors)
     
     def set_categories(self, categories_list):
         if categories_list:
             self.categories = json.dumps(categories_list)
     
     def get_categories(self):
-        if self.categories:
-            try:
-                return json.loads(self.categories)
-            except json.JSONDecodeError:
-                return [self.categories]  # Fallback if it's not valid JSON
-        return []
-    
-    def to_dict(self):
+        return json_list(self.categories)
+    
+    def to_dict(self, fields=None):
+        """Serialize the book; fields limits the output to those keys (see parse_fields)"""
+        return book_dict(self, fields)
+    
+    @staticmethod
+    def parse_fields(value, default='full'):
+        """
+        Resolve a ?fields= value, either a projection name or comma separated
+        field names, to a tuple of fields or None for every field.
+        Raises ValueError for unknown names.
+        """
+        value = (value or default).strip()
+        if value in PROJECTIONS:
+            return PROJECTIONS[value]
+        
+        fields = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+        unknown = [name for name in fields if name not in FIELDS]
+        if unknown or not fields:
+            raise ValueError(f"Unknown fields: {', '.join(unknown) or value}")
+        return fields
+    
+    @staticmethod
+    def columns_for(fields):
+        """The columns needed to serialize fields, for load_only()"""
+        columns = {}
+        for name in (fields or FIELDS):
+            for column in FIELDS[name][0]:
+                columns[column] = getattr(Book, column)
+        return list(columns.values())
+    
+    @staticmethod
+    def project(data, fields):
+        """Apply fields to an already serialized book"""
+        if fields is None:
+            return data
+        return {name: data[name] for name in fields if name in data}
+    
+    @staticmethod
+    def google_books_fields(google_book_data):
+        """Map Google Books API data to column values"""
+        volume_info = google_book_data.get('volumeInfo', {})
+        
         return {
-            'id': self.id,
-            'google_books_id': self.google_books_id,
-            'title': self.title,
-            'authors': self.get_authors(),
-            'description': self.description,
-            'categories': self.get_categories(),
-            'thumbnail': self.thumbnail,
-            'rating': self.average_rating or 0,
-            'ratings_count': self.ratings_count or 0,
-            'published_date': self.published_date,
-            'page_count': self.page_count,
-            'language': self.language,
-            'preview_link': self.preview_link,
-            'info_link': self.info_link
+            'google_books_id': google_book_data.get('id'),
+            'title': volume_info.get('title', 'Unknown Title'),
+            'description': volume_info.get('description', 'No description available.'),
+            'thumbnail': volume_info.get('imageLinks', {}).get('thumbnail') or 
+                         volume_info.get('imageLinks', {}).get('smallThumbnail'),
+            'average_rating': volume_info.get('averageRating'),
+            'ratings_count': volume_info.get('ratingsCount'),
+            'published_date': volume_info.get('publishedDate'),
+            'page_count': volume_info.get('pageCount'),
+            'language': volume_info.get('language'),
+            'preview_link': volume_info.get('previewLink'),
+            'info_link': volume_info.get('infoLink'),
+            'authors': volume_info.get('authors', ['Unknown Author']),
+            'categories': volume_info.get('categories', [])
         }
     
+    @classmethod
+    def google_books_row(cls, google_book_data):
+        """Column values for inserting or refreshing a row from Google Books API data"""
+        fields = cls.google_books_fields(google_book_data)
+        authors = fields.pop('authors')
+        categories = fields.pop('categories')
+        fields['authors'] = json.dumps(authors) if authors else None
+        fields['categories'] = json.dumps(categories) if categories else None
+        fields['refreshed_at'] = datetime.utcnow()
+        return fields
+    
     @classmethod
     def create_from_google_books(cls, google_book_data):
         """Create a Book instance from Google Books API data"""
-        volume_info = google_book_data.get('volumeInfo', {})
-        
-        book = cls(
-            google_books_id=google_book_data.get('id'),
-            title=volume_info.get('title', 'Unknown Title'),
-            description=volume_info.get('description', 'No description available.'),
-            thumbnail=volume_info.get('imageLinks', {}).get('thumbnail') or 
-                     volume_info.get('imageLinks', {}).get('smallThumbnail'),
-            average_rating=volume_info.get('averageRating'),
-            ratings_count=volume_info.get('ratingsCount'),
-            published_date=volume_info.get('publishedDate'),
-            page_count=volume_info.get('pageCount'),
-            language=volume_info.get('language'),
-            preview_link=volume_info.get('previewLink'),
-            info_link=volume_info.get('infoLink')
-        )
-        
-        book.set_authors(volume_info.get('authors', ['Unknown Author']))
-        book.set_categories(volume_info.get('categories', []))
-        
+        book = cls()
+        book.update_from_google_books(google_book_data)
         return book
     
+    def update_from_google_books(self, google_book_data):
+        """Overwrite this book's metadata with fresh Google Books API data"""
+        fields = self.google_books_fields(google_book_data)
+        authors = fields.pop('authors')
+        categories = fields.pop('categories')
+        
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.set_authors(authors)
+        self.set_categories(categories)
+        self.refreshed_at = datetime.utcnow()
+    
+    def is_stale(self, max_age):
+        """True when the row was last synced more than max_age seconds ago, or never (refreshed_at is NULL)"""
+        if not self.refreshed_at:
+            return True
+        return (datetime.utcnow() - self.refreshed_at).total_seconds() > max_age
+    
     def __repr__(self):
-        return f'<Book {self.title}>'
\ No newline at end of file
+        return f'<Book {self.title}>'
+
+# Serialized fields: the columns each one reads and how it is computed
+FIELDS = {
+    'id': (('id',), lambda book: book.id),
+    'google_books_id': (('google_books_id',), lambda book: book.google_books_id),
+    'title': (('title',), lambda book: book.title),
+    'authors': (('authors',), lambda book: json_list(book.authors)),
+    'description': (('description',), lambda book: book.description),
+    'categories': (('categories',), lambda book: json_list(book.categories)),
+    'thumbnail': (('thumbnail',), lambda book: book.thumbnail),
+    'rating': (('average_rating',), lambda book: book.average_rating or 0),
+    'ratings_count': (('ratings_count',), lambda book: book.ratings_count or 0),
+    'published_date': (('published_date',), lambda book: book.published_date),
+    'page_count': (('page_count',), lambda book: book.page_count),
+    'language': (('language',), lambda book: book.language),
+    'preview_link': (('preview_link',), lambda book: book.preview_link),
+    'info_link': (('info_link',), lambda book: book.info_link)
+}
\ No newline at end of file
@@ -1,5 +1,55 @@
 from app import db
 from datetime import datetime
+from app.models.book import json_list, book_dict
+
+def shelf_entry_dict(book, shelf_type, added_at, fields=None):
+    """
+    Serialize a bookshelf entry for the listing. book is a Book or a row with
+    its columns as attributes. Without fields the book keeps its legacy
+    shape, including the volumeInfo copy; with fields (see Book.parse_fields)
+    it is book_dict(book, fields). In both shapes the book's id is its
+    Google Books ID.
+    """
+    if fields is None:
+        authors = json_list(book.authors)
+        book_data = {
+            'id': book.google_books_id,
+            'google_books_id': book.google_books_id,
+            'title': book.title,
+            'authors': authors,
+            'thumbnail': book.thumbnail,
+            'page_count': book.page_count,
+            'description': book.description,
+            'average_rating': book.average_rating,
+            'preview_link': book.preview_link,
+            'info_link': book.info_link,
+            'volumeInfo': {
+                'title': book.title,
+                'authors': authors,
+                'imageLinks': {
+                    'thumbnail': book.thumbnail
+                } if book.thumbnail else {},
+                'pageCount': book.page_count,
+                'description': book.description,
+                'averageRating': book.average_rating,
+                'previewLink': book.preview_link,
+                'infoLink': book.info_link
+            }
+        }
+    else:
+        book_data = book_dict(book, fields)
+        if 'id' in book_data:
+            book_data['id'] = book.google_books_id
+    
+    return {
+        'book': book_data,
+        'shelf_type': shelf_type,
+        'added_at': added_at.isoformat() if added_at else None
+    }
+
+def _added_at(context):
+    """New entries start with updated_at equal to added_at, which is how a never-moved entry is recognised"""
+    return context.get_current_parameters().get('added_at') or datetime.utcnow()
 
 class Bookshelf(db.Model):
     __tablename__ = 'bookshelves'
@@ -9,7 +59,7 @@ class Bookshelf(db.Model):
     book_id = db.Column(db.Integer, db.ForeignKey('books.id'), nullable=False)
     shelf_type = db.Column(db.Enum('reading', 'wantToRead', 'finished'), nullable=False)
     added_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=_added_at, onupdate=datetime.utcnow)
     
     # Unique constraint to prevent duplicate entries
     __table_args__ = (db.UniqueConstraint('user_id', 'book_id', name='unique_user_book'),)
@@ -25,5 +75,9 @@ class Bookshelf(db.Model):
             'book': self.book.to_dict() if self.book else None
         }
     
+    def to_shelf_dict(self, fields=None):
+        """Serialize the entry for the bookshelf listing; see shelf_entry_dict"""
+        return shelf_entry_dict(self.book, self.shelf_type, self.added_at, fields)
+    
     def __repr__(self):
         return f'<Bookshelf user:{self.user_id} book:{self.book_id} shelf:{self.shelf_type}>'
\ No newline at end of file
@@ -1,5 +1,30 @@
 from app import db
 from datetime import datetime
+from sqlalchemy import func, select
+from app.models.user import user_dict
+
+def group_dict(group):
+    """Serialize a ReadingGroup or a row with its columns and member_count as attributes"""
+    return {
+        'id': group.id,
+        'name': group.name,
+        'description': group.description,
+        'created_by': group.created_by,
+        'created_at': group.created_at.isoformat() if group.created_at else None,
+        'is_public': group.is_public,
+        'member_count': group.member_count
+    }
+
+def member_dict(member, user):
+    """Serialize a GroupMember or member row, with its user (None when the user is gone)"""
+    return {
+        'id': member.id,
+        'group_id': member.group_id,
+        'user_id': member.user_id,
+        'joined_at': member.joined_at.isoformat() if member.joined_at else None,
+        'role': member.role,
+        'user': user_dict(user) if user else None
+    }
 
 class ReadingGroup(db.Model):
     __tablename__ = 'reading_groups'
@@ -15,15 +40,7 @@ class ReadingGroup(db.Model):
     members = db.relationship('GroupMember', backref='group', lazy=True, cascade='all, delete-orphan')
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'created_by': self.created_by,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'is_public': self.is_public,
-            'member_count': len(self.members)
-        }
+        return group_dict(self)
     
     def __repr__(self):
         return f'<ReadingGroup {self.name}>'
@@ -37,18 +54,22 @@ class GroupMember(db.Model):
     joined_at = db.Column(db.DateTime, default=datetime.utcnow)
     role = db.Column(db.Enum('admin', 'member'), default='member')
     
-    # Unique constraint
-    __table_args__ = (db.UniqueConstraint('group_id', 'user_id', name='unique_group_member'),)
+    # Unique constraint; the user_id index serves "which groups is this user in"
+    __table_args__ = (
+        db.UniqueConstraint('group_id', 'user_id', name='unique_group_member'),
+        db.Index('ix_group_members_user_id', 'user_id'),
+    )
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'group_id': self.group_id,
-            'user_id': self.user_id,
-            'joined_at': self.joined_at.isoformat() if self.joined_at else None,
-            'role': self.role,
-            'user': self.user.to_dict() if self.user else None
-        }
+        return member_dict(self, self.user)
     
     def __repr__(self):
-        return f'<GroupMember group:{self.group_id} user:{self.user_id}>'
\ No newline at end of file
+        return f'<GroupMember group:{self.group_id} user:{self.user_id}>'
+
+# Counted in the same SELECT as the group so listing groups doesn't load every member
+ReadingGroup.member_count = db.column_property(
+    select(func.count(GroupMember.id))
+    .where(GroupMember.group_id == ReadingGroup.id)
+    .correlate_except(GroupMember)
+    .scalar_subquery()
+)
\ No newline at end of file
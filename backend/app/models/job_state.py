@@ -0,0 +1,33 @@
+from app import db
+from datetime import datetime
+import json
+
+class JobState(db.Model):
+    """Small key/value store so background jobs can resume where they left off"""
+    __tablename__ = 'job_states'
+    
+    name = db.Column(db.String(100), primary_key=True)
+    value = db.Column(db.Text)  # Store as JSON string
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @classmethod
+    def load(cls, name, default=None):
+        state = db.session.get(cls, name)
+        if state and state.value:
+            try:
+                return json.loads(state.value)
+            except json.JSONDecodeError:
+                pass
+        return default
+    
+    @classmethod
+    def save(cls, name, value):
+        """Stage the new value in the current session; the caller commits"""
+        state = db.session.get(cls, name) or cls(name=name)
+        state.value = json.dumps(value)
+        state.updated_at = datetime.utcnow()
+        db.session.add(state)
+        return state
+    
+    def __repr__(self):
+        return f'<JobState {self.name}>'
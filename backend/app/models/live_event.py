@@ -0,0 +1,22 @@
+from app import db
+from datetime import datetime
+
+class LiveEvent(db.Model):
+    """
+    An event for live streams. Every process polls this table and delivers new
+    rows to its own subscribers, and reconnecting clients resume from it.
+    Rows are only kept for EVENTS_RETENTION_SECONDS.
+    """
+    __tablename__ = 'live_events'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    channels = db.Column(db.String(500), nullable=False)  # space separated and padded: ' user:1 group:2 '
+    type = db.Column(db.String(20), nullable=False)
+    data = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    
+    # Ids are event ids clients resume from, so they must never be reused after pruning
+    __table_args__ = {'sqlite_autoincrement': True}
+    
+    def __repr__(self):
+        return f'<LiveEvent {self.id} {self.type}>'
@@ -0,0 +1,13 @@
+from app import db
+from datetime import datetime
+
+class BookPopularity(db.Model):
+    """Time-decayed shelving activity per book, saved periodically by TrendingService"""
+    __tablename__ = 'book_popularity'
+    
+    book_id = db.Column(db.Integer, db.ForeignKey('books.id'), primary_key=True)
+    score = db.Column(db.Float, nullable=False, default=0.0)  # Decayed score as of updated_at
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<BookPopularity book:{self.book_id} score:{self.score:.3f}>'
\ No newline at end of file
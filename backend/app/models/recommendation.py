@@ -0,0 +1,18 @@
+from app import db
+from datetime import datetime
+
+class BookSimilarity(db.Model):
+    """Precomputed top-K item-item neighbors, rebuilt by RecommendationService"""
+    __tablename__ = 'book_similarities'
+    
+    book_id = db.Column(db.Integer, db.ForeignKey('books.id'), primary_key=True)
+    similar_book_id = db.Column(db.Integer, db.ForeignKey('books.id'), primary_key=True)
+    score = db.Column(db.Float, nullable=False)
+    rank = db.Column(db.Integer, nullable=False)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Neighbors are always read per book in rank order
+    __table_args__ = (db.Index('ix_book_similarities_book_rank', 'book_id', 'rank'),)
+    
+    def __repr__(self):
+        return f'<BookSimilarity book:{self.book_id} similar:{self.similar_book_id} score:{self.score:.3f}>'
@@ -3,6 +3,15 @@ from flask_jwt_extended import create_access_token
 from datetime import datetime, timedelta
 import secrets
 
+def user_dict(user):
+    """Serialize a User or a row with its public columns as attributes"""
+    return {
+        'id': user.id,
+        'name': user.name,
+        'email': user.email,
+        'created_at': user.created_at.isoformat() if user.created_at else None
+    }
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -49,12 +58,7 @@ class User(db.Model):
         self.reset_token_expires = None
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'email': self.email,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+        return user_dict(self)
     
     def __repr__(self):
         return f'<User {self.email}>'
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+Read models for list endpoints.
+
+Listings only read rows and serialize them, so they skip the ORM: each
+function runs a Core select of just the columns it needs and serializes the
+rows it gets back. Rows are SQLAlchemy Row objects, compact named tuples
+that are not tracked by the session, kept in the identity map or watched
+for changes. The serializers are the ones the models' to_dict methods use,
+so both paths return the same JSON.
+"""
+from math import ceil
+from sqlalchemy import func, or_, select
+from app import db
+from app.models.book import Book, book_dict
+from app.models.bookshelf import Bookshelf, shelf_entry_dict
+from app.models.group import GroupMember, ReadingGroup, group_dict, member_dict
+from app.models.user import User
+
+GROUP_COLUMNS = (
+    ReadingGroup.id, ReadingGroup.name, ReadingGroup.description, ReadingGroup.created_by,
+    ReadingGroup.created_at, ReadingGroup.is_public, ReadingGroup.member_count.label('member_count')
+)
+
+MEMBER_COLUMNS = (
+    GroupMember.id, GroupMember.group_id, GroupMember.user_id, GroupMember.joined_at, GroupMember.role
+)
+
+# The member's user_id is the user's id, so only these are read for it
+MEMBER_USER_COLUMNS = (
+    User.name.label('user_name'), User.email.label('user_email'), User.created_at.label('user_created_at')
+)
+
+
+def paginate_rows(statement, serialize, page=1, per_page=20):
+    """paginate_query for a Core select: the same page arguments and response shape"""
+    page = page if page >= 1 else 1
+    per_page = per_page if per_page >= 1 else 20
+
+    rows = db.session.execute(statement.limit(per_page).offset((page - 1) * per_page)).all()
+    total = db.session.execute(
+        select(func.count()).select_from(statement.order_by(None).subquery())
+    ).scalar()
+
+    return {
+        'items': [serialize(row) for row in rows],
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'pages': ceil(total / per_page) if total else 0
+    }
+
+
+def shelf_entries(user_id, fields=None):
+    """(shelf type, serialized entry) for each of the user's bookshelf entries; see shelf_entry_dict"""
+    # Bookshelf contributes only shelf_type and added_at, so the book columns keep their names
+    book_columns = {column.key: column for column in Book.columns_for(fields)}
+    book_columns.setdefault('google_books_id', Book.google_books_id)
+
+    rows = db.session.execute(
+        select(Bookshelf.shelf_type, Bookshelf.added_at, *book_columns.values())
+        .join(Book, Bookshelf.book_id == Book.id)
+        .where(Bookshelf.user_id == user_id)
+    ).all()
+
+    return [(row.shelf_type, shelf_entry_dict(row, row.shelf_type, row.added_at, fields)) for row in rows]
+
+
+def search_books(query, limit=12, offset=0, fields=None):
+    """Books matching a search query, most rated first; 'subject:<category>' searches categories"""
+    statement = select(*Book.columns_for(fields))
+    if query.startswith('subject:'):
+        statement = statement.where(Book.categories.ilike(f"%{query[len('subject:'):].strip()}%"))
+    else:
+        for term in query.split():
+            statement = statement.where(or_(
+                Book.title.ilike(f'%{term}%'),
+                Book.authors.ilike(f'%{term}%')
+            ))
+
+    rows = db.session.execute(
+        statement.order_by(Book.ratings_count.desc().nullslast(), Book.id).offset(offset).limit(limit)
+    ).all()
+    return [book_dict(row, fields) for row in rows]
+
+
+def books_by_google_id(google_books_ids, fields=None):
+    """{google_books_id: serialized book} for the IDs found"""
+    rows = db.session.execute(
+        select(Book.google_books_id.label('key'), *Book.columns_for(fields))
+        .where(Book.google_books_id.in_(google_books_ids))
+    ).all()
+    return {row.key: book_dict(row, fields) for row in rows}
+
+
+def stale_google_ids(google_books_ids, stale_before):
+    """The IDs among google_books_ids of books last synced before stale_before (see Book.is_stale)"""
+    return db.session.execute(
+        select(Book.google_books_id).where(
+            Book.google_books_id.in_(google_books_ids),
+            or_(Book.refreshed_at.is_(None), Book.refreshed_at < stale_before)
+        )
+    ).scalars().all()
+
+
+def public_groups(search='', page=1, per_page=20):
+    """A page of public groups, optionally filtered by name"""
+    statement = select(*GROUP_COLUMNS).where(ReadingGroup.is_public.is_(True))
+    if search:
+        statement = statement.where(ReadingGroup.name.ilike(f'%{search}%'))
+    return paginate_rows(statement, group_dict, page, per_page)
+
+
+def joined_groups(user_id):
+    """The groups a user is a member of"""
+    rows = db.session.execute(
+        select(*GROUP_COLUMNS).join(GroupMember, GroupMember.group_id == ReadingGroup.id)
+        .where(GroupMember.user_id == user_id)
+    ).all()
+    return [group_dict(row) for row in rows]
+
+
+def group_details(group_id):
+    """A group with its members and their users, or None when there is no such group"""
+    group = db.session.execute(select(*GROUP_COLUMNS).where(ReadingGroup.id == group_id)).first()
+    if group is None:
+        return None
+
+    rows = db.session.execute(
+        select(*MEMBER_COLUMNS, *MEMBER_USER_COLUMNS)
+        .outerjoin(User, GroupMember.user_id == User.id)
+        .where(GroupMember.group_id == group_id)
+    ).all()
+
+    data = group_dict(group)
+    data['members'] = [member_dict(row, _member_user(row)) for row in rows]
+    return data
+
+
+class _MemberUser:
+    """The user half of a group_details row, under the attribute names user_dict reads"""
+    __slots__ = ('id', 'name', 'email', 'created_at')
+
+    def __init__(self, row):
+        self.id = row.user_id
+        self.name = row.user_name
+        self.email = row.user_email
+        self.created_at = row.user_created_at
+
+
+def _member_user(row):
+    # name is not nullable, so it is None only when the outer join found no user
+    return _MemberUser(row) if row.user_name is not None else None
@@ -117,13 +117,14 @@ def forgot_password():
         if not user:
             return api_response(None, 'If the email exists, a password reset link has been sent.', 200)
         
-        # Generate reset token
-        reset_token = user.generate_reset_token()
-        db.session.commit()
-        
         # Import email service here to avoid circular imports
         from app.services.email_service import email_service
-        email_service.send_password_reset_email(user.email, reset_token)
+        
+        # Generate reset token and queue the email in the same transaction
+        reset_token = user.generate_reset_token()
+        email_service.queue_password_reset_email(user.email, reset_token)
+        db.session.commit()
+        email_service.notify()
         
         return api_response(None, 'If the email exists, a password reset link has been sent.', 200)
         
@@ -1,12 +1,18 @@
-from flask import Blueprint, request
-from app.services.google_books import GoogleBooksService
-from app.utils.helpers import api_response
+from flask import Blueprint, current_app, request, send_file
+from app.models.book import Book
+from app.services.cover_cache import cover_cache
+from app.services.google_books import google_books_service
+from app.services.recommendations import recommendation_service
+from app.services.trending import trending_service
+from app.utils.circuit_breaker import CircuitOpenError
+from app.utils.helpers import api_response, unavailable_response
 from app.utils.auth import jwt_required
+from app.utils.cache import response_cache
 
 books_bp = Blueprint('books', __name__)
-google_books_service = GoogleBooksService()
 
 @books_bp.route('/search', methods=['GET'])
+@response_cache.cached('SEARCH_CACHE_TTL')
 def search_books():
     try:
         query = request.args.get('q', '')
@@ -16,8 +22,13 @@ def search_books():
         if not query:
             return api_response(None, 'Search query is required', 400)
         
+        try:
+            fields = Book.parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return api_response(None, str(e), 400)
+        
         books, total_count = google_books_service.search_books(
-            query, max_results, start_index
+            query, max_results, start_index, fields
         )
         
         return api_response({
@@ -30,12 +41,18 @@ def search_books():
         return api_response(None, 'Search failed', 500, str(e))
 
 @books_bp.route('/categories/<category>', methods=['GET'])
+@response_cache.cached('SEARCH_CACHE_TTL')
 def get_books_by_category(category):
     try:
         max_results = int(request.args.get('limit', 12))
         
+        try:
+            fields = Book.parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return api_response(None, str(e), 400)
+        
         books, total_count = google_books_service.get_books_by_category(
-            category, max_results
+            category, max_results, fields
         )
         
         return api_response({
@@ -47,6 +64,31 @@ def get_books_by_category(category):
     except Exception as e:
         return api_response(None, 'Failed to fetch category books', 500, str(e))
 
+@books_bp.route('/batch', methods=['GET'])
+def get_books_batch():
+    try:
+        book_ids = [book_id.strip() for book_id in request.args.get('ids', '').split(',') if book_id.strip()]
+        max_ids = current_app.config.get('BOOKS_BATCH_MAX_IDS', 40)
+        
+        if not book_ids:
+            return api_response(None, 'ids is required', 400)
+        if len(book_ids) > max_ids:
+            return api_response(None, f'At most {max_ids} ids per request', 400)
+        
+        try:
+            fields = Book.parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return api_response(None, str(e), 400)
+        
+        books = google_books_service.get_books_by_ids(book_ids, fields)
+        
+        return api_response({
+            'books': books
+        }, 'Book details retrieved successfully')
+        
+    except Exception as e:
+        return api_response(None, 'Failed to fetch book details', 500, str(e))
+
 @books_bp.route('/<book_id>', methods=['GET'])
 def get_book_details(book_id):
     try:
@@ -59,25 +101,82 @@ def get_book_details(book_id):
             'book': book
         }, 'Book details retrieved successfully')
         
+    except CircuitOpenError as e:
+        # Not stored locally and Google isn't being asked: unknown, not missing
+        return unavailable_response(e)
     except Exception as e:
         return api_response(None, 'Failed to fetch book details', 500, str(e))
 
-@books_bp.route('/bestsellers', methods=['GET'])
-def get_bestsellers():
+@books_bp.route('/<book_id>/cover', methods=['GET'])
+def get_book_cover(book_id):
+    """Serve a book's cover image from the local cover cache"""
+    try:
+        book = Book.query.filter_by(google_books_id=book_id).first()
+        if book:
+            thumbnail = book.thumbnail
+        else:
+            thumbnail = (google_books_service.get_book_by_id(book_id) or {}).get('thumbnail')
+        
+        # Only covers on Google's image hosts are fetched; thumbnails can come from clients
+        if not cover_cache.source_url(thumbnail):
+            return api_response(None, 'Cover not found', 404)
+        
+        cover = cover_cache.get(thumbnail)
+        if not cover:
+            return api_response(None, 'Cover temporarily unavailable', 502)
+        
+        path, digest, mimetype = cover
+        response = send_file(path, mimetype=mimetype, etag=digest, conditional=True,
+                             max_age=current_app.config.get('COVER_MAX_AGE', 30 * 24 * 3600))
+        response.cache_control.public = True
+        return response
+        
+    except CircuitOpenError as e:
+        return unavailable_response(e)
+    except Exception as e:
+        return api_response(None, 'Failed to fetch cover', 500, str(e))
+
+@books_bp.route('/<book_id>/similar', methods=['GET'])
+def get_similar_books(book_id):
     try:
-        # Get popular books from various categories
-        categories = ['fiction', 'science', 'technology', 'history', 'biography']
-        all_books = []
+        limit = min(int(request.args.get('limit', 10)), 50)
+        
+        books = recommendation_service.similar_books(book_id, limit)
+        if books is None:
+            return api_response(None, 'Book not found', 404)
         
-        for category in categories[:3]:  # Limit to 3 categories for performance
-            books, _ = google_books_service.get_books_by_category(category, 4)
-            all_books.extend(books)
+        return api_response({
+            'books': books,
+            'book_id': book_id
+        }, 'Similar books retrieved successfully')
         
-        # Sort by rating
-        all_books.sort(key=lambda x: x.get('rating', 0), reverse=True)
+    except Exception as e:
+        return api_response(None, 'Failed to fetch similar books', 500, str(e))
+
+@books_bp.route('/recommendations', methods=['GET'])
+@jwt_required
+def get_recommendations(current_user):
+    try:
+        limit = min(int(request.args.get('limit', 12)), 50)
+        
+        books = recommendation_service.recommend_for_user(current_user.id, limit)
+        
+        return api_response({
+            'books': books
+        }, 'Recommendations retrieved successfully')
+        
+    except Exception as e:
+        return api_response(None, 'Failed to fetch recommendations', 500, str(e))
+
+@books_bp.route('/bestsellers', methods=['GET'])
+@response_cache.cached('BESTSELLERS_CACHE_TTL')
+def get_bestsellers():
+    try:
+        # Trending from our own shelving activity; no Google Books call
+        limit = min(int(request.args.get('limit', 12)), current_app.config.get('TRENDING_SIZE', 50))
         
         return api_response({
-            'books': all_books[:12]  # Return top 12
+            'books': trending_service.top(limit)
         }, 'Bestsellers retrieved successfully')
         
     except Exception as e:
@@ -1,60 +1,43 @@
 import logging
 import json
-from flask import Blueprint, request
-from app import db
+from datetime import datetime
+from flask import Blueprint, current_app, request
+from sqlalchemy import and_, delete, select, update
+from sqlalchemy.dialects.sqlite import insert
+from app import db, read_models
 from app.models.bookshelf import Bookshelf
 from app.models.book import Book
-from app.services.google_books import GoogleBooksService
-from app.utils.helpers import api_response
+from app.services.google_books import google_books_service
+from app.services.write_queue import write_queue
+from app.signals import shelf_changed
+from app.utils.circuit_breaker import CircuitOpenError
+from app.utils.helpers import api_response, unavailable_response
 from app.utils.auth import jwt_required
+from app.utils.query_budget import query_budget
 
 bookshelf_bp = Blueprint('bookshelf', __name__)
-google_books_service = GoogleBooksService()
 
 @bookshelf_bp.route('', methods=['GET'])
 @jwt_required
+@query_budget(1)
 def get_bookshelf(current_user):
     """Retrieves all bookshelf entries for the current user, organized by shelf."""
     try:
-        bookshelf_entries = Bookshelf.query.filter_by(user_id=current_user.id).all()
-        
+        fields = Book.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return api_response(None, str(e), 400)
+    
+    try:
         organized_shelves = {
             'reading': [],
             'wantToRead': [],
             'finished': []
         }
         
-        for entry in bookshelf_entries:
-            if entry.shelf_type in organized_shelves:
-                book_dict = {
-                    'book': {
-                        'id': entry.book.google_books_id,
-                        'google_books_id': entry.book.google_books_id,
-                        'title': entry.book.title,
-                        'authors': entry.book.get_authors(),
-                        'thumbnail': entry.book.thumbnail,
-                        'page_count': entry.book.page_count,
-                        'description': entry.book.description,
-                        'average_rating': entry.book.average_rating,
-                        'preview_link': entry.book.preview_link,
-                        'info_link': entry.book.info_link,
-                        'volumeInfo': {
-                            'title': entry.book.title,
-                            'authors': entry.book.get_authors(),
-                            'imageLinks': {
-                                'thumbnail': entry.book.thumbnail
-                            } if entry.book.thumbnail else {},
-                            'pageCount': entry.book.page_count,
-                            'description': entry.book.description,
-                            'averageRating': entry.book.average_rating,
-                            'previewLink': entry.book.preview_link,
-                            'infoLink': entry.book.info_link
-                        }
-                    },
-                    'shelf_type': entry.shelf_type,
-                    'added_at': entry.added_at.isoformat() if entry.added_at else None
-                }
-                organized_shelves[entry.shelf_type].append(book_dict)
+        # Only the book columns the projection serializes are read
+        for shelf_type, entry in read_models.shelf_entries(current_user.id, fields):
+            if shelf_type in organized_shelves:
+                organized_shelves[shelf_type].append(entry)
         
         return api_response({'bookshelves': organized_shelves}, 'Bookshelf retrieved successfully')
         
@@ -62,6 +45,68 @@ def get_bookshelf(current_user):
         logging.error(f"Error fetching bookshelf for user {current_user.id}: {e}", exc_info=True)
         return api_response(None, 'Failed to fetch bookshelf', 500)
 
+def _book_row(google_books_id, book_data):
+    """Column values for a book from client-supplied book_data or a Google Books dict"""
+    authors = book_data.get('authors', ['Unknown Author'])
+    categories = book_data.get('categories', [])
+    return {
+        'google_books_id': google_books_id,
+        'title': book_data.get('title', 'Unknown Title'),
+        'authors': json.dumps(authors) if authors else None,
+        'description': book_data.get('description', ''),
+        'categories': json.dumps(categories) if categories else None,
+        'thumbnail': book_data.get('thumbnail', ''),
+        'average_rating': book_data.get('average_rating', book_data.get('rating', 0)),
+        'ratings_count': book_data.get('ratings_count', 0),
+        'published_date': book_data.get('published_date', ''),
+        'page_count': book_data.get('page_count', 0),
+        'language': book_data.get('language', 'en'),
+        'preview_link': book_data.get('preview_link', ''),
+        'info_link': book_data.get('info_link', ''),
+        # Never synced from Google: the catalog refresher replaces what the client sent
+        'refreshed_at': None
+    }
+
+def _shelve(user_id, google_books_id, shelf_type, book_data):
+    """
+    Write queue operation: store the book if needed and put it on the shelf.
+    Both writes are upserts, so concurrent or retried adds can't collide.
+    Returns (book id, previous shelf), or None when the book is unknown and
+    no book_data was given.
+    """
+    book_id, previous_shelf = db.session.execute(
+        select(Book.id, Bookshelf.shelf_type).outerjoin(
+            Bookshelf, and_(Bookshelf.book_id == Book.id, Bookshelf.user_id == user_id)
+        ).where(Book.google_books_id == google_books_id)
+    ).first() or (None, None)
+    
+    if book_id is None:
+        if not book_data:
+            return None
+        # The no-op update makes RETURNING give the id when another request stored the book first
+        book = insert(Book).values(_book_row(google_books_id, book_data))
+        book_id = db.session.execute(book.on_conflict_do_update(
+            index_elements=[Book.google_books_id],
+            set_={'google_books_id': book.excluded.google_books_id}
+        ).returning(Book.id)).scalar_one()
+    
+    entry = insert(Bookshelf).values(user_id=user_id, book_id=book_id, shelf_type=shelf_type)
+    db.session.execute(entry.on_conflict_do_update(
+        index_elements=[Bookshelf.user_id, Bookshelf.book_id],
+        set_={'shelf_type': entry.excluded.shelf_type, 'updated_at': datetime.utcnow()}
+    ))
+    return book_id, previous_shelf
+
+def _move_entry(entry_id, to_shelf):
+    """Write queue operation: returns the number of entries moved"""
+    return db.session.execute(
+        update(Bookshelf).where(Bookshelf.id == entry_id).values(shelf_type=to_shelf)
+    ).rowcount
+
+def _delete_entry(entry_id):
+    """Write queue operation: returns the number of entries removed"""
+    return db.session.execute(delete(Bookshelf).where(Bookshelf.id == entry_id)).rowcount
+
 @bookshelf_bp.route('/add', methods=['POST'])
 @jwt_required
 def add_to_bookshelf(current_user):
@@ -81,78 +126,27 @@ def add_to_bookshelf(current_user):
         if shelf_type not in ['reading', 'wantToRead', 'finished']:
             return api_response(None, 'Invalid shelf type', 400)
         
-        # --- Transaction Start ---
-        
-        # Step 1: Find the book in our local DB or create it from Google's API or provided book_data.
-        book = Book.query.filter_by(google_books_id=book_id).first()
-        
-        if not book:
-            # Use provided book_data if available, otherwise fetch from Google Books API
-            if book_data:
-                book = Book(
-                    google_books_id=book_id,
-                    title=book_data.get('title', 'Unknown Title'),
-                    description=book_data.get('description', ''),
-                    thumbnail=book_data.get('thumbnail', ''),
-                    average_rating=book_data.get('average_rating', 0),
-                    ratings_count=book_data.get('ratings_count', 0),
-                    published_date=book_data.get('published_date', ''),
-                    page_count=book_data.get('page_count', 0),
-                    language=book_data.get('language', 'en'),
-                    preview_link=book_data.get('preview_link', ''),
-                    info_link=book_data.get('info_link', '')
-                )
-                book.set_authors(book_data.get('authors', ['Unknown Author']))
-                book.set_categories(book_data.get('categories', []))
-            else:
-                # Fetch book details from Google Books API
-                book_data_from_google = google_books_service.get_book_by_id(book_id)
-                if not book_data_from_google:
-                    return api_response(None, 'Book not found via Google API', 404)
-                
-                book = Book(
-                    google_books_id=book_id,
-                    title=book_data_from_google.get('title', 'Unknown Title'),
-                    description=book_data_from_google.get('description', ''),
-                    thumbnail=book_data_from_google.get('thumbnail', ''),
-                    average_rating=book_data_from_google.get('average_rating', 0),
-                    ratings_count=book_data_from_google.get('ratings_count', 0),
-                    published_date=book_data_from_google.get('published_date', ''),
-                    page_count=book_data_from_google.get('page_count', 0),
-                    language=book_data_from_google.get('language', 'en'),
-                    preview_link=book_data_from_google.get('preview_link', ''),
-                    info_link=book_data_from_google.get('info_link', '')
-                )
-                book.set_authors(book_data_from_google.get('authors', ['Unknown Author']))
-                book.set_categories(book_data_from_google.get('categories', []))
-            
-            db.session.add(book)
-            db.session.flush()
-
-        # Step 2: Check if book already exists in user's bookshelf
-        existing_entry = Bookshelf.query.filter_by(
-            user_id=current_user.id, 
-            book_id=book.id
-        ).first()
+        # Step 1: Without book_data, unknown books are looked up on Google before anything is written
+        if not book_data and not Book.query.filter_by(google_books_id=book_id).first():
+            book_data = google_books_service.get_book_by_id(book_id)
+            if not book_data:
+                return api_response(None, 'Book not found via Google API', 404)
+        
+        # Step 2: Store the book and shelve it in the next group commit
+        shelved = write_queue.submit(_shelve, current_user.id, book_id, shelf_type, book_data or {})
+        if shelved is None:
+            return api_response(None, 'Book not found', 404)
+        
+        local_book_id, previous_shelf = shelved
+        message = 'Book moved to new shelf' if previous_shelf else 'Book added to shelf'
         
-        if existing_entry:
-            # Update existing entry
-            existing_entry.shelf_type = shelf_type
-            message = 'Book moved to new shelf'
-        else:
-            # Create new entry
-            new_entry = Bookshelf(
-                user_id=current_user.id,
-                book_id=book.id,
-                shelf_type=shelf_type
-            )
-            db.session.add(new_entry)
-            message = 'Book added to shelf'
-        
-        db.session.commit()
+        shelf_changed.send(current_app._get_current_object(), user_id=current_user.id, book_id=local_book_id,
+                           shelf_type=shelf_type, previous_shelf=previous_shelf)
         
         return api_response(None, message)
         
+    except CircuitOpenError as e:
+        return unavailable_response(e)
     except Exception as e:
         db.session.rollback()
         logging.error(f"Failed to add book for user {current_user.id}: {e}", exc_info=True)
@@ -183,8 +177,12 @@ def move_book(current_user):
         if not entry:
             return api_response(None, 'Book not found in your bookshelf', 404)
         
-        entry.shelf_type = to_shelf
-        db.session.commit()
+        book_id, previous_shelf = entry.book_id, entry.shelf_type
+        if not write_queue.submit(_move_entry, entry.id, to_shelf):
+            return api_response(None, 'Book not found in your bookshelf', 404)
+        
+        shelf_changed.send(current_app._get_current_object(), user_id=current_user.id, book_id=book_id,
+                           shelf_type=to_shelf, previous_shelf=previous_shelf)
         
         return api_response(None, 'Book moved successfully')
         
@@ -218,8 +216,12 @@ def remove_from_bookshelf(current_user):
         if shelf_type and entry.shelf_type != shelf_type:
             return api_response(None, 'Book not found in specified shelf', 404)
         
-        db.session.delete(entry)
-        db.session.commit()
+        book_id, previous_shelf = entry.book_id, entry.shelf_type
+        if not write_queue.submit(_delete_entry, entry.id):
+            return api_response(None, 'Book not found in your bookshelf', 404)
+        
+        shelf_changed.send(current_app._get_current_object(), user_id=current_user.id, book_id=book_id,
+                           shelf_type=None, previous_shelf=previous_shelf)
         
         return api_response(None, 'Book removed from shelf')
         
@@ -1,27 +1,28 @@
-from flask import Blueprint, request
-from app import db
+from flask import Blueprint, current_app, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import and_, delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from app import db, read_models
 from app.models.group import ReadingGroup, GroupMember
-from app.utils.helpers import api_response, paginate_query
+from app.services.activity_feed import InvalidCursor, activity_feed
+from app.services.group_reading import group_reading_service
+from app.services.write_queue import write_queue
+from app.signals import membership_changed
+from app.utils.helpers import api_response
 from app.utils.auth import jwt_required
+from app.utils.query_budget import query_budget
 
 community_bp = Blueprint('community', __name__)
 
 @community_bp.route('/groups', methods=['GET'])
+@query_budget(2)
 def get_groups():
     try:
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
         search = request.args.get('search', '')
         
-        # Base query
-        query = ReadingGroup.query.filter_by(is_public=True)
-        
-        # Apply search filter
-        if search:
-            query = query.filter(ReadingGroup.name.ilike(f'%{search}%'))
-        
-        # Paginate results
-        paginated_groups = paginate_query(query, page, per_page)
+        paginated_groups = read_models.public_groups(search, page, per_page)
         
         return api_response({
             'groups': paginated_groups
@@ -55,6 +56,7 @@ def create_group(current_user):
         )
         
         db.session.add(group)
+        db.session.flush()
         
         # Add creator as admin member
         member = GroupMember(
@@ -65,6 +67,8 @@ def create_group(current_user):
         db.session.add(member)
         
         db.session.commit()
+        membership_changed.send(current_app._get_current_object(), group_id=group.id,
+                                user_id=current_user.id, action='joined')
         
         return api_response({
             'group': group.to_dict()
@@ -76,20 +80,27 @@ def create_group(current_user):
 
 @community_bp.route('/groups/joined', methods=['GET'])
 @jwt_required
+@query_budget(1)
 def get_joined_groups(current_user):
     try:
         # Get groups where user is a member
-        joined_groups = ReadingGroup.query.join(GroupMember).filter(
-            GroupMember.user_id == current_user.id
-        ).all()
+        joined_groups = read_models.joined_groups(current_user.id)
         
         return api_response({
-            'groups': [group.to_dict() for group in joined_groups]
+            'groups': joined_groups
         }, 'Joined groups retrieved successfully')
         
     except Exception as e:
         return api_response(None, 'Failed to fetch joined groups', 500, str(e))
 
+def _add_member(group_id, user_id):
+    """Write queue operation: add user_id to the group as a member"""
+    db.session.execute(insert(GroupMember).values(group_id=group_id, user_id=user_id, role='member'))
+
+def _delete_member(membership_id):
+    """Write queue operation: returns the number of memberships removed"""
+    return db.session.execute(delete(GroupMember).where(GroupMember.id == membership_id)).rowcount
+
 @community_bp.route('/groups/<int:group_id>/join', methods=['POST'])
 @jwt_required
 def join_group(current_user, group_id):
@@ -108,15 +119,14 @@ def join_group(current_user, group_id):
         if existing_member:
             return api_response(None, 'Already a member of this group', 409)
         
-        # Add as member
-        member = GroupMember(
-            group_id=group_id,
-            user_id=current_user.id,
-            role='member'
-        )
+        # Add as member in the next group commit
+        try:
+            write_queue.submit(_add_member, group_id, current_user.id)
+        except IntegrityError:
+            return api_response(None, 'Already a member of this group', 409)
         
-        db.session.add(member)
-        db.session.commit()
+        membership_changed.send(current_app._get_current_object(), group_id=group_id,
+                                user_id=current_user.id, action='joined')
         
         return api_response(None, 'Joined group successfully')
         
@@ -148,8 +158,11 @@ def leave_group(current_user, group_id):
             if not other_admins:
                 return api_response(None, 'Cannot leave as the only admin. Transfer ownership or delete group.', 400)
         
-        db.session.delete(membership)
-        db.session.commit()
+        if not write_queue.submit(_delete_member, membership.id):
+            return api_response(None, 'Not a member of this group', 404)
+        
+        membership_changed.send(current_app._get_current_object(), group_id=group_id,
+                                user_id=current_user.id, action='left')
         
         return api_response(None, 'Left group successfully')
         
@@ -158,22 +171,93 @@ def leave_group(current_user, group_id):
         return api_response(None, 'Failed to leave group', 500, str(e))
 
 @community_bp.route('/groups/<int:group_id>', methods=['GET'])
+@query_budget(2)
 def get_group_details(group_id):
     try:
-        group = ReadingGroup.query.get(group_id)
+        # The group, then its members with their users in one query
+        group_data = read_models.group_details(group_id)
         
-        if not group:
+        if not group_data:
             return api_response(None, 'Group not found', 404)
         
-        # Get group members
-        members = GroupMember.query.filter_by(group_id=group_id).all()
-        
-        group_data = group.to_dict()
-        group_data['members'] = [member.to_dict() for member in members]
-        
         return api_response({
             'group': group_data
         }, 'Group details retrieved successfully')
         
     except Exception as e:
-        return api_response(None, 'Failed to fetch group details', 500, str(e))
\ No newline at end of file
+        return api_response(None, 'Failed to fetch group details', 500, str(e))
+
+def _group_access_error(group_id):
+    """
+    None when the caller may see the group's reading and activity, else the
+    error response. Public groups are open to everyone; a private group
+    needs the access token of one of its members.
+    """
+    try:
+        verify_jwt_in_request(optional=True)
+        user_id = get_jwt_identity()
+    except Exception:
+        return api_response(None, 'Invalid or expired token', 401)
+    
+    # The group and the caller's membership in one query
+    row = db.session.execute(
+        select(ReadingGroup.is_public, GroupMember.id).outerjoin(
+            GroupMember, and_(GroupMember.group_id == ReadingGroup.id, GroupMember.user_id == user_id)
+        ).where(ReadingGroup.id == group_id)
+    ).first()
+    if row is None:
+        return api_response(None, 'Group not found', 404)
+    
+    is_public, membership_id = row
+    if is_public:
+        return None
+    if user_id is None:
+        return api_response(None, 'Sign in to see this private group', 401)
+    if membership_id is None:
+        return api_response(None, 'Not a member of this group', 403)
+    return None
+
+@community_bp.route('/groups/<int:group_id>/reading', methods=['GET'])
+@query_budget(3)
+def get_group_reading(group_id):
+    try:
+        error = _group_access_error(group_id)
+        if error:
+            return error
+        
+        limit = min(int(request.args.get('limit', 10)), current_app.config.get('GROUP_READING_SIZE', 20))
+        
+        dashboard = group_reading_service.dashboard(group_id, limit)
+        if dashboard is None:
+            return api_response(None, 'Group not found', 404)
+        
+        return api_response(dashboard, 'Group reading retrieved successfully')
+        
+    except Exception as e:
+        return api_response(None, 'Failed to fetch group reading', 500, str(e))
+
+@community_bp.route('/groups/<int:group_id>/activity', methods=['GET'])
+@query_budget(5)
+def get_group_activity(group_id):
+    try:
+        error = _group_access_error(group_id)
+        if error:
+            return error
+        
+        limit = min(int(request.args.get('limit', 20)), 100)
+        
+        group = db.session.get(ReadingGroup, group_id)
+        if not group:
+            return api_response(None, 'Group not found', 404)
+        
+        activities, next_cursor = activity_feed.feed(group, limit, request.args.get('cursor'))
+        
+        return api_response({
+            'activities': activities,
+            'next_cursor': next_cursor
+        }, 'Group activity retrieved successfully')
+        
+    except InvalidCursor as e:
+        return api_response(None, 'Invalid cursor', 400, str(e))
+    except Exception as e:
+        return api_response(None, 'Failed to fetch group activity', 500, str(e))
\ No newline at end of file
@@ -0,0 +1,122 @@
+import logging
+import time
+from flask import Blueprint, Response, current_app, jsonify, request
+from flask_jwt_extended import decode_token
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from app import db
+from app.models.group import GroupMember
+from app.models.user import User
+from app.services.live_events import StreamLimitReached, event_hub
+from app.utils.auth import jwt_required
+from app.utils.helpers import api_response
+
+events_bp = Blueprint('events', __name__)
+
+def _ticket_serializer():
+    # Its own salt, so a ticket is no use as a token anywhere else
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='events-stream')
+
+@events_bp.route('/ticket', methods=['POST'])
+@jwt_required
+def create_ticket(current_user):
+    """
+    A short-lived ticket for opening one event stream. EventSource can't send
+    headers, so browsers pass it as ?ticket= instead of their access token;
+    URLs end up in access logs, and a logged ticket soon stops working.
+    """
+    try:
+        expires_in = current_app.config.get('EVENTS_TICKET_SECONDS', 60)
+        return api_response({
+            'ticket': _ticket_serializer().dumps(current_user.id),
+            'expires_in': expires_in
+        }, 'Stream ticket created')
+        
+    except Exception as e:
+        logging.error(f"Error creating stream ticket for user {current_user.id}: {e}", exc_info=True)
+        return api_response(None, 'Failed to create stream ticket', 500)
+
+def _authenticate():
+    """The user of a ?ticket= from /ticket, or of a Bearer access token"""
+    ticket = request.args.get('ticket')
+    if ticket:
+        try:
+            user_id = _ticket_serializer().loads(
+                ticket, max_age=current_app.config.get('EVENTS_TICKET_SECONDS', 60)
+            )
+        except BadSignature:
+            return None
+        return db.session.get(User, int(user_id))
+    
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return None
+    try:
+        user_id = decode_token(header[7:])['sub']
+    except Exception:
+        return None
+    return db.session.get(User, int(user_id))
+
+@events_bp.route('/stream', methods=['GET'])
+def stream():
+    """
+    Server-Sent Events: the user's own shelf changes and membership changes in
+    their groups. Reconnects resume after Last-Event-ID, on any worker; a
+    'reset' event means missed events are gone and the client should refetch.
+    A worker that already holds EVENTS_MAX_STREAMS streams answers 503, so
+    streams can't take every thread; serve /api/events/ from the gevent
+    server in gunicorn_events.conf.py instead.
+    """
+    current_user = _authenticate()
+    if not current_user:
+        return jsonify({'message': 'Invalid or expired token or ticket'}), 401
+    
+    user_id = current_user.id
+    group_ids = db.session.query(GroupMember.group_id).filter_by(user_id=user_id).all()
+    channels = [f"user:{user_id}"] + [f"group:{group_id}" for group_id, in group_ids]
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    
+    heartbeat = current_app.config.get('EVENTS_HEARTBEAT_INTERVAL', 15)
+    max_seconds = current_app.config.get('EVENTS_MAX_STREAM_SECONDS', 600)
+    retry_ms = current_app.config.get('EVENTS_RETRY_MS', 3000)
+    
+    try:
+        subscription, backlog, complete = event_hub.subscribe(channels, last_event_id)
+    except StreamLimitReached:
+        return jsonify({'message': 'Too many open event streams, try again later'}), 503, {
+            'Retry-After': str(retry_ms // 1000)
+        }
+    
+    # The generator outlives the request context, so it must not touch the database
+    def generate():
+        try:
+            yield f"retry: {retry_ms}\n\n"
+            if not complete:
+                yield "event: reset\ndata: {}\n\n"
+            for event in backlog:
+                yield event.encode()
+            
+            deadline = time.monotonic() + max_seconds
+            while time.monotonic() < deadline:
+                events = subscription.wait(heartbeat)
+                if subscription.overflowed:
+                    yield "event: reset\ndata: {}\n\n"
+                    return
+                if not events:
+                    yield ": heartbeat\n\n"
+                    continue
+                for event in events:
+                    # Follow our own joins and leaves
+                    if event.type == 'membership' and event.data['user_id'] == user_id:
+                        channel = f"group:{event.data['group_id']}"
+                        if event.data['action'] == 'joined':
+                            event_hub.add_channel(subscription, channel)
+                        else:
+                            event_hub.remove_channel(subscription, channel)
+                    yield event.encode()
+        finally:
+            event_hub.unsubscribe(subscription)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
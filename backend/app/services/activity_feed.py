@@ -0,0 +1,230 @@
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import and_, delete, insert, or_, select
+from app import db
+from app.models.activity import GroupActivity
+from app.models.book import Book
+from app.models.bookshelf import Bookshelf
+from app.models.group import ReadingGroup, GroupMember
+from app.models.user import User
+from app.services.write_queue import write_queue
+from app.signals import membership_changed, shelf_changed
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# Shelf entries updated within this long of being added count as added; older data
+# set added_at and updated_at from separate clock reads
+ADDED_WINDOW = timedelta(seconds=1)
+
+
+def _encode_cursor(key):
+    """
+    Timelines page by activity id ('a<id>'). Merged feeds page by the keyset
+    (timestamp, source, id), where source is 'a' for an activity and 's' for
+    a bookshelf entry, so entries sharing a timestamp are not skipped.
+    """
+    if isinstance(key, int):
+        return f"a{key}"
+    created_at, source, entry_id = key
+    return f"k{created_at.isoformat()},{source}{entry_id}"
+
+
+def _decode_cursor(cursor):
+    if not cursor:
+        return None, None
+    try:
+        if cursor[0] == 'a':
+            return 'a', int(cursor[1:])
+        if cursor[0] == 'k':
+            timestamp, entry = cursor[1:].rsplit(',', 1)
+            if entry[:1] in ('a', 's'):
+                return 'k', (datetime.fromisoformat(timestamp), entry[0], int(entry[1:]))
+    except ValueError:
+        pass
+    raise InvalidCursor(f"Invalid cursor {cursor!r}")
+
+
+def _older_than(key, timestamp, entry_id, source):
+    """
+    Condition for rows of `source` whose (timestamp, source, id) sorts
+    before key in the merged feed's newest-first order; shelf entries come
+    before activities with the same timestamp.
+    """
+    created_at, key_source, key_id = key
+    if source == key_source:
+        return or_(timestamp < created_at, and_(timestamp == created_at, entry_id < key_id))
+    if source == 'a':
+        return timestamp <= created_at
+    return timestamp < created_at
+
+
+def _log_failure(future):
+    if future.exception() is not None:
+        logging.error(f"Failed to record group activity: {future.exception()}")
+
+
+class ActivityFeedService:
+    """
+    Per-group activity timelines.
+
+    Shelf changes are fanned out on write: one group_activities row per group
+    the member belongs to, with each timeline trimmed to its newest
+    `max_entries` rows so a page is one range scan of (group_id, id). Groups
+    larger than `fanout_max_members` would churn their timeline faster than
+    anyone reads it, so they only store joins and leaves; their shelf activity
+    is merged in at read time from the members' bookshelves.
+    """
+
+    def __init__(self, app=None):
+        self.max_entries = 500
+        self.fanout_max_members = 1000
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('GROUP_FEED_MAX_ENTRIES', 500)
+        self.fanout_max_members = app.config.get('GROUP_FEED_FANOUT_MAX_MEMBERS', 1000)
+        shelf_changed.connect(self._on_shelf_changed)
+        membership_changed.connect(self._on_membership_changed)
+
+    def _on_shelf_changed(self, sender, user_id, book_id, shelf_type, previous_shelf=None, **extra):
+        if shelf_type is None:
+            action = 'removed'
+        elif previous_shelf is None:
+            action = 'added'
+        elif shelf_type != previous_shelf:
+            action = 'moved'
+        else:
+            return
+
+        group_ids = db.session.execute(
+            select(ReadingGroup.id).join(
+                GroupMember, GroupMember.group_id == ReadingGroup.id
+            ).where(
+                GroupMember.user_id == user_id,
+                ReadingGroup.member_count <= self.fanout_max_members
+            )
+        ).scalars().all()
+        self._write([{
+            'group_id': group_id,
+            'user_id': user_id,
+            'action': action,
+            'book_id': book_id,
+            'shelf_type': shelf_type or previous_shelf
+        } for group_id in group_ids])
+
+    def _on_membership_changed(self, sender, group_id, user_id, action, **extra):
+        self._write([{'group_id': group_id, 'user_id': user_id, 'action': action}])
+
+    def _write(self, rows):
+        if not rows:
+            return
+        # Queued behind the triggering change, without waiting; a lost feed entry must not fail the request
+        write_queue.enqueue(self._insert, rows).add_done_callback(_log_failure)
+    
+    def _insert(self, rows):
+        now = datetime.utcnow()
+        db.session.execute(insert(GroupActivity), [dict(row, created_at=now) for row in rows])
+        for row in rows:
+            self._trim(row['group_id'])
+    
+    def _trim(self, group_id):
+        oldest_kept = select(GroupActivity.id).where(
+            GroupActivity.group_id == group_id
+        ).order_by(GroupActivity.id.desc()).offset(self.max_entries - 1).limit(1).scalar_subquery()
+        db.session.execute(delete(GroupActivity).where(
+            GroupActivity.group_id == group_id,
+            GroupActivity.id < oldest_kept
+        ))
+
+    def feed(self, group, limit=20, cursor=None):
+        """A page of the group's activity, newest first, plus the cursor for the next page"""
+        kind, position = _decode_cursor(cursor)
+        if group.member_count > self.fanout_max_members:
+            keyed = self._merged_page(group.id, limit, kind, position)
+        else:
+            keyed = self._timeline_page(group.id, limit, kind, position)
+
+        next_cursor = _encode_cursor(keyed[limit - 1][0]) if len(keyed) > limit else None
+        return [entry for _, entry in keyed[:limit]], next_cursor
+
+    def _timeline_page(self, group_id, limit, kind, position, actions=None):
+        """(cursor key, entry) pairs; the key is the activity id, or the merged keyset when actions is given"""
+        query = db.session.query(GroupActivity, User.name, Book).join(
+            User, User.id == GroupActivity.user_id
+        ).outerjoin(
+            Book, Book.id == GroupActivity.book_id
+        ).filter(GroupActivity.group_id == group_id)
+
+        if actions:
+            query = query.filter(GroupActivity.action.in_(actions))
+        if kind == 'a':
+            query = query.filter(GroupActivity.id < position)
+        elif kind == 'k':
+            query = query.filter(_older_than(position, GroupActivity.created_at, GroupActivity.id, 'a'))
+
+        if actions:
+            query = query.order_by(GroupActivity.created_at.desc(), GroupActivity.id.desc())
+        else:
+            query = query.order_by(GroupActivity.id.desc())
+        rows = query.limit(limit + 1).all()
+        return [(
+            (activity.created_at, 'a', activity.id) if actions else activity.id,
+            self._entry(activity.id, activity.user_id, name, activity.action, activity.shelf_type,
+                        book, activity.created_at)
+        ) for activity, name, book in rows]
+
+    def _merged_page(self, group_id, limit, kind, position):
+        if kind == 'a':
+            # A timeline cursor from before the group outgrew fan-out
+            created_at = db.session.execute(
+                select(GroupActivity.created_at).where(GroupActivity.id == position)
+            ).scalar() or datetime.utcnow()
+            kind, position = 'k', (created_at, 'a', position)
+
+        memberships = self._timeline_page(group_id, limit, kind, position, actions=('joined', 'left'))
+
+        # Only each member's current shelf state survives, so removals don't show up here
+        query = db.session.query(Bookshelf, User.name, Book).join(
+            GroupMember, GroupMember.user_id == Bookshelf.user_id
+        ).join(
+            User, User.id == Bookshelf.user_id
+        ).join(
+            Book, Book.id == Bookshelf.book_id
+        ).filter(GroupMember.group_id == group_id)
+
+        if kind == 'k':
+            query = query.filter(_older_than(position, Bookshelf.updated_at, Bookshelf.id, 's'))
+
+        rows = query.order_by(Bookshelf.updated_at.desc(), Bookshelf.id.desc()).limit(limit + 1).all()
+        shelvings = [(
+            (entry.updated_at, 's', entry.id),
+            self._entry(None, entry.user_id, name,
+                        'added' if entry.updated_at - entry.added_at <= ADDED_WINDOW else 'moved',
+                        entry.shelf_type, book, entry.updated_at)
+        ) for entry, name, book in rows]
+
+        merged = sorted(memberships + shelvings, key=lambda item: item[0], reverse=True)
+        return merged[:limit + 1]
+
+    @staticmethod
+    def _entry(activity_id, user_id, user_name, action, shelf_type, book, created_at):
+        return {
+            'id': activity_id,
+            'action': action,
+            'user': {'id': user_id, 'name': user_name},
+            'shelf_type': shelf_type,
+            'book': {
+                'google_books_id': book.google_books_id,
+                'title': book.title,
+                'authors': book.get_authors(),
+                'thumbnail': book.thumbnail
+            } if book else None,
+            'created_at': created_at.isoformat()
+        }
+
+# Create a global instance
+activity_feed = ActivityFeedService()
@@ -0,0 +1,104 @@
+import json
+import logging
+import time
+from sqlalchemy import text
+from sqlalchemy.dialects.sqlite import insert
+from app import db
+from app.models.book import Book
+
+# Per-connection settings used while loading: no fsync per commit and a large page cache.
+# A crash mid-load can lose the batches since the last checkpoint, but never corrupts
+# the rows already there, and rerunning the load skips what was stored.
+BULK_PRAGMAS = {'synchronous': 'OFF', 'cache_size': -65536, 'temp_store': 'MEMORY'}
+
+
+def _read_volumes(lines, counts):
+    """Yield volume records from JSONL lines, counting the ones that cannot be used"""
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            logging.warning(f"Catalog ingest: line {number} is not valid JSON")
+            counts['invalid'] += 1
+            continue
+        if not isinstance(record, dict) or not record.get('id'):
+            counts['invalid'] += 1
+            continue
+        yield record
+
+
+class CatalogIngester:
+    """
+    Pre-seeds the books table from a JSONL file of Google Books volume
+    records, one per line. Rows are mapped like Book.create_from_google_books
+    and inserted `batch_size` at a time with INSERT ... ON CONFLICT DO
+    NOTHING, so books already in the catalog are kept as they are and a load
+    can be rerun after an interruption. The load uses one connection with
+    relaxed pragmas and finishes with REINDEX and ANALYZE of the books table.
+    """
+
+    def __init__(self, app=None):
+        self.batch_size = 5000
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.batch_size = app.config.get('CATALOG_INGEST_BATCH_SIZE', 5000)
+
+    def ingest(self, lines, batch_size=None, progress=None, synced_at=None):
+        """
+        Load volumes from lines; progress(counts, rows_per_second) is called
+        after each batch. synced_at is when the records were fetched from
+        Google. Without it refreshed_at is left NULL, so the stale book
+        refresher treats the imported rows as never synced.
+        """
+        batch_size = batch_size or self.batch_size
+        counts = {'read': 0, 'inserted': 0, 'skipped': 0, 'invalid': 0}
+        statement = insert(Book).on_conflict_do_nothing(index_elements=[Book.google_books_id])
+        timer = time.perf_counter()
+
+        def rate():
+            return round(counts['read'] / max(time.perf_counter() - timer, 1e-9))
+
+        with db.engine.connect() as connection:
+            previous = {name: connection.exec_driver_sql(f'PRAGMA {name}').scalar() for name in BULK_PRAGMAS}
+            for name, value in BULK_PRAGMAS.items():
+                connection.exec_driver_sql(f'PRAGMA {name} = {value}')
+            try:
+                batch = []
+                for record in _read_volumes(lines, counts):
+                    batch.append(dict(Book.google_books_row(record), refreshed_at=synced_at))
+                    if len(batch) >= batch_size:
+                        self._insert(connection, statement, batch, counts)
+                        batch = []
+                        if progress:
+                            progress(counts, rate())
+                if batch:
+                    self._insert(connection, statement, batch, counts)
+                    if progress:
+                        progress(counts, rate())
+
+                # The books table has no full-text index; rebuild its indexes and planner statistics
+                connection.execute(text('REINDEX books'))
+                connection.execute(text('ANALYZE books'))
+                connection.commit()
+            finally:
+                for name, value in previous.items():
+                    connection.exec_driver_sql(f'PRAGMA {name} = {value}')
+
+        summary = dict(counts, seconds=round(time.perf_counter() - timer, 2), rows_per_second=rate())
+        logging.info(f"Catalog ingest: {json.dumps(summary)}")
+        return summary
+
+    def _insert(self, connection, statement, batch, counts):
+        inserted = connection.execute(statement, batch).rowcount
+        connection.commit()
+        counts['read'] += len(batch)
+        counts['inserted'] += inserted
+        counts['skipped'] += len(batch) - inserted
+
+# Create a global instance
+catalog_ingester = CatalogIngester()
@@ -0,0 +1,212 @@
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import requests
+from flask import current_app
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.dialects.sqlite import insert
+from app import db
+from app.models.book import Book
+from app.models.bookshelf import Bookshelf
+from app.models.job_state import JobState
+from app.services.google_books import google_books_service, upsert_books
+from app.services.write_queue import write_queue
+from app.utils.circuit_breaker import CircuitOpenError
+
+STATE_KEY = 'catalog_refresh'
+LEASE_KEY = 'catalog_refresh_lease'
+
+
+def _is_missing(error):
+    """Client errors such as 404 mean Google no longer serves the volume; anything else is worth retrying"""
+    response = getattr(error, 'response', None)
+    return response is not None and response.status_code < 500 and response.status_code != 429
+
+
+class _RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _apply_refresh(rows, missing, state):
+    """Write queue operation: store refreshed books and the job's progress in one transaction"""
+    now = datetime.utcnow()
+    if rows:
+        upsert_books(rows, now, ('google_books_id',))
+    if missing:
+        # Volumes Google no longer serves are left alone until they are stale again
+        db.session.execute(update(Book).where(Book.google_books_id.in_(missing)).values(refreshed_at=now))
+    JobState.save(STATE_KEY, state)
+
+
+class CatalogRefresher:
+    """
+    Re-syncs stale books with Google Books.
+
+    A run picks up to `budget` books last synced more than BOOK_CACHE_MAX_AGE
+    ago, the most stale and most shelved first (age in days times one plus
+    the number of shelvings). It fetches them on `concurrency` threads at no
+    more than `rate` requests per second and writes every `batch_size` books
+    in one transaction. The books still to do are saved with every batch, so
+    a run that is interrupted or stops on upstream errors is resumed by the
+    next one.
+    """
+
+    def __init__(self, app=None):
+        self.budget = 500
+        self.concurrency = 4
+        self.rate = 5.0
+        self.batch_size = 50
+        self.interval = 0
+        self.app = None
+        self._thread = None
+        self._stopping = threading.Event()
+        self._run_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.budget = app.config.get('CATALOG_REFRESH_BUDGET', 500)
+        self.concurrency = app.config.get('CATALOG_REFRESH_CONCURRENCY', 4)
+        self.rate = app.config.get('CATALOG_REFRESH_RATE', 5.0)
+        self.batch_size = app.config.get('CATALOG_REFRESH_BATCH_SIZE', 50)
+        self.interval = app.config.get('CATALOG_REFRESH_INTERVAL', 0)
+        self.app = app
+
+    def stale_books(self, limit):
+        """Google Books IDs of the `limit` books most in need of a refresh"""
+        max_age = current_app.config.get('BOOK_CACHE_MAX_AGE', 7 * 24 * 3600)
+        # Never synced (refreshed_at NULL, e.g. bulk imports of unknown age) counts as oldest
+        age_days = func.julianday('now') - func.coalesce(func.julianday(Book.refreshed_at), 0)
+        shelvings = select(
+            Bookshelf.book_id, func.count().label('count')
+        ).group_by(Bookshelf.book_id).subquery()
+
+        return db.session.execute(
+            select(Book.google_books_id).outerjoin(
+                shelvings, shelvings.c.book_id == Book.id
+            ).where(
+                or_(Book.refreshed_at.is_(None), Book.refreshed_at < datetime.utcnow() - timedelta(seconds=max_age))
+            ).order_by(
+                (age_days * (1 + func.coalesce(shelvings.c.count, 0))).desc()
+            ).limit(limit)
+        ).scalars().all()
+
+    def run(self, budget=None):
+        """Refresh up to budget books, resuming an unfinished run first; returns a summary"""
+        if not self._run_lock.acquire(blocking=False):
+            return {'skipped': 'already running'}
+        try:
+            return self._run(budget or self.budget)
+        finally:
+            self._run_lock.release()
+
+    def _run(self, budget):
+        timer = time.perf_counter()
+        state = JobState.load(STATE_KEY, {})
+        resumed = bool(state.get('pending'))
+        if resumed:
+            pending, leftover = state['pending'][:budget], state['pending'][budget:]
+        else:
+            pending, leftover = self.stale_books(budget), []
+        state = dict(state, pending=pending + leftover, started_at=datetime.utcnow().isoformat())
+        JobState.save(STATE_KEY, state)
+        db.session.commit()
+
+        app = current_app._get_current_object()
+        limiter = _RateLimiter(self.rate)
+        api_key, base_url = google_books_service._get_config()
+        params = google_books_service._api_params(api_key)
+
+        def fetch(google_books_id):
+            limiter.wait()
+            with app.app_context():
+                try:
+                    data = google_books_service._get_json(base_url, f"/{google_books_id}", params, 'refresh')
+                    return 'refreshed', data
+                except requests.HTTPError as e:
+                    return ('missing' if _is_missing(e) else 'failed'), e
+                except (requests.RequestException, CircuitOpenError) as e:
+                    return 'failed', e
+
+        counts = {'refreshed': 0, 'missing': 0, 'failed': 0}
+        retry = []
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix='catalog-refresh') as pool:
+            for start in range(0, len(pending), self.batch_size):
+                chunk = pending[start:start + self.batch_size]
+                rows, missing, failed = [], [], []
+                for google_books_id, (outcome, result) in zip(chunk, pool.map(fetch, chunk)):
+                    counts[outcome] += 1
+                    if outcome == 'refreshed' and result.get('id'):
+                        rows.append(Book.google_books_row(result))
+                    elif outcome == 'failed':
+                        failed.append(google_books_id)
+                    else:
+                        missing.append(google_books_id)
+
+                # Upstream failures are kept for the next run; an outage ends this one early
+                retry += failed
+                remaining = retry + pending[start + len(chunk):] + leftover
+                state = dict(state, pending=remaining)
+                if not remaining:
+                    state['last_run'] = datetime.utcnow().isoformat()
+                write_queue.submit(_apply_refresh, rows, missing, state)
+                if len(failed) > len(chunk) // 2:
+                    break
+
+        summary = dict(counts, resumed=resumed, selected=len(pending), pending=len(state['pending']),
+                       seconds=round(time.perf_counter() - timer, 2))
+        logging.info(f"Catalog refresh: {json.dumps(summary)}")
+        return summary
+
+    def _claim(self):
+        """Take the scheduled-run lease, so only one process per interval runs the job"""
+        now = datetime.utcnow()
+        statement = insert(JobState).values(name=LEASE_KEY, updated_at=now)
+        claimed = db.session.execute(statement.on_conflict_do_update(
+            index_elements=[JobState.name],
+            set_={'updated_at': now},
+            where=JobState.updated_at < now - timedelta(seconds=self.interval * 0.9)
+        ).returning(JobState.name)).first()
+        db.session.commit()
+        return claimed is not None
+
+    def start_scheduler(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._schedule, name='catalog-refresh', daemon=True)
+        self._thread.start()
+
+    def stop_scheduler(self, timeout=5):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _schedule(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                with self.app.app_context():
+                    if self._claim():
+                        self.run()
+            except Exception as e:
+                logging.error(f"Catalog refresh failed: {e}", exc_info=True)
+
+# Create a global instance
+catalog_refresher = CatalogRefresher()
@@ -0,0 +1,267 @@
+import hashlib
+import ipaddress
+import logging
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from app.utils.registry import services
+from app.utils.singleflight import SingleFlight
+
+
+class _PublicHTTPSConnection(HTTPSConnection):
+    """
+    Refuses to talk to loopback, private, link-local or otherwise non-public
+    addresses. The check runs on the socket that was actually connected,
+    before the TLS handshake, so a DNS answer that changes between a lookup
+    and the connect can't point a fetch at an internal service.
+    """
+
+    def _new_conn(self):
+        sock = super()._new_conn()
+        address = sock.getpeername()[0]
+        if not ipaddress.ip_address(address.split('%')[0]).is_global:
+            sock.close()
+            raise ValueError(f"Refusing to fetch cover from non-public address {address}")
+        return sock
+
+
+class _PublicHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _PublicHTTPSConnection
+
+
+class _PublicOnlyAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        # A copy: the default mapping is shared by every pool manager in the process
+        self.poolmanager.pool_classes_by_scheme = {'http': HTTPConnectionPool, 'https': _PublicHTTPSConnectionPool}
+
+
+def _create_session(app):
+    session = requests.Session()
+    session.mount('https://', _PublicOnlyAdapter())
+    # Through a proxy the connected address would be the proxy's, not the cover host's
+    session.trust_env = False
+    return session
+
+
+services.register('cover_cache_session', _create_session)
+
+
+class CoverCache:
+    """
+    On-disk, content-addressed cache of book cover images.
+
+    Image bytes live in objects/<xx>/<sha256>; refs/<sha1 of url> maps a source
+    URL to its object, so covers shared by several URLs are stored once. An
+    object's mtime is bumped on every hit, and the sweeper evicts the least
+    recently used objects once the cache grows past its size limit.
+
+    Thumbnail URLs can come from clients, so only https URLs on Google's
+    cover hosts (COVER_ALLOWED_HOSTS; a leading dot matches subdomains) are
+    fetched, only from public addresses, and redirects are not followed.
+    """
+
+    def __init__(self, app=None):
+        self.directory = None
+        self.max_bytes = 500 * 1024 * 1024
+        self.fetch_timeout = 5
+        self.max_image_bytes = 2 * 1024 * 1024
+        self.sweep_interval = 600
+        self.allowed_hosts = ('books.google.com', '.googleusercontent.com')
+        self._app = None
+        self._singleflight = SingleFlight()
+        self._bytes_since_sweep = 0
+        self._sweep_lock = threading.Lock()
+        self._sweeper = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.directory = app.config.get('COVER_CACHE_DIR') or os.path.join(app.instance_path, 'covers')
+        self.max_bytes = app.config.get('COVER_CACHE_MAX_BYTES', 500 * 1024 * 1024)
+        self.fetch_timeout = app.config.get('COVER_FETCH_TIMEOUT', 5)
+        self.max_image_bytes = app.config.get('COVER_MAX_IMAGE_BYTES', 2 * 1024 * 1024)
+        self.sweep_interval = app.config.get('COVER_CACHE_SWEEP_INTERVAL', 600)
+        self.allowed_hosts = tuple(app.config.get('COVER_ALLOWED_HOSTS', self.allowed_hosts))
+        self._app = app
+
+    def reset_connections(self, app):
+        """Drop the app's HTTP session, e.g. in a freshly forked worker; it is rebuilt on next use"""
+        services.reset(app, 'cover_cache_session')
+
+    def source_url(self, url):
+        """
+        The https URL to fetch a thumbnail from, or None when it is not on an
+        allowed cover host. Google returns http thumbnail links, so http is
+        upgraded for those hosts.
+        """
+        try:
+            parts = urlsplit(url or '')
+            host = (parts.hostname or '').lower()
+            port = parts.port
+        except ValueError:
+            return None
+        if parts.scheme not in ('http', 'https') or parts.username or parts.password or port not in (None, 443):
+            return None
+        if not any(host == allowed or (allowed.startswith('.') and host.endswith(allowed))
+                   for allowed in self.allowed_hosts):
+            return None
+        return urlunsplit(('https', host, parts.path, parts.query, ''))
+
+    def _object_path(self, digest):
+        return os.path.join(self.directory, 'objects', digest[:2], digest)
+
+    def _ref_path(self, url):
+        return os.path.join(self.directory, 'refs', hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    def _read_ref(self, url):
+        try:
+            with open(self._ref_path(url), encoding='utf-8') as f:
+                digest, mimetype = f.read().split('\n', 1)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        path = self._object_path(digest)
+        try:
+            # Mark as recently used for LRU eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path, digest, mimetype.strip() or 'image/jpeg'
+
+    @staticmethod
+    def _write_atomic(path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, url):
+        """
+        Return (path, etag, mimetype) for the image at url, fetching it on first
+        use. None if unavailable or not an allowed cover URL (see source_url).
+        """
+        url = self.source_url(url)
+        if not url:
+            return None
+        cached = self._read_ref(url)
+        if cached:
+            return cached
+        try:
+            return self._singleflight.do(url, lambda: self._fetch(url), self.fetch_timeout * 2)
+        except Exception as e:
+            logging.warning(f"Failed to fetch cover {url}: {e}")
+            return None
+
+    def _fetch(self, url):
+        cached = self._read_ref(url)
+        if cached:
+            return cached
+
+        session = services.get('cover_cache_session', current_app._get_current_object() if current_app else self._app)
+        # Closing the streamed response on every path gives its connection back (or drops it mid-body)
+        with session.get(url, timeout=self.fetch_timeout, stream=True, allow_redirects=False) as response:
+            response.raise_for_status()
+            if response.is_redirect:
+                raise ValueError(f"Cover URL redirects to {response.headers.get('Location')}")
+            mimetype = response.headers.get('Content-Type', 'image/jpeg').split(';')[0].strip()
+            if not mimetype.startswith('image/'):
+                raise ValueError(f"Unexpected content type {mimetype}")
+
+            data = response.raw.read(self.max_image_bytes + 1, decode_content=True)
+            if len(data) > self.max_image_bytes:
+                raise ValueError(f"Image larger than {self.max_image_bytes} bytes")
+
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            self._write_atomic(path, data)
+            self._bytes_since_sweep += len(data)
+        self._write_atomic(self._ref_path(url), f"{digest}\n{mimetype}".encode('utf-8'))
+
+        # Sweep early when a burst of new covers may have pushed us past the limit
+        if self._bytes_since_sweep > self.max_bytes // 10:
+            threading.Thread(target=self.sweep, daemon=True).start()
+        return path, digest, mimetype
+
+    def sweep(self):
+        """Evict least recently used objects until the cache is under 90% of its size limit"""
+        if not self._sweep_lock.acquire(blocking=False):
+            return 0
+        try:
+            self._bytes_since_sweep = 0
+            objects_dir = os.path.join(self.directory, 'objects')
+            entries = []
+            total = 0
+            for root, _, files in os.walk(objects_dir):
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+
+            if total <= self.max_bytes:
+                return 0
+
+            target = int(self.max_bytes * 0.9)
+            removed = 0
+            entries.sort()
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+
+            # Drop refs whose objects were evicted
+            refs_dir = os.path.join(self.directory, 'refs')
+            if removed and os.path.isdir(refs_dir):
+                for name in os.listdir(refs_dir):
+                    ref = os.path.join(refs_dir, name)
+                    try:
+                        with open(ref, encoding='utf-8') as f:
+                            digest = f.read().split('\n', 1)[0]
+                        if not os.path.exists(self._object_path(digest)):
+                            os.remove(ref)
+                    except (FileNotFoundError, IndexError):
+                        continue
+            return removed
+        finally:
+            self._sweep_lock.release()
+
+    def start_sweeper(self):
+        if self._sweeper and self._sweeper.is_alive():
+            return
+
+        def run():
+            while True:
+                time.sleep(self.sweep_interval)
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logging.error(f"Cover cache sweep failed: {e}", exc_info=True)
+
+        self._sweeper = threading.Thread(target=run, name='cover-cache-sweeper', daemon=True)
+        self._sweeper.start()
+
+# Create a global instance
+cover_cache = CoverCache()
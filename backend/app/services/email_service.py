@@ -1,39 +1,214 @@
 import logging
+import smtplib
+import threading
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from app.utils.registry import services
 
 class EmailService:
     def __init__(self):
         # Default configuration - will be updated when app is available
+        self.app = None
         self.smtp_server = 'smtp.gmail.com'
         self.smtp_port = 587
         self.smtp_username = None
         self.smtp_password = None
+        self.smtp_use_tls = True
+        self.smtp_timeout = 10
         self.from_email = 'noreply@bookifyme.com'
-    
+        self.backend = 'console'
+        self.batch_size = 50
+        self.max_attempts = 5
+        self.retry_base_delay = 30
+        self.retry_max_delay = 3600
+        self.poll_interval = 5
+        self.claim_seconds = 300
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
     def init_app(self, app):
         """Initialize the email service with app configuration"""
+        self.app = app
         self.smtp_server = app.config.get('SMTP_SERVER', 'smtp.gmail.com')
         self.smtp_port = app.config.get('SMTP_PORT', 587)
         self.smtp_username = app.config.get('SMTP_USERNAME')
         self.smtp_password = app.config.get('SMTP_PASSWORD')
+        self.smtp_use_tls = app.config.get('SMTP_USE_TLS', True)
+        self.smtp_timeout = app.config.get('SMTP_TIMEOUT', 10)
         self.from_email = app.config.get('FROM_EMAIL', 'noreply@bookifyme.com')
-    
-    def send_password_reset_email(self, user_email, reset_token):
+        # Without credentials there is nothing to talk to, so print to the console
+        self.backend = app.config.get('EMAIL_BACKEND') or ('smtp' if self.smtp_username else 'console')
+        self.batch_size = app.config.get('EMAIL_BATCH_SIZE', 50)
+        self.max_attempts = app.config.get('EMAIL_MAX_ATTEMPTS', 5)
+        self.retry_base_delay = app.config.get('EMAIL_RETRY_BASE_DELAY', 30)
+        self.retry_max_delay = app.config.get('EMAIL_RETRY_MAX_DELAY', 3600)
+        self.poll_interval = app.config.get('EMAIL_POLL_INTERVAL', 5)
+        self.claim_seconds = app.config.get('EMAIL_CLAIM_SECONDS', 300)
+
+    def queue_password_reset_email(self, user_email, reset_token):
+        """
+        Add a password reset email to the outbox in the current session.
+        The caller's commit makes the token and the email durable together.
+        """
+        from app import db
+        from app.models.email_outbox import EmailOutbox
+
+        reset_link = f"http://localhost:5500/#reset-password?token={reset_token}"
+        message = EmailOutbox(
+            recipient=user_email,
+            subject='Reset your BookifyMe password',
+            body=(
+                "We received a request to reset your BookifyMe password.\n\n"
+                f"Open this link to choose a new password:\n{reset_link}\n\n"
+                "This link expires in 1 hour. If you did not request a reset, ignore this email."
+            )
+        )
+        db.session.add(message)
+        return message
+
+    def notify(self):
+        """Wake the dispatcher so newly committed messages go out without waiting a poll interval"""
+        self._wakeup.set()
+
+    # --- Dispatcher ---
+
+    def _create_dispatcher(self, app):
+        """Registry factory for 'email_dispatcher': the app's running dispatcher thread"""
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='email-dispatcher', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def start_dispatcher(self):
+        if not services.get('email_dispatcher', self.app).is_alive():
+            # Stopped, or started in the parent of a forked worker
+            services.reset(self.app, 'email_dispatcher')
+            services.get('email_dispatcher', self.app)
+
+    def stop_dispatcher(self, timeout=5):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        services.reset(self.app, 'email_dispatcher')
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            if self._stopping.is_set():
+                break
+            try:
+                with self.app.app_context():
+                    # Keep draining while full batches come back
+                    while self.dispatch_pending() >= self.batch_size:
+                        pass
+            except Exception as e:
+                logging.error(f"Email dispatcher error: {e}", exc_info=True)
+
+    def dispatch_pending(self):
+        """Send one batch of due messages over a single connection. Returns the batch size."""
+        from sqlalchemy import select, update
+        from app import db
+        from app.models.email_outbox import EmailOutbox
+
+        # Claim the batch by pushing its next attempt out, in one statement, so that
+        # dispatchers in other worker processes skip it. A crashed claim just expires.
+        now = datetime.utcnow()
+        due = select(EmailOutbox.id).where(
+            EmailOutbox.status == 'pending',
+            EmailOutbox.next_attempt_at <= now
+        ).order_by(EmailOutbox.next_attempt_at).limit(self.batch_size)
+        claimed = db.session.execute(
+            update(EmailOutbox).where(
+                EmailOutbox.id.in_(due),
+                EmailOutbox.next_attempt_at <= now
+            ).values(
+                next_attempt_at=now + timedelta(seconds=self.claim_seconds)
+            ).returning(EmailOutbox.id)
+        ).scalars().all()
+        db.session.commit()
+
+        if not claimed:
+            return 0
+        batch = EmailOutbox.query.filter(EmailOutbox.id.in_(claimed)).order_by(EmailOutbox.id).all()
+
         try:
-            reset_link = f"http://localhost:5500/#reset-password?token={reset_token}"
-            
-            print("🔐 PASSWORD RESET REQUEST")
-            print(f"📧 Email: {user_email}")
-            print(f"🔗 Reset Link: {reset_link}")
-            print("💡 Copy this link and open it in your browser to reset your password.")
-            print("⏰ This link expires in 1 hour.")
-            print("=" * 60)
-            
-            logging.info(f"Password reset token for {user_email}: {reset_token}")
-            return True
-            
+            connection = self._open_connection()
         except Exception as e:
-            logging.error(f"Error in email service: {e}")
-            return True
+            logging.warning(f"Could not connect to SMTP server {self.smtp_server}:{self.smtp_port}: {e}")
+            for message in batch:
+                self._schedule_retry(message, e)
+            db.session.commit()
+            return len(batch)
+
+        for index, message in enumerate(batch):
+            try:
+                self._deliver(connection, message)
+                message.status = 'sent'
+                message.sent_at = datetime.utcnow()
+                message.last_error = None
+            except smtplib.SMTPServerDisconnected as e:
+                self._schedule_retry(message, e)
+                # Reconnect for the rest of the batch, or retry all of it later
+                try:
+                    connection = self._open_connection()
+                except Exception as e:
+                    for remaining in batch[index + 1:]:
+                        self._schedule_retry(remaining, e)
+                    connection = None
+                    break
+            except Exception as e:
+                self._schedule_retry(message, e)
+
+        self._close_connection(connection)
+        db.session.commit()
+        return len(batch)
+
+    def _schedule_retry(self, message, error):
+        message.attempts += 1
+        message.last_error = str(error)
+        if message.attempts >= self.max_attempts:
+            message.status = 'failed'
+            logging.error(f"Giving up on email {message.id} to {message.recipient}: {error}")
+            return
+        delay = min(self.retry_base_delay * 2 ** (message.attempts - 1), self.retry_max_delay)
+        message.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+
+    def _open_connection(self):
+        if self.backend != 'smtp':
+            return None
+        connection = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.smtp_timeout)
+        if self.smtp_use_tls:
+            connection.starttls()
+        if self.smtp_username:
+            connection.login(self.smtp_username, self.smtp_password)
+        return connection
+
+    def _close_connection(self, connection):
+        if connection is None:
+            return
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+
+    def _deliver(self, connection, message):
+        if connection is None:
+            print(f"📧 Email to {message.recipient}: {message.subject}")
+            print(message.body)
+            print("=" * 60)
+            return
+
+        email = EmailMessage()
+        email['From'] = self.from_email
+        email['To'] = message.recipient
+        email['Subject'] = message.subject
+        email.set_content(message.body)
+        connection.send_message(email)
 
 # Create a global instance
-email_service = EmailService()
\ No newline at end of file
+email_service = EmailService()
+services.register('email_dispatcher', email_service._create_dispatcher)
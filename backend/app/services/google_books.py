@@ -1,17 +1,87 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta
 import requests
 from flask import current_app
-from app.models.book import Book
-from app import db
+from sqlalchemy import or_
+from sqlalchemy.dialects.sqlite import insert
+from app.models.book import Book, book_dict
+from app import db, read_models
+from app.utils.metrics import google_books_coalesced, google_books_duration, google_books_errors
+from app.utils.singleflight import SingleFlight, SingleFlightTimeout
+from app.utils.cache import skip_response_cache
+from app.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.google_books_transport import create_transport, fixture_key
+from app.utils.registry import services
+from app.services.write_queue import write_queue
+
+
+def _create_breaker(config):
+    return CircuitBreaker(
+        'google_books',
+        window=config.get('GOOGLE_BOOKS_BREAKER_WINDOW', 30),
+        min_calls=config.get('GOOGLE_BOOKS_BREAKER_MIN_CALLS', 10),
+        failure_rate=config.get('GOOGLE_BOOKS_BREAKER_FAILURE_RATE', 0.5),
+        slow_call_seconds=config.get('GOOGLE_BOOKS_BREAKER_SLOW_CALL_SECONDS', 2.0),
+        slow_call_rate=config.get('GOOGLE_BOOKS_BREAKER_SLOW_CALL_RATE', 0.5),
+        open_seconds=config.get('GOOGLE_BOOKS_BREAKER_OPEN_SECONDS', 30)
+    )
+
+
+services.register('google_books_transport', lambda app: create_transport(app.config))
+services.register('google_books_breaker', lambda app: _create_breaker(app.config))
+
+
+# Errors that mean Google couldn't answer; callers fall back to local data
+UPSTREAM_ERRORS = (requests.RequestException, CircuitOpenError)
+
+
+def _is_upstream_failure(error):
+    """Client errors such as an unknown volume ID say nothing about Google's health"""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status >= 500 or status == 429
+    return True
+
+
+def upsert_books(rows, stale_before, fields):
+    """
+    Write queue operation: insert rows, refreshing existing books last synced
+    before stale_before. Returns {google_books_id: book dict} for the rows written.
+    """
+    statement = insert(Book).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[Book.google_books_id],
+        set_={name: statement.excluded[name] for name in rows[0] if name != 'google_books_id'},
+        where=or_(Book.refreshed_at.is_(None), Book.refreshed_at < stale_before)
+    ).returning(Book.google_books_id.label('key'), *Book.columns_for(fields))
+    return {row.key: book_dict(row, fields) for row in db.session.execute(statement)}
+
 
 class GoogleBooksService:
     def __init__(self, app=None):
         self.app = app
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='book-refresh')
+        self._fetch_executor = None
+        self._singleflight = SingleFlight()
         if app is not None:
             self.init_app(app)
     
     def init_app(self, app):
         self.api_key = app.config.get('GOOGLE_BOOKS_API_KEY')
         self.base_url = app.config.get('GOOGLE_BOOKS_BASE_URL', 'https://www.googleapis.com/books/v1/volumes')
+        # Threads are only started once a batch lookup needs them
+        self._fetch_executor = ThreadPoolExecutor(
+            max_workers=app.config.get('GOOGLE_BOOKS_BATCH_CONCURRENCY', 8),
+            thread_name_prefix='google-books-fetch'
+        )
+    
+    def reset_connections(self, app):
+        """Give the app a new transport and HTTP pool, e.g. in a freshly forked worker"""
+        services.reset(app, 'google_books_transport')
     
     def _get_config(self):
         """Get configuration from current_app or stored app"""
@@ -22,81 +92,257 @@ class GoogleBooksService:
         else:
             return None, 'https://www.googleapis.com/books/v1/volumes'
     
-    def search_books(self, query, max_results=12, start_index=0):
-        """Search books using Google Books API"""
+    def _get_transport(self):
+        """Get the app's shared transport (live, record or replay)"""
+        return services.get('google_books_transport', current_app._get_current_object() if current_app else self.app)
+    
+    def _get_breaker(self):
+        """Get the app's shared circuit breaker for the Google Books dependency"""
+        return services.get('google_books_breaker', current_app._get_current_object() if current_app else self.app)
+    
+    def _api_params(self, api_key, **params):
+        if api_key and api_key != 'your-google-books-api-key':
+            params['key'] = api_key
+        return params
+    
+    def search_books(self, query, max_results=12, start_index=0, fields=None):
+        """Search books using Google Books API; fields is a Book.parse_fields projection"""
         try:
             api_key, base_url = self._get_config()
-            url = f"{base_url}?q={query}&maxResults={max_results}&startIndex={start_index}"
-            if api_key and api_key != 'your-google-books-api-key':
-                url += f"&key={api_key}"
+            params = self._api_params(api_key, q=query, maxResults=max_results, startIndex=start_index)
             
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_json(base_url, '', params, 'search')
             
-            books = []
-            if data.get('items'):
-                for item in data['items']:
-                    book = self._process_book_item(item)
-                    if book:
-                        books.append(book)
+            books = list(self._store_books(data.get('items') or [], fields).values())
             
             return books, len(books)
             
-        except requests.RequestException as e:
+        except UPSTREAM_ERRORS as e:
             print(f"Google Books API error: {str(e)}")
-            return [], 0
+            return self.search_local(query, max_results, start_index, fields)
         except Exception as e:
             print(f"Unexpected error in search_books: {str(e)}")
             return [], 0
     
-    def get_books_by_category(self, category, max_results=12):
+    def search_local(self, query, max_results=12, start_index=0, fields=None):
+        """
+        Search the local books table. Used as the fallback while Google is
+        unavailable, so the response is kept out of the response cache.
+        """
+        skip_response_cache()
+        
+        books = read_models.search_books(query, max_results, start_index, fields)
+        return books, len(books)
+    
+    def get_books_by_category(self, category, max_results=12, fields=None):
         """Get books by category"""
         query = f"subject:{category}"
-        return self.search_books(query, max_results)
+        return self.search_books(query, max_results, fields=fields)
     
     def get_book_by_id(self, google_books_id):
-        """Get book details by Google Books ID"""
+        """
+        Get book details by Google Books ID, serving from the local books
+        table when possible. Stale rows are returned as-is and refreshed in
+        the background; only IDs we have never seen go to Google inline, and
+        those raise CircuitOpenError while the breaker is open.
+        """
+        book = Book.query.filter_by(google_books_id=google_books_id).first()
+        if book:
+            if book.is_stale(current_app.config.get('BOOK_CACHE_MAX_AGE', 7 * 24 * 3600)):
+                self._schedule_refresh(google_books_id)
+            return book.to_dict()
+        
+        return self.fetch_book(google_books_id)
+    
+    def fetch_book(self, google_books_id):
+        """
+        Fetch book details from Google Books and store them locally. Returns
+        None when Google doesn't answer; raises CircuitOpenError while the
+        breaker is open, because then nobody knows whether the book exists.
+        """
         try:
             api_key, base_url = self._get_config()
-            url = f"{base_url}/{google_books_id}"
-            if api_key and api_key != 'your-google-books-api-key':
-                url += f"?key={api_key}"
+            params = self._api_params(api_key)
             
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
+            data = self._get_json(base_url, f"/{google_books_id}", params, 'get_book')
             
             return self._process_book_item(data)
             
-        except requests.RequestException as e:
+        except CircuitOpenError:
+            raise
+        except UPSTREAM_ERRORS as e:
             print(f"Google Books API error: {str(e)}")
             return None
         except Exception as e:
-            print(f"Unexpected error in get_book_by_id: {str(e)}")
+            print(f"Unexpected error in fetch_book: {str(e)}")
             return None
     
-    def _process_book_item(self, item):
-        """Process Google Books API item and cache in database"""
-        if not item.get('id'):
-            return None
+    def get_books_by_ids(self, google_books_ids, fields=None):
+        """
+        Look up several books at once: local rows in one IN query, then the
+        misses from Google concurrently (_get_json_many), stored with one
+        upsert. Returns one {'id', 'book'} or {'id', 'error'} entry
+        per requested ID, in order.
+        """
+        unique_ids = list(dict.fromkeys(google_books_ids))
+        found = read_models.books_by_google_id(unique_ids, fields)
+        max_age = current_app.config.get('BOOK_CACHE_MAX_AGE', 7 * 24 * 3600)
+        if found:
+            stale_before = datetime.utcnow() - timedelta(seconds=max_age)
+            for google_books_id in read_models.stale_google_ids(list(found), stale_before):
+                self._schedule_refresh(google_books_id)
         
-        # Check if book already exists in our database
-        existing_book = Book.query.filter_by(google_books_id=item['id']).first()
-        if existing_book:
-            return existing_book.to_dict()
+        errors = {}
+        misses = [google_books_id for google_books_id in unique_ids if google_books_id not in found]
+        if misses:
+            api_key, base_url = self._get_config()
+            responses = self._get_json_many(base_url, [f"/{google_books_id}" for google_books_id in misses],
+                                            self._api_params(api_key), 'get_book')
+            items = []
+            for google_books_id, response in zip(misses, responses):
+                # A 4xx means Google has no such volume
+                if isinstance(response, Exception) and not _is_upstream_failure(response):
+                    errors[google_books_id] = 'not_found'
+                elif isinstance(response, Exception):
+                    print(f"Google Books API error: {str(response)}")
+                    errors[google_books_id] = 'unavailable'
+                else:
+                    items.append(response)
+            found.update(self._store_books(items, fields))
+        
+        results = []
+        for google_books_id in google_books_ids:
+            if google_books_id in found:
+                results.append({'id': google_books_id, 'book': found[google_books_id]})
+            else:
+                results.append({'id': google_books_id, 'error': errors.get(google_books_id, 'not_found')})
+        return results
+    
+    def _schedule_refresh(self, google_books_id):
+        """Refresh a stale book on a background thread, once per ID at a time"""
+        with self._refresh_lock:
+            if google_books_id in self._refreshing:
+                return
+            self._refreshing.add(google_books_id)
+        
+        app = current_app._get_current_object()
+        
+        def refresh():
+            try:
+                with app.app_context():
+                    self.fetch_book(google_books_id)
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(google_books_id)
+        
+        self._refresh_executor.submit(refresh)
+    
+    def _get_json(self, base_url, path, params, operation):
+        """
+        Call the Google Books API. Concurrent identical calls share one
+        upstream request; each waiter gives up after GOOGLE_BOOKS_COALESCE_TIMEOUT.
+        """
+        key = (base_url, fixture_key(path, params))
+        timeout = current_app.config.get('GOOGLE_BOOKS_COALESCE_TIMEOUT', 10) if current_app else 10
+        led = []
+        
+        breaker = self._get_breaker()
+        
+        def call():
+            led.append(True)
+            return breaker.call(
+                lambda: self._call_upstream(base_url, path, params, operation),
+                is_failure=_is_upstream_failure
+            )
         
-        # Create new book in database
         try:
-            book = Book.create_from_google_books(item)
-            db.session.add(book)
-            db.session.commit()
-            return book.to_dict()
+            data = self._singleflight.do(key, call, timeout)
+        except SingleFlightTimeout as e:
+            google_books_errors.inc(operation=operation, kind='coalesce_timeout')
+            raise requests.Timeout(str(e))
+        except CircuitOpenError:
+            google_books_errors.inc(operation=operation, kind='circuit_open')
+            raise
+        
+        if not led:
+            google_books_coalesced.inc(operation=operation)
+        return data
+    
+    def _get_json_many(self, base_url, paths, params, operation):
+        """
+        _get_json for every path at once on the fetch pool, collected within one
+        GOOGLE_BOOKS_COALESCE_TIMEOUT. Returns each result or the exception it
+        raised, in order.
+        """
+        app = current_app._get_current_object()
+        deadline = time.monotonic() + app.config.get('GOOGLE_BOOKS_COALESCE_TIMEOUT', 10)
+        
+        def fetch(path):
+            with app.app_context():
+                return self._get_json(base_url, path, params, operation)
+        
+        futures = [self._fetch_executor.submit(fetch, path) for path in paths]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result(max(deadline - time.monotonic(), 0)))
+            except FutureTimeoutError:
+                # Still queued behind other lookups; don't start it for nobody
+                future.cancel()
+                google_books_errors.inc(operation=operation, kind='batch_timeout')
+                results.append(requests.Timeout("Timed out waiting for Google Books"))
+            except Exception as e:
+                results.append(e)
+        return results
+    
+    def _call_upstream(self, base_url, path, params, operation):
+        """Call the Google Books API, recording latency and failures"""
+        start = time.perf_counter()
+        try:
+            return self._get_transport().get_json(base_url, path, params)
+        except requests.HTTPError as e:
+            google_books_errors.inc(operation=operation, kind=f'http_{e.response.status_code}')
+            raise
+        except requests.RequestException as e:
+            google_books_errors.inc(operation=operation, kind=type(e).__name__)
+            raise
+        finally:
+            google_books_duration.observe(time.perf_counter() - start, operation=operation)
+    
+    def _process_book_item(self, item, fields=None):
+        """Process Google Books API item and cache in database"""
+        books = self._store_books([item], fields)
+        return next(iter(books.values()), None)
+    
+    def _store_books(self, items, fields=None):
+        """
+        Insert new books and refresh stale ones with one upsert, returning
+        {google_books_id: book dict} in the order given. Books that are still
+        fresh are left alone and read back in one query.
+        """
+        rows = {}
+        for item in items:
+            if item.get('id'):
+                rows[item['id']] = Book.google_books_row(item)
+        if not rows:
+            return {}
+        
+        max_age = current_app.config.get('BOOK_CACHE_MAX_AGE', 7 * 24 * 3600)
+        try:
+            stored = write_queue.submit(upsert_books, list(rows.values()),
+                                        datetime.utcnow() - timedelta(seconds=max_age), fields)
         except Exception as e:
             db.session.rollback()
-            print(f"Error saving book to database: {str(e)}")
+            print(f"Error saving books to database: {str(e)}")
             # Return basic book info even if save fails
-            return self._format_book_data(item)
+            return {item['id']: Book.project(self._format_book_data(item), fields)
+                    for item in items if item.get('id')}
+        
+        fresh = [google_books_id for google_books_id in rows if google_books_id not in stored]
+        if fresh:
+            stored.update(read_models.books_by_google_id(fresh, fields))
+        
+        return {google_books_id: stored[google_books_id] for google_books_id in rows if google_books_id in stored}
     
     def _format_book_data(self, item):
         """Format book data without saving to database"""
@@ -0,0 +1,97 @@
+from datetime import datetime
+from sqlalchemy import func, select
+from app import db
+from app.models.book import Book
+from app.models.bookshelf import Bookshelf
+from app.models.group import ReadingGroup, GroupMember
+from app.signals import membership_changed, shelf_changed
+from app.utils.cache import TTLCache
+
+# Dashboard section for each shelf
+SECTIONS = {'finished': 'most_read', 'reading': 'currently_reading', 'wantToRead': 'most_wanted'}
+
+
+class GroupReadingService:
+    """
+    What a reading group's members are reading, finishing and want to read.
+
+    Each dashboard is one aggregate query over group_members x bookshelves x
+    books, ranked per shelf with a window function, and cached per group until
+    a member's shelf or the membership changes. The cache is per process, so
+    other workers pick up changes when their entry expires.
+    """
+
+    def __init__(self, app=None):
+        self.size = 20
+        self.cache = TTLCache()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.size = app.config.get('GROUP_READING_SIZE', 20)
+        self.cache = TTLCache(
+            max_entries=app.config.get('GROUP_READING_CACHE_MAX_ENTRIES', 512),
+            ttl=app.config.get('GROUP_READING_CACHE_TTL', 300)
+        )
+        shelf_changed.connect(self._on_shelf_changed)
+        membership_changed.connect(self._on_membership_changed)
+
+    def _on_shelf_changed(self, sender, user_id, **extra):
+        if not len(self.cache):
+            return
+        group_ids = db.session.execute(
+            select(GroupMember.group_id).where(GroupMember.user_id == user_id)
+        ).scalars()
+        for group_id in group_ids:
+            self.cache.delete(group_id)
+
+    def _on_membership_changed(self, sender, group_id, **extra):
+        self.cache.delete(group_id)
+
+    def dashboard(self, group_id, limit=10):
+        """Top books per shelf across the group's members, or None if the group doesn't exist"""
+        data = self.cache.get(group_id)
+        if data is None:
+            data = self._compute(group_id)
+            if data is None:
+                return None
+            self.cache.set(group_id, data)
+
+        return dict(data, **{section: data[section][:limit] for section in SECTIONS.values()})
+
+    def _compute(self, group_id):
+        group = db.session.get(ReadingGroup, group_id)
+        if not group:
+            return None
+
+        members = func.count(Bookshelf.id)
+        ranked = select(
+            Bookshelf.book_id,
+            Bookshelf.shelf_type,
+            members.label('members'),
+            func.row_number().over(
+                partition_by=Bookshelf.shelf_type,
+                order_by=(members.desc(), Bookshelf.book_id)
+            ).label('position')
+        ).join(
+            GroupMember, GroupMember.user_id == Bookshelf.user_id
+        ).where(
+            GroupMember.group_id == group_id
+        ).group_by(Bookshelf.shelf_type, Bookshelf.book_id).subquery()
+
+        rows = db.session.query(Book, ranked.c.shelf_type, ranked.c.members).join(
+            ranked, ranked.c.book_id == Book.id
+        ).filter(
+            ranked.c.position <= self.size
+        ).order_by(ranked.c.shelf_type, ranked.c.position).all()
+
+        data = {section: [] for section in SECTIONS.values()}
+        for book, shelf_type, count in rows:
+            data[SECTIONS[shelf_type]].append(dict(book.to_dict(), members=count))
+
+        data['group'] = group.to_dict()
+        data['computed_at'] = datetime.utcnow().isoformat()
+        return data
+
+# Create a global instance
+group_reading_service = GroupReadingService()
@@ -0,0 +1,271 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, insert, or_, select
+from app import db
+from app.models.book import Book
+from app.models.live_event import LiveEvent
+from app.services.write_queue import write_queue
+from app.signals import membership_changed, shelf_changed
+
+
+class StreamLimitReached(RuntimeError):
+    pass
+
+
+class Event:
+    __slots__ = ('id', 'channels', 'type', 'data')
+
+    def __init__(self, event_id, channels, event_type, data):
+        self.id = event_id
+        self.channels = channels
+        self.type = event_type
+        self.data = data
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row.id, set(row.channels.split()), row.type, json.loads(row.data))
+
+    def encode(self):
+        return f"id: {self.id}\nevent: {self.type}\ndata: {json.dumps(self.data)}\n\n"
+
+
+class Subscription:
+    """One connected stream. Events are pushed by the poller and drained by the stream's thread."""
+
+    def __init__(self, channels, max_queue):
+        self.channels = set(channels)
+        self.max_queue = max_queue
+        self.overflowed = False
+        self.delivered_through = 0  # id of the newest event already sent to the client
+        self._events = deque()
+        self._ready = threading.Event()
+
+    def push(self, event):
+        if len(self._events) >= self.max_queue:
+            # The client isn't reading; it will resync after reconnecting
+            self.overflowed = True
+        else:
+            self._events.append(event)
+        self._ready.set()
+
+    def wait(self, timeout):
+        """Block until events arrive or timeout passes, then return the queued events not sent yet"""
+        if not self._events:
+            self._ready.wait(timeout)
+        self._ready.clear()
+        events = []
+        while self._events:
+            event = self._events.popleft()
+            # The backlog read at subscribe time may already have covered it
+            if event.id > self.delivered_through:
+                events.append(event)
+                self.delivered_through = event.id
+        return events
+
+
+def _log_failure(future):
+    if future.exception() is not None:
+        logging.error(f"Failed to record live event: {future.exception()}")
+
+
+class EventHub:
+    """
+    Pub/sub for Server-Sent Events, shared by every worker through the
+    live_events table.
+
+    Publishing inserts a row naming the event's channels (user:<id>,
+    group:<id>). Each process runs one poller thread that reads rows newer
+    than the last one it saw every `poll_interval` seconds and hands them to
+    its own subscribers, so an event reaches clients whatever process they
+    are connected to, and the poller costs one query per interval no matter
+    how many streams are open. Event ids are the row ids, so a client can
+    resume from its Last-Event-ID on any process; rows are kept for
+    `retention` seconds, and a client that was gone longer has to resync.
+
+    Each open stream holds a server thread (or greenlet), so a process
+    accepts at most `max_streams` of them.
+    """
+
+    def __init__(self, app=None):
+        self.poll_interval = 0.5
+        self.retention = 300
+        self.max_queue = 1000
+        self.max_streams = 4
+        self._app = None
+        self._subscriptions = set()
+        self._last_id = None
+        self._last_prune = 0.0
+        self._poller = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.poll_interval = app.config.get('EVENTS_POLL_INTERVAL', 0.5)
+        self.retention = app.config.get('EVENTS_RETENTION_SECONDS', 300)
+        self.max_queue = app.config.get('EVENTS_MAX_QUEUE', 1000)
+        self.max_streams = app.config.get('EVENTS_MAX_STREAMS', 4)
+        self._app = app
+        shelf_changed.connect(self._on_shelf_changed)
+        membership_changed.connect(self._on_membership_changed)
+
+    def publish(self, channels, event_type, data):
+        """Queue one event for everyone subscribed to any of channels; returns a Future for its id"""
+        future = write_queue.enqueue(self._insert, ' '.join([''] + list(channels) + ['']), event_type, json.dumps(data))
+        future.add_done_callback(_log_failure)
+        return future
+
+    @staticmethod
+    def _insert(channels, event_type, data):
+        return db.session.execute(insert(LiveEvent).values(
+            channels=channels, type=event_type, data=data, created_at=datetime.utcnow()
+        ).returning(LiveEvent.id)).scalar_one()
+
+    @staticmethod
+    def _newest_id():
+        return db.session.execute(select(func.max(LiveEvent.id))).scalar() or 0
+
+    def subscribe(self, channels, last_event_id=None):
+        """
+        Register a subscription and return (subscription, backlog, complete).
+        backlog holds the stored events after last_event_id; complete is False
+        when some of them were already pruned and the client must resync.
+        Raises StreamLimitReached when this process has max_streams open.
+        """
+        subscription = Subscription(channels, self.max_queue)
+        with self._lock:
+            if len(self._subscriptions) >= self.max_streams:
+                raise StreamLimitReached(f"{self.max_streams} event streams already open")
+            self._subscriptions.add(subscription)
+        try:
+            backlog, complete = self._backlog(subscription, last_event_id)
+        except Exception:
+            self.unsubscribe(subscription)
+            raise
+
+        with self._lock:
+            # The poller must deliver everything after what this client has seen
+            if self._last_id is None or subscription.delivered_through < self._last_id:
+                self._last_id = subscription.delivered_through
+        self._ensure_poller()
+        return subscription, backlog, complete
+
+    def _backlog(self, subscription, last_event_id):
+        try:
+            last_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            last_id = None
+        if last_id is None:
+            # New clients only get events from now on
+            subscription.delivered_through = self._newest_id()
+            return [], last_event_id is None
+
+        oldest, newest = db.session.execute(select(func.min(LiveEvent.id), func.max(LiveEvent.id))).one()
+        if last_id > (newest or 0):
+            # Not an id from this database
+            subscription.delivered_through = newest or 0
+            return [], False
+
+        rows = db.session.execute(
+            select(LiveEvent).where(
+                LiveEvent.id > last_id,
+                or_(*[LiveEvent.channels.contains(f" {name} ") for name in subscription.channels])
+            ).order_by(LiveEvent.id).limit(self.max_queue + 1)
+        ).scalars().all()
+
+        complete = last_id >= oldest - 1 and len(rows) <= self.max_queue
+        backlog = [Event.from_row(row) for row in rows[:self.max_queue]]
+        subscription.delivered_through = backlog[-1].id if backlog else last_id
+        return backlog, complete
+
+    def add_channel(self, subscription, name):
+        with self._lock:
+            subscription.channels.add(name)
+
+    def remove_channel(self, subscription, name):
+        with self._lock:
+            subscription.channels.discard(name)
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def _dispatch(self, events):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+            matches = [(subscription, event) for event in events for subscription in subscriptions
+                       if subscription.channels & event.channels]
+        for subscription, event in matches:
+            subscription.push(event)
+
+    def poll(self):
+        """Deliver events stored since the last poll to this process's subscribers"""
+        while True:
+            start = self._last_id
+            rows = db.session.execute(
+                select(LiveEvent).where(LiveEvent.id > start).order_by(LiveEvent.id).limit(500)
+            ).scalars().all()
+            if not rows:
+                break
+            with self._lock:
+                # Unless a new subscriber moved it back meanwhile
+                if self._last_id == start:
+                    self._last_id = rows[-1].id
+            self._dispatch([Event.from_row(row) for row in rows])
+            if len(rows) < 500:
+                break
+
+        if time.monotonic() - self._last_prune >= min(self.retention, 60):
+            self._last_prune = time.monotonic()
+            write_queue.enqueue(self._prune).add_done_callback(_log_failure)
+
+    def _prune(self):
+        # Keep the newest row so resuming clients can still tell how far back the table goes
+        newest = select(func.max(LiveEvent.id)).scalar_subquery()
+        db.session.execute(delete(LiveEvent).where(
+            LiveEvent.created_at < datetime.utcnow() - timedelta(seconds=self.retention),
+            LiveEvent.id < newest
+        ))
+
+    def _ensure_poller(self):
+        if self._poller and self._poller.is_alive():
+            return
+        with self._lock:
+            if self._poller and self._poller.is_alive():
+                return
+
+            def run():
+                while True:
+                    time.sleep(self.poll_interval)
+                    if not self._subscriptions:
+                        continue
+                    try:
+                        with self._app.app_context():
+                            self.poll()
+                    except Exception as e:
+                        logging.error(f"Live event poll failed: {e}", exc_info=True)
+
+            self._poller = threading.Thread(target=run, name='live-events-poller', daemon=True)
+            self._poller.start()
+
+    def _on_shelf_changed(self, sender, user_id, book_id, shelf_type, previous_shelf=None, **extra):
+        book = db.session.get(Book, book_id)
+        self.publish([f"user:{user_id}"], 'shelf', {
+            'book_id': book.google_books_id if book else None,
+            'shelf_type': shelf_type,
+            'previous_shelf': previous_shelf
+        })
+
+    def _on_membership_changed(self, sender, group_id, user_id, action, **extra):
+        self.publish([f"group:{group_id}", f"user:{user_id}"], 'membership', {
+            'group_id': group_id,
+            'user_id': user_id,
+            'action': action
+        })
+
+# Create a global instance
+event_hub = EventHub()
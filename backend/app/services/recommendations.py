@@ -0,0 +1,182 @@
+import logging
+import time
+from array import array
+from datetime import datetime
+from sqlalchemy import delete, func, insert, select
+from app import db
+from app.models.book import Book
+from app.models.bookshelf import Bookshelf
+from app.models.recommendation import BookSimilarity
+from app.services.write_queue import write_queue
+from app.utils.registry import services
+
+# How strongly each shelf signals interest in a book
+SHELF_WEIGHTS = {'finished': 1.0, 'reading': 0.8, 'wantToRead': 0.5}
+
+
+def _load_numerics(app):
+    """NumPy and SciPy's sparse module, imported on the first rebuild so that importing the app doesn't pay for them"""
+    import numpy
+    from scipy import sparse
+    return numpy, sparse
+
+
+services.register('recommendations_numerics', _load_numerics)
+
+
+def replace_neighbors(book_ids, rows):
+    """Write queue operation: replace the stored neighbor lists of book_ids with rows"""
+    db.session.execute(delete(BookSimilarity).where(BookSimilarity.book_id.in_(book_ids)))
+    if rows:
+        db.session.execute(insert(BookSimilarity), rows)
+
+
+def prune_neighbors():
+    """Write queue operation: drop the neighbor lists of books nobody shelves any more"""
+    db.session.execute(delete(BookSimilarity).where(
+        BookSimilarity.book_id.not_in(select(Bookshelf.book_id).distinct())
+    ))
+
+
+class RecommendationService:
+    """
+    Item-to-item recommendations from co-shelving. Books are columns of a
+    sparse user x book matrix weighted by shelf; neighbors are the top-K by
+    cosine similarity, computed a block of columns at a time so memory stays
+    bounded, and stored in book_similarities for serving.
+    """
+
+    def __init__(self, app=None):
+        self.top_k = 20
+        self.block_size = 64
+        self.min_score = 0.01
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.top_k = app.config.get('RECOMMENDATIONS_TOP_K', 20)
+        self.block_size = app.config.get('RECOMMENDATIONS_BLOCK_SIZE', 64)
+        self.min_score = app.config.get('RECOMMENDATIONS_MIN_SCORE', 0.01)
+
+    def _load_interactions(self):
+        """Stream (user, book, weight) triples into compact typed arrays"""
+        users, books, weights = array('i'), array('i'), array('f')
+        result = db.session.execute(
+            select(Bookshelf.user_id, Bookshelf.book_id, Bookshelf.shelf_type)
+            .execution_options(yield_per=50000)
+        )
+        for partition in result.partitions():
+            for user_id, book_id, shelf_type in partition:
+                users.append(user_id)
+                books.append(book_id)
+                weights.append(SHELF_WEIGHTS.get(shelf_type, 0.5))
+        return users, books, weights
+
+    def rebuild(self):
+        """
+        Recompute every book's neighbor lists and drop lists for books nobody
+        shelves any more. There is no incremental mode: a changed or removed
+        shelving also moves the scores in other books' lists, and the whole
+        matrix has to be loaded either way.
+        """
+        np, sparse = services.get('recommendations_numerics')
+
+        started_at = datetime.utcnow()
+        timer = time.perf_counter()
+
+        users, books, weights = self._load_interactions()
+        users = np.frombuffer(users, dtype=np.int32)
+        books = np.frombuffer(books, dtype=np.int32)
+        weights = np.frombuffer(weights, dtype=np.float32)
+
+        book_ids, book_columns = np.unique(books, return_inverse=True)
+        _, user_rows = np.unique(users, return_inverse=True)
+        matrix = sparse.csr_matrix(
+            (weights, (user_rows, book_columns)),
+            shape=(int(user_rows.max()) + 1 if len(user_rows) else 0, len(book_ids)),
+            dtype=np.float32
+        )
+        del users, books, weights, user_rows, book_columns
+
+        # Scale every book column to unit length so dot products are cosines
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+        norms[norms == 0] = 1.0
+        normalized = (matrix @ sparse.diags((1.0 / norms).astype(np.float32))).tocsc()
+        normalized_t = normalized.T.tocsr()
+        del matrix
+
+        columns = np.arange(len(book_ids))
+
+        written = 0
+        for start in range(0, len(columns), self.block_size):
+            block_columns = columns[start:start + self.block_size]
+            similarities = (normalized_t @ normalized[:, block_columns]).tocsc()
+
+            rows = []
+            for position, column in enumerate(block_columns):
+                lo, hi = similarities.indptr[position], similarities.indptr[position + 1]
+                neighbors = similarities.indices[lo:hi]
+                scores = similarities.data[lo:hi]
+
+                keep = (neighbors != column) & (scores >= self.min_score)
+                neighbors, scores = neighbors[keep], scores[keep]
+                if len(scores) > self.top_k:
+                    top = np.argpartition(-scores, self.top_k)[:self.top_k]
+                    neighbors, scores = neighbors[top], scores[top]
+                order = np.argsort(-scores, kind='stable')
+
+                book_id = int(book_ids[column])
+                for rank, index in enumerate(order, start=1):
+                    rows.append({
+                        'book_id': book_id,
+                        'similar_book_id': int(book_ids[neighbors[index]]),
+                        'score': float(scores[index]),
+                        'rank': rank,
+                        'computed_at': started_at
+                    })
+
+            # Through the write queue, so a long rebuild doesn't hold SQLite's write lock against requests
+            write_queue.submit(replace_neighbors, [int(book_ids[column]) for column in block_columns], rows)
+            written += len(rows)
+
+        write_queue.submit(prune_neighbors)
+
+        summary = {
+            'books_recomputed': int(len(columns)),
+            'neighbors_written': written,
+            'seconds': round(time.perf_counter() - timer, 2)
+        }
+        logging.info(f"Recommendations rebuilt: {summary}")
+        return summary
+
+    def similar_books(self, google_books_id, limit=10):
+        """Precomputed neighbors of a book, best first. None if the book is unknown."""
+        book = Book.query.filter_by(google_books_id=google_books_id).first()
+        if not book:
+            return None
+
+        rows = db.session.query(Book, BookSimilarity.score).join(
+            BookSimilarity, BookSimilarity.similar_book_id == Book.id
+        ).filter(
+            BookSimilarity.book_id == book.id
+        ).order_by(BookSimilarity.rank).limit(limit).all()
+
+        return [dict(similar.to_dict(), score=round(score, 4)) for similar, score in rows]
+
+    def recommend_for_user(self, user_id, limit=12):
+        """Sum the neighbor scores of everything on the user's shelves, excluding books already shelved"""
+        shelved = select(Bookshelf.book_id).where(Bookshelf.user_id == user_id)
+        score = func.sum(BookSimilarity.score).label('score')
+        ranked = select(BookSimilarity.similar_book_id, score).where(
+            BookSimilarity.book_id.in_(shelved),
+            BookSimilarity.similar_book_id.not_in(shelved)
+        ).group_by(BookSimilarity.similar_book_id).order_by(score.desc()).limit(limit).subquery()
+
+        rows = db.session.query(Book, ranked.c.score).join(
+            ranked, ranked.c.similar_book_id == Book.id
+        ).order_by(ranked.c.score.desc()).all()
+
+        return [dict(book.to_dict(), score=round(score, 4)) for book, score in rows]
+
+# Create a global instance
+recommendation_service = RecommendationService()
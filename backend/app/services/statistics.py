@@ -1,12 +1,15 @@
 from app.models.bookshelf import Bookshelf
 from app.models.book import Book
 from collections import Counter
+from sqlalchemy.orm import joinedload
 
 class StatisticsService:
     @staticmethod
     def get_user_reading_stats(user_id):
         """Get comprehensive reading statistics for a user"""
-        user_bookshelves = Bookshelf.query.filter_by(user_id=user_id).all()
+        user_bookshelves = Bookshelf.query.options(
+            joinedload(Bookshelf.book)
+        ).filter_by(user_id=user_id).all()
         
         finished_books = [bs for bs in user_bookshelves if bs.shelf_type == 'finished']
         reading_books = [bs for bs in user_bookshelves if bs.shelf_type == 'reading']
@@ -0,0 +1,250 @@
+import atexit
+import heapq
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.sqlite import insert
+from app import db
+from app.models.book import Book
+from app.models.popularity import BookPopularity
+from app.services.recommendations import SHELF_WEIGHTS
+from app.services.write_queue import write_queue
+from app.signals import shelf_changed
+
+# Rebase counters before e^(rate * age) gets anywhere near float overflow
+MAX_EXPONENT = 100
+
+
+class TrendingService:
+    """
+    Trending books from our own shelving activity.
+
+    Every add or move bumps a per-book counter that decays exponentially with
+    the configured half-life. Counters use forward decay: an event at time t
+    adds weight * e^(rate * (t - landmark)), so ageing never touches existing
+    counters and ranking is simply by value. Only the `capacity` largest
+    counters are kept in memory, evicting the smallest through a min-heap.
+    Increments are saved to book_popularity every `flush_interval` seconds and
+    merged with what other processes saved.
+    """
+
+    def __init__(self, app=None):
+        self.half_life = 3 * 24 * 3600
+        self.capacity = 1000
+        self.size = 50
+        self.flush_interval = 60
+        self.snapshot_ttl = 1.0
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._app = None
+        self._reset()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.half_life = app.config.get('TRENDING_HALF_LIFE', 3 * 24 * 3600)
+        self.capacity = app.config.get('TRENDING_CAPACITY', 1000)
+        self.size = app.config.get('TRENDING_SIZE', 50)
+        self.flush_interval = app.config.get('TRENDING_FLUSH_INTERVAL', 60)
+        self.snapshot_ttl = app.config.get('TRENDING_SNAPSHOT_TTL', 1.0)
+        self._app = app
+        with self._lock:
+            self._reset()
+
+        shelf_changed.connect(self._on_shelf_changed)
+
+    def _reset(self):
+        self._rate = math.log(2) / self.half_life
+        self._landmark = time.time()
+        self._scores = {}    # book id -> forward-decayed score
+        self._heap = []      # (score, book id); entries go stale as scores grow
+        self._pending = {}   # increments not yet saved, same units as _scores
+        self._loaded = False
+        self._books = {}     # book id -> serialized book, for the snapshot
+        self._snapshot = None
+        self._snapshot_at = 0.0
+        self._dirty = True
+
+    def _forward(self, weight, at):
+        return weight * math.exp(self._rate * (at - self._landmark))
+
+    def _decay_now(self, now):
+        """Factor converting forward-decayed values into scores as of now"""
+        return math.exp(-self._rate * (now - self._landmark))
+
+    def _rebase(self, now):
+        factor = self._decay_now(now)
+        self._landmark = now
+        self._scores = {book_id: score * factor for book_id, score in self._scores.items()}
+        self._pending = {book_id: score * factor for book_id, score in self._pending.items()}
+        self._compact()
+
+    def _compact(self):
+        self._heap = [(score, book_id) for book_id, score in self._scores.items()]
+        heapq.heapify(self._heap)
+
+    def _bump(self, book_id, amount):
+        score = self._scores.get(book_id, 0.0) + amount
+        self._scores[book_id] = score
+        heapq.heappush(self._heap, (score, book_id))
+
+        while len(self._scores) > self.capacity:
+            smallest, candidate = heapq.heappop(self._heap)
+            if self._scores.get(candidate) == smallest:
+                del self._scores[candidate]
+        if len(self._heap) > 4 * self.capacity:
+            self._compact()
+
+    def record(self, book_id, weight=1.0):
+        now = time.time()
+        with self._lock:
+            if self._rate * (now - self._landmark) > MAX_EXPONENT:
+                self._rebase(now)
+            amount = self._forward(weight, now)
+            self._pending[book_id] = self._pending.get(book_id, 0.0) + amount
+            self._bump(book_id, amount)
+            self._dirty = True
+
+    def _on_shelf_changed(self, sender, book_id, shelf_type, previous_shelf=None, **extra):
+        if shelf_type and shelf_type != previous_shelf:
+            self.record(book_id, SHELF_WEIGHTS.get(shelf_type, 0.5))
+
+    def _load(self):
+        """Replace the in-memory counters with the saved top books plus unsaved increments"""
+        now = time.time()
+        now_dt = datetime.utcnow()
+        rows = db.session.execute(
+            select(BookPopularity.book_id, BookPopularity.score, BookPopularity.updated_at)
+            .order_by(BookPopularity.score.desc()).limit(self.capacity * 2)
+        ).all()
+
+        with self._lock:
+            factor = math.exp(self._rate * (now - self._landmark))
+            self._scores = {}
+            for book_id, score, updated_at in rows:
+                age = max((now_dt - updated_at).total_seconds(), 0)
+                self._scores[book_id] = score * math.exp(-self._rate * age) * factor
+            if len(self._scores) > self.capacity:
+                keep = heapq.nlargest(self.capacity, self._scores.items(), key=lambda item: item[1])
+                self._scores = dict(keep)
+            self._compact()
+            for book_id, amount in self._pending.items():
+                self._bump(book_id, amount)
+            self._loaded = True
+            self._dirty = True
+
+    def top(self, limit=12):
+        """Serialized trending books with their current score, best first"""
+        if not self._loaded:
+            self._load()
+
+        if self._snapshot is None or (self._dirty and time.monotonic() - self._snapshot_at >= self.snapshot_ttl):
+            self._snapshot = self._build_snapshot()
+            self._snapshot_at = time.monotonic()
+        return self._snapshot[:limit]
+
+    def _build_snapshot(self):
+        with self._lock:
+            self._dirty = False
+            factor = self._decay_now(time.time())
+            ranked = heapq.nlargest(self.size, self._scores.items(), key=lambda item: item[1])
+
+        missing = [book_id for book_id, _ in ranked if book_id not in self._books]
+        if missing:
+            for book in Book.query.filter(Book.id.in_(missing)).all():
+                self._books[book.id] = book.to_dict()
+
+        snapshot = [
+            dict(self._books[book_id], trending_score=round(score * factor, 4))
+            for book_id, score in ranked if book_id in self._books
+        ]
+        if len(self._books) > self.capacity:
+            keep = {book_id for book_id, _ in ranked}
+            self._books = {book_id: book for book_id, book in self._books.items() if book_id in keep}
+
+        if not snapshot:
+            # Nothing shelved recently; fall back to the best-rated books we have
+            books = Book.query.order_by(
+                Book.ratings_count.desc(), Book.average_rating.desc()
+            ).limit(self.size).all()
+            snapshot = [dict(book.to_dict(), trending_score=0.0) for book in books]
+        return snapshot
+
+    def flush(self):
+        """Save pending increments, merging them into the stored decayed scores in SQL (needs SQLite's exp())"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            now = time.time()
+            factor = self._decay_now(now)
+        if not pending:
+            return 0
+
+        now_dt = datetime.utcnow()
+        rows = [{
+            'book_id': book_id,
+            'score': amount * factor,
+            'updated_at': now_dt
+        } for book_id, amount in pending.items()]
+        # Rows untouched for 30 half-lives have decayed below a billionth
+        cutoff = datetime.utcfromtimestamp(now - 30 * self.half_life)
+        try:
+            write_queue.submit(self._save, rows, cutoff)
+        except Exception:
+            with self._lock:
+                for book_id, amount in pending.items():
+                    self._pending[book_id] = self._pending.get(book_id, 0.0) + amount
+            raise
+
+        # Pick up what other workers saved
+        self._load()
+        return len(rows)
+
+    def _save(self, rows, cutoff):
+        """Write queue operation: merge rows into book_popularity and drop rows last updated before cutoff"""
+        for start in range(0, len(rows), 500):
+            stmt = insert(BookPopularity).values(rows[start:start + 500])
+            # Decay the stored score to now and add ours in one statement, so concurrent
+            # flushes from other workers add up instead of overwriting each other
+            age = func.max(
+                (func.julianday(stmt.excluded.updated_at) - func.julianday(BookPopularity.updated_at)) * 86400, 0
+            )
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=[BookPopularity.book_id],
+                set_={
+                    'score': BookPopularity.score * func.exp(-self._rate * age) + stmt.excluded.score,
+                    'updated_at': stmt.excluded.updated_at
+                }
+            ))
+        db.session.execute(delete(BookPopularity).where(BookPopularity.updated_at < cutoff))
+
+    def _flush_on_exit(self):
+        if not self._pending or self._app is None:
+            return
+        try:
+            with self._app.app_context():
+                self.flush()
+        except Exception as e:
+            logging.warning(f"Could not save trending counters on exit: {e}")
+
+    def start_flusher(self):
+        if self._flusher and self._flusher.is_alive():
+            return
+
+        def run():
+            while True:
+                time.sleep(self.flush_interval)
+                try:
+                    with self._app.app_context():
+                        self.flush()
+                except Exception as e:
+                    logging.error(f"Trending flush failed: {e}", exc_info=True)
+
+        self._flusher = threading.Thread(target=run, name='trending-flusher', daemon=True)
+        self._flusher.start()
+        atexit.register(self._flush_on_exit)
+
+# Create a global instance
+trending_service = TrendingService()
@@ -0,0 +1,158 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from sqlalchemy import text
+from app import db
+from app.utils.metrics import write_queue_batch_size, write_queue_operations
+
+
+class PendingChangesError(RuntimeError):
+    """Raised by submit() when the caller's session holds changes the writer would never commit"""
+
+
+class _Operation:
+    __slots__ = ('fn', 'args', 'kwargs', 'future')
+
+    def __init__(self, fn, args, kwargs):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+
+
+class WriteQueue:
+    """
+    Group commit for SQLite.
+
+    SQLite has one writer at a time, and every commit waits for an fsync.
+    Request threads hand small write operations to one writer thread
+    instead of each opening their own write transaction. The writer collects
+    whatever arrives within `window` seconds (at most `max_batch` operations),
+    runs each in its own SAVEPOINT and commits them together. A failing
+    operation only rolls back its savepoint, and every caller gets its own
+    return value or exception. There is one writer per process.
+
+    An operation is a function that uses db.session and returns plain values.
+    ORM objects it returns belong to the writer's session.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.window = 0.002
+        self.max_batch = 64
+        self.timeout = 10
+        self._app = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('WRITE_QUEUE_ENABLED', True)
+        self.window = app.config.get('WRITE_QUEUE_WINDOW_MS', 2) / 1000
+        self.max_batch = app.config.get('WRITE_QUEUE_MAX_BATCH', 64)
+        self.timeout = app.config.get('WRITE_QUEUE_TIMEOUT', 10)
+        self._app = app
+
+    def submit(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) in the next batch and return its result once committed"""
+        if not self.enabled:
+            return self.enqueue(fn, *args, **kwargs).result(self.timeout)
+        
+        # fn runs in the writer's session; changes left in the caller's would never be committed
+        if db.session.new or db.session.dirty or db.session.deleted:
+            raise PendingChangesError('Commit or roll back pending changes before submitting a write')
+        # Nothing to write, so this only gives the pooled connection back while the caller waits (or
+        # callers could starve the writer) and expires loaded objects so they reload what the writer commits
+        db.session.commit()
+        future = self.enqueue(fn, *args, **kwargs)
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            # Skipped by the writer if it hasn't started; the caller already reports a failure
+            future.cancel()
+            raise
+    
+    def enqueue(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) without waiting; returns a Future for its result"""
+        operation = _Operation(fn, args, kwargs)
+        if not self.enabled:
+            operation.future.set_running_or_notify_cancel()
+            try:
+                result = fn(*args, **kwargs)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                operation.future.set_exception(e)
+            else:
+                operation.future.set_result(result)
+            return operation.future
+        
+        self._ensure_writer()
+        self._queue.put(operation)
+        return operation.future
+    
+    def _ensure_writer(self):
+        """Start the writer on first use, and again in a forked worker where its thread is gone"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(target=self._run, name='write-queue', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        with self._app.app_context():
+            while True:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + self.window
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                    except queue.Empty:
+                        break
+
+                try:
+                    self._commit(batch)
+                except Exception as e:
+                    logging.error(f"Write queue batch failed: {e}", exc_info=True)
+                    for operation in batch:
+                        if not operation.future.done():
+                            operation.future.set_exception(e)
+                finally:
+                    db.session.remove()
+
+    def _commit(self, batch):
+        write_queue_batch_size.observe(len(batch))
+        # Take the write lock up front; a deferred transaction that reads first can fail to upgrade its lock
+        db.session.execute(text('BEGIN IMMEDIATE'))
+        done = []
+        for operation in batch:
+            if not operation.future.set_running_or_notify_cancel():
+                continue
+            try:
+                with db.session.begin_nested():
+                    result = operation.fn(*operation.args, **operation.kwargs)
+            except Exception as e:
+                write_queue_operations.inc(outcome='failed')
+                operation.future.set_exception(e)
+            else:
+                done.append((operation, result))
+
+        try:
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            write_queue_operations.inc(len(done), outcome='commit_failed')
+            for operation, _ in done:
+                operation.future.set_exception(e)
+            return
+
+        write_queue_operations.inc(len(done), outcome='committed')
+        for operation, result in done:
+            operation.future.set_result(result)
+
+# Create a global instance
+write_queue = WriteQueue()
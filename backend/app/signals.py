@@ -0,0 +1,15 @@
+"""
+Application signals, so side effects like trending counters and cache
+invalidation can follow domain events without the routes knowing about them.
+Signals are sent after the change is committed.
+"""
+from blinker import Namespace
+
+_signals = Namespace()
+
+# A book was added to, moved between or removed from a user's shelves.
+# Sent with user_id, book_id (local id), shelf_type (None when removed) and previous_shelf.
+shelf_changed = _signals.signal('shelf-changed')
+
+# A user joined or left a reading group. Sent with group_id, user_id and action ('joined' or 'left').
+membership_changed = _signals.signal('membership-changed')
@@ -0,0 +1,131 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, g, has_request_context, request, make_response
+
+
+class TTLCache:
+    """Thread-safe in-memory cache with per-entry expiry and an LRU size bound"""
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CachedResponse:
+    """A cached response body plus its lazily built compressed variants"""
+
+    __slots__ = ('body', 'status', 'mimetype', '_variants', '_lock')
+
+    def __init__(self, body, status, mimetype):
+        self.body = body
+        self.status = status
+        self.mimetype = mimetype
+        self._variants = {}
+        self._lock = threading.Lock()
+
+    def encoded(self, encoding, compress):
+        """Return the body compressed with `encoding`, compressing at most once"""
+        variant = self._variants.get(encoding)
+        if variant is None:
+            with self._lock:
+                variant = self._variants.get(encoding)
+                if variant is None:
+                    variant = compress(self.body, encoding)
+                    self._variants[encoding] = variant
+        return variant
+
+
+class ResponseCache:
+    def __init__(self, app=None):
+        self.cache = TTLCache()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.cache = TTLCache(
+            max_entries=app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 1024),
+            ttl=app.config.get('RESPONSE_CACHE_TTL', 300)
+        )
+
+    def clear(self):
+        self.cache.clear()
+
+    @staticmethod
+    def _request_key():
+        args = sorted(request.args.items(multi=True))
+        return (request.path, tuple(args))
+
+    def _store(self, key, response, ttl_config_key):
+        """Cache a fresh response; returns the entry, or None if it must not be cached"""
+        if (response.status_code != 200 or response.direct_passthrough or
+                g.pop('skip_response_cache', False)):
+            return None
+        entry = CachedResponse(response.get_data(), response.status_code, response.mimetype)
+        ttl = current_app.config.get(ttl_config_key) if ttl_config_key else None
+        self.cache.set(key, entry, ttl)
+        return entry
+
+    @staticmethod
+    def _respond(entry):
+        response = current_app.response_class(entry.body, status=entry.status, mimetype=entry.mimetype)
+        response.cache_entry = entry
+        return response
+
+    def cached(self, ttl_config_key=None):
+        """Cache successful responses of a view, keyed by path and query string"""
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                key = self._request_key()
+                entry = self.cache.get(key)
+                if entry is None:
+                    response = make_response(f(*args, **kwargs))
+                    entry = self._store(key, response, ttl_config_key)
+                    if entry is None:
+                        return response
+                return self._respond(entry)
+            return decorated_function
+        return decorator
+
+def skip_response_cache():
+    """Keep the current request's response out of the response cache, e.g. a degraded fallback"""
+    if has_request_context():
+        g.skip_response_cache = True
+
+# Create a global instance
+response_cache = ResponseCache()
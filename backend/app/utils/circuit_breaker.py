@@ -0,0 +1,129 @@
+import math
+import threading
+import time
+from collections import deque
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Every breaker created in this process, by name, for monitoring
+breakers = {}
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, message, retry_after=1):
+        super().__init__(message)
+        self.retry_after = retry_after  # whole seconds until the circuit may let calls through
+
+
+class CircuitBreaker:
+    """
+    Rolling-window circuit breaker. The circuit opens when, over the last
+    `window` seconds and at least `min_calls` calls, the failure rate or the
+    slow-call rate reaches its threshold. After `open_seconds` it lets a few
+    probe calls through (half-open); a successful probe closes it again.
+    """
+
+    def __init__(self, name, window=30, min_calls=10, failure_rate=0.5, slow_call_seconds=2.0,
+                 slow_call_rate=0.5, open_seconds=30, half_open_max_calls=1):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self.state = CLOSED
+        self.opened_at = None
+        self._calls = deque()  # (timestamp, failed, slow)
+        self._failures = 0
+        self._slow = 0
+        self._probes = 0
+        self._lock = threading.Lock()
+        breakers[name] = self
+
+    def _prune(self, now):
+        cutoff = now - self.window
+        while self._calls and self._calls[0][0] < cutoff:
+            _, failed, slow = self._calls.popleft()
+            self._failures -= failed
+            self._slow -= slow
+
+    def _reset_window(self):
+        self._calls.clear()
+        self._failures = 0
+        self._slow = 0
+
+    def allow(self):
+        """Reserve permission for one call; raises CircuitOpenError when failing fast"""
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self.open_seconds - (time.monotonic() - self.opened_at)
+                if remaining > 0:
+                    raise CircuitOpenError(f"Circuit '{self.name}' is open", max(math.ceil(remaining), 1))
+                self.state = HALF_OPEN
+                self._probes = 0
+
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_max_calls:
+                    raise CircuitOpenError(f"Circuit '{self.name}' is half-open and probing")
+                self._probes += 1
+
+    def record(self, failed, latency):
+        now = time.monotonic()
+        slow = latency >= self.slow_call_seconds
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if failed or slow:
+                    self._trip(now)
+                else:
+                    self.state = CLOSED
+                    self.opened_at = None
+                    self._reset_window()
+                return
+
+            if self.state == OPEN:
+                return
+
+            self._calls.append((now, int(failed), int(slow)))
+            self._failures += failed
+            self._slow += slow
+            self._prune(now)
+
+            total = len(self._calls)
+            if total >= self.min_calls and (self._failures / total >= self.failure_rate or
+                                            self._slow / total >= self.slow_call_rate):
+                self._trip(now)
+
+    def _trip(self, now):
+        self.state = OPEN
+        self.opened_at = now
+        self._reset_window()
+
+    def call(self, fn, is_failure=lambda e: True):
+        """Run fn under the breaker; exceptions for which is_failure() is False count as successes"""
+        self.allow()
+        start = time.monotonic()
+        try:
+            result = fn()
+        except Exception as e:
+            self.record(is_failure(e), time.monotonic() - start)
+            raise
+        self.record(False, time.monotonic() - start)
+        return result
+
+    def snapshot(self):
+        with self._lock:
+            self._prune(time.monotonic())
+            total = len(self._calls)
+            return {
+                'state': self.state,
+                'calls_in_window': total,
+                'failure_rate': round(self._failures / total, 3) if total else 0.0,
+                'slow_call_rate': round(self._slow / total, 3) if total else 0.0,
+                'open_for_seconds': round(time.monotonic() - self.opened_at, 1) if self.opened_at else None
+            }
@@ -0,0 +1,96 @@
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; fall back to gzip only
+    brotli = None
+
+
+class Compressor:
+    """Compress responses according to the client's Accept-Encoding header"""
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.min_size = 500
+        self.level = 6
+        self.brotli_quality = 4
+        self.mimetypes = set()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESS_ENABLED', True)
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', 500)
+        self.level = app.config.get('COMPRESS_LEVEL', 6)
+        self.brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', 4)
+        self.mimetypes = set(app.config.get('COMPRESS_MIMETYPES', [
+            'application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript'
+        ]))
+        app.after_request(self.after_request)
+
+    @property
+    def supported_encodings(self):
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def negotiate(self, accept_encoding):
+        """Pick the best supported encoding from an Accept-Encoding header value"""
+        if not accept_encoding:
+            return None
+
+        weights = {}
+        for part in accept_encoding.split(','):
+            coding, _, params = part.strip().partition(';')
+            coding = coding.strip().lower()
+            quality = 1.0
+            params = params.strip()
+            if params.startswith('q='):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            weights[coding] = quality
+
+        best, best_quality = None, 0.0
+        for encoding in self.supported_encodings:
+            quality = weights.get(encoding, weights.get('*', 0.0))
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.level)
+
+    def after_request(self, response):
+        if not self.enabled or response.mimetype not in self.mimetypes:
+            return response
+
+        response.vary.add('Accept-Encoding')
+
+        if (response.status_code < 200 or response.status_code in (204, 304) or
+                response.direct_passthrough or response.is_streamed or
+                'Content-Encoding' in response.headers or request.method == 'HEAD'):
+            return response
+
+        if response.content_length is not None and response.content_length < self.min_size:
+            return response
+
+        encoding = self.negotiate(request.headers.get('Accept-Encoding', ''))
+        if not encoding:
+            return response
+
+        # Responses served from a cache carry their compressed variants with them
+        cache_entry = getattr(response, 'cache_entry', None)
+        if cache_entry is not None:
+            data = cache_entry.encoded(encoding, self.compress)
+        else:
+            data = self.compress(response.get_data(), encoding)
+
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+# Create a global instance
+compressor = Compressor()
@@ -43,4 +43,10 @@ def paginate_query(query, page=1, per_page=20):
         'page': pagination.page,
         'per_page': pagination.per_page,
         'pages': pagination.pages
-    }
\ No newline at end of file
+    }
+
+def unavailable_response(error, message='Google Books is temporarily unavailable'):
+    """503 for a CircuitOpenError, telling the client when to try again"""
+    response, status = api_response(None, message, 503, str(error))
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, status
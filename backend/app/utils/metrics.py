@@ -0,0 +1,252 @@
+import threading
+import time
+from bisect import bisect_left
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, breakers
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, labelvalues, extra=None):
+    pairs = list(zip(labelnames, labelvalues))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(name, '') for name in self.labelnames), 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Gauge:
+    """A gauge whose value is read from a callback at scrape time"""
+    type = 'gauge'
+
+    def __init__(self, name, documentation, callback, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def samples(self):
+        values = self.callback()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for key, value in values.items():
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # One slot per bucket plus +Inf, then sum
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, **labels):
+        series = self._series.get(tuple(labels.get(name, '') for name in self.labelnames))
+        return sum(series[:-1]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        for key, series in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += bucket_count
+                yield (f'{self.name}_bucket',
+                       _format_labels(self.labelnames, key, ('le', _format_value(bound))),
+                       cumulative)
+            yield f'{self.name}_sum', _format_labels(self.labelnames, key), series[-1]
+            yield f'{self.name}_count', _format_labels(self.labelnames, key), cumulative
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, callback, labelnames=()):
+        return self.register(Gauge(name, documentation, callback, labelnames))
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# Request metrics
+http_request_duration = registry.histogram(
+    'bookifyme_http_request_duration_seconds', 'HTTP request latency',
+    ('blueprint', 'endpoint', 'method'))
+http_requests_total = registry.counter(
+    'bookifyme_http_requests_total', 'HTTP requests served',
+    ('blueprint', 'endpoint', 'method', 'status'))
+
+# Database metrics
+db_statements_per_request = registry.histogram(
+    'bookifyme_db_statements_per_request', 'SQL statements executed per request',
+    ('blueprint', 'endpoint'), QUERY_COUNT_BUCKETS)
+db_time_per_request = registry.histogram(
+    'bookifyme_db_time_per_request_seconds', 'Time spent executing SQL per request',
+    ('blueprint', 'endpoint'))
+db_statements_total = registry.counter(
+    'bookifyme_db_statements_total', 'SQL statements executed')
+
+# Google Books metrics
+google_books_duration = registry.histogram(
+    'bookifyme_google_books_request_duration_seconds', 'Google Books API call latency',
+    ('operation',))
+google_books_errors = registry.counter(
+    'bookifyme_google_books_errors_total', 'Google Books API call failures',
+    ('operation', 'kind'))
+circuit_breaker_state = registry.gauge(
+    'bookifyme_circuit_breaker_state', 'Circuit breaker state (0 closed, 1 half-open, 2 open)',
+    lambda: {(name,): {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}[b.state] for name, b in breakers.items()},
+    ('name',))
+google_books_coalesced = registry.counter(
+    'bookifyme_google_books_coalesced_total', 'Google Books calls answered by an identical in-flight call',
+    ('operation',))
+
+# Write queue metrics
+write_queue_batch_size = registry.histogram(
+    'bookifyme_write_queue_batch_size', 'Write operations committed together by the write queue',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+write_queue_operations = registry.counter(
+    'bookifyme_write_queue_operations_total', 'Write queue operations by outcome',
+    ('outcome',))
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get('query_start_time')
+    if not start_times:
+        return
+    elapsed = time.perf_counter() - start_times.pop()
+    db_statements_total.inc()
+    if has_request_context():
+        g._metrics_sql_count = g.get('_metrics_sql_count', 0) + 1
+        g._metrics_sql_time = g.get('_metrics_sql_time', 0.0) + elapsed
+
+
+def _request_labels():
+    endpoint = request.endpoint or 'unmatched'
+    return request.blueprint or '', endpoint
+
+
+class Metrics:
+    """Per-request latency and SQL instrumentation exported at /metrics"""
+
+    def __init__(self, app=None):
+        self.registry = registry
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self):
+        g._metrics_start = time.perf_counter()
+
+    def _after_request(self, response):
+        start = g.pop('_metrics_start', None)
+        if start is None:
+            return response
+
+        blueprint, endpoint = _request_labels()
+        http_request_duration.observe(time.perf_counter() - start,
+                                      blueprint=blueprint, endpoint=endpoint, method=request.method)
+        http_requests_total.inc(blueprint=blueprint, endpoint=endpoint,
+                                method=request.method, status=str(response.status_code))
+        db_statements_per_request.observe(g.pop('_metrics_sql_count', 0),
+                                          blueprint=blueprint, endpoint=endpoint)
+        db_time_per_request.observe(g.pop('_metrics_sql_time', 0.0),
+                                    blueprint=blueprint, endpoint=endpoint)
+        return response
+
+    def render(self):
+        return self.registry.render()
+
+# Create a global instance
+metrics = Metrics()
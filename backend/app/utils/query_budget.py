@@ -0,0 +1,140 @@
+import logging
+import os
+import re
+import threading
+import traceback
+from collections import Counter
+from functools import wraps
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_local = threading.local()
+
+_WHITESPACE = re.compile(r'\s+')
+_IN_LIST = re.compile(r'IN \((?:\s*(?:\?|%\(\w+\)s|:\w+|__\[POSTCOMPILE_\w+\])\s*,?)+\)', re.IGNORECASE)
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_shape(statement):
+    """Reduce a SQL statement to a shape so calls differing only in parameters compare equal"""
+    shape = _WHITESPACE.sub(' ', statement).strip()
+    shape = _IN_LIST.sub('IN (...)', shape)
+    return _LITERALS.sub('?', shape)
+
+
+def _active_budgets():
+    budgets = getattr(_local, 'budgets', None)
+    if budgets is None:
+        budgets = _local.budgets = []
+    return budgets
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    budgets = getattr(_local, 'budgets', None)
+    if budgets:
+        for budget in budgets:
+            budget.record(statement)
+
+
+class QueryBudget:
+    """
+    Count SQL statements issued inside a block and check them against a budget.
+    Works as a context manager and as a decorator; each decorated call gets a
+    fresh counter. The mode is 'raise', 'log' or 'off' and defaults to the
+    QUERY_BUDGET_MODE setting of the current app.
+    """
+
+    def __init__(self, max_queries=None, max_repeats=None, mode=None, label=None):
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+        self.mode = mode
+        self.label = label
+        self.count = 0
+        self.shapes = Counter()
+        self.repeat_stacks = {}
+        self._active_mode = None
+
+    def record(self, statement):
+        self.count += 1
+        shape = query_shape(statement)
+        self.shapes[shape] += 1
+        # Capture where the first repeat over the limit came from; it is usually inside the loop
+        if (self.max_repeats is not None and self.shapes[shape] == self.max_repeats + 1 and
+                shape not in self.repeat_stacks):
+            frames = [frame for frame in traceback.extract_stack()
+                      if f'{os.sep}sqlalchemy{os.sep}' not in frame.filename and frame.filename != __file__]
+            self.repeat_stacks[shape] = ''.join(traceback.format_list(frames[-15:]))
+
+    @property
+    def repeated_shapes(self):
+        if self.max_repeats is None:
+            return {}
+        return {shape: count for shape, count in self.shapes.items() if count > self.max_repeats}
+
+    def _resolve_mode(self):
+        if self.mode:
+            return self.mode
+        if has_app_context():
+            return current_app.config.get('QUERY_BUDGET_MODE', 'off')
+        return 'off'
+
+    def __enter__(self):
+        self._active_mode = self._resolve_mode()
+        if self._active_mode != 'off':
+            _install_listener()
+            _active_budgets().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._active_mode == 'off':
+            return False
+        _active_budgets().remove(self)
+        if exc_type is None:
+            self.check()
+        return False
+
+    def __call__(self, f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            budget = QueryBudget(self.max_queries, self.max_repeats, self.mode, self.label or f.__qualname__)
+            with budget:
+                return f(*args, **kwargs)
+        return decorated_function
+
+    def violations(self):
+        problems = []
+        if self.max_queries is not None and self.count > self.max_queries:
+            problems.append(f"{self.count} queries issued, budget is {self.max_queries}")
+        for shape, count in self.repeated_shapes.items():
+            problems.append(f"query repeated {count} times (max {self.max_repeats}): {shape}")
+        return problems
+
+    def check(self):
+        problems = self.violations()
+        if not problems:
+            return
+
+        label = self.label or 'block'
+        message = f"Query budget exceeded in {label}: " + '; '.join(problems)
+        if self._active_mode == 'raise':
+            raise QueryBudgetExceeded(message)
+
+        details = [message]
+        for shape, stack in self.repeat_stacks.items():
+            details.append(f"Repeated query: {shape}\n{stack}")
+        logging.warning('\n'.join(details))
+
+
+def query_budget(max_queries=None, max_repeats=3, mode=None, label=None):
+    """Declare how many SQL statements a route or block may issue"""
+    return QueryBudget(max_queries, max_repeats, mode, label)
+
+
+def _install_listener():
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
@@ -0,0 +1,47 @@
+import threading
+from flask import current_app
+
+
+class ServiceRegistry:
+    """
+    App-scoped services built on first use. Factories are registered by name
+    and called with the app the first time the service is asked for; the
+    instance then lives in app.extensions['services'], so every caller in that
+    app shares it and nothing is built for code paths a process never runs.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory):
+        """Register factory(app) as the builder of service `name`"""
+        self._factories[name] = factory
+        return factory
+
+    def factory(self, name):
+        """Decorator form of register()"""
+        def decorator(f):
+            return self.register(name, f)
+        return decorator
+
+    def get(self, name, app=None):
+        app = app or current_app._get_current_object()
+        services = app.extensions.setdefault('services', {})
+        service = services.get(name)
+        if service is None:
+            with self._lock:
+                service = services.get(name)
+                if service is None:
+                    service = services[name] = self._factories[name](app)
+        return service
+
+    def reset(self, app, *names):
+        """Drop built services (all of them without names) so they are rebuilt on next use, e.g. after fork"""
+        services = app.extensions.get('services', {})
+        with self._lock:
+            for name in names or list(services):
+                services.pop(name, None)
+
+# Create a global instance
+services = ServiceRegistry()
@@ -0,0 +1,50 @@
+"""
+Per-process setup. A pre-forking server such as gunicorn (see gunicorn.conf.py)
+builds the app once in the master and forks workers from it; connections and
+threads don't survive that fork, so each worker sets them up again here.
+"""
+from sqlalchemy import text
+from app import db
+
+
+def start_background_tasks(app):
+    """Start the threads that send email, sweep the cover cache, save trending counters and refresh stale books"""
+    from app.services.catalog_refresh import catalog_refresher
+    from app.services.cover_cache import cover_cache
+    from app.services.email_service import email_service
+    from app.services.trending import trending_service
+
+    if app.config.get('EMAIL_DISPATCHER_ENABLED', True):
+        email_service.start_dispatcher()
+    if app.config.get('COVER_CACHE_SWEEP_INTERVAL', 600):
+        cover_cache.start_sweeper()
+    if app.config.get('TRENDING_FLUSH_INTERVAL', 60):
+        trending_service.start_flusher()
+    if app.config.get('CATALOG_REFRESH_INTERVAL', 0):
+        catalog_refresher.start_scheduler()
+
+
+def warm_caches(app):
+    """Open a database connection and load the trending ranking before the first request"""
+    from app.services.trending import trending_service
+
+    with app.app_context():
+        db.session.execute(text('SELECT 1'))
+        trending_service.top()
+
+
+def init_worker(app):
+    """Run in every worker right after fork"""
+    from app.services.cover_cache import cover_cache
+    from app.services.google_books import google_books_service
+
+    # Pooled connections were opened by the parent; close=False leaves them for the parent to close
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+    google_books_service.reset_connections(app)
+    cover_cache.reset_connections(app)
+
+    start_background_tasks(app)
+    warm_caches(app)
@@ -0,0 +1 @@
+# Benchmark tooling: synthetic data generation and endpoint load driver
@@ -0,0 +1,132 @@
+"""
+Compare the development server (run.py) with the production entry point
+(gunicorn -c gunicorn.conf.py wsgi:app) on the same generated database.
+
+    python -m benchmarks.compare_servers --database instance/benchmark.db --workers 4 --threads 8
+
+Each server is started in turn, driven over HTTP with the endpoints of
+run_benchmarks, and stopped again. Results for both are written as JSON
+(stdout or --output) and summarised side by side.
+"""
+import argparse
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import requests
+
+from benchmarks.run_benchmarks import HTTPTarget, _sample_ids, build_endpoints, create_benchmark_app, run
+from config import Config
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def server_commands(port, workers, threads):
+    return {
+        # run.py always listens on 5000
+        'run.py': ([sys.executable, 'run.py'], 5000, {}),
+        'gunicorn': ([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'], port, {
+            'WEB_BIND': f'127.0.0.1:{port}',
+            'WEB_WORKERS': str(workers),
+            'WEB_THREADS': str(threads)
+        })
+    }
+
+
+def start_server(command, port, extra_env, database, timeout=30):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.abspath(database)}",
+               EMAIL_DISPATCHER_ENABLED='false', **extra_env)
+    # Own process group, so the debug reloader's child is stopped too
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, start_new_session=True,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{command} exited with status {process.returncode}")
+        try:
+            if requests.get(f'{url}/health', timeout=1).status_code == 200:
+                return process, url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"{command} did not become healthy within {timeout}s")
+
+
+def stop_server(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=15)
+    except ProcessLookupError:
+        pass
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare run.py with the gunicorn production entry point')
+    parser.add_argument('--database', default=os.path.join(Config.basedir, 'instance', 'benchmark.db'),
+                        help='Generated database (see benchmarks.generate_data)')
+    parser.add_argument('--port', type=int, default=5100, help='Port for gunicorn')
+    parser.add_argument('--workers', type=int, default=Config.WEB_WORKERS)
+    parser.add_argument('--threads', type=int, default=Config.WEB_THREADS)
+    parser.add_argument('--servers', default='run.py,gunicorn', help='Comma separated servers to run')
+    parser.add_argument('--concurrency', default='1,8,32', help='Comma separated concurrency levels')
+    parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint and level')
+    parser.add_argument('--endpoints', help='Only run endpoints whose name contains one of these (comma separated)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    args = parser.parse_args()
+
+    app = create_benchmark_app(args.database)
+    samples = _sample_ids(args.database, args.seed)
+    endpoints = [e for e in build_endpoints() if not e.upstream]
+    if args.endpoints:
+        wanted = [name.strip() for name in args.endpoints.split(',')]
+        endpoints = [e for e in endpoints if any(name in e.name for name in wanted)]
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    commands = server_commands(args.port, args.workers, args.threads)
+    report = {
+        'generated_at': datetime.utcnow().isoformat() + 'Z',
+        'database': os.path.abspath(args.database),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'workers': args.workers,
+        'threads': args.threads,
+        'requests_per_level': args.requests,
+        'servers': {}
+    }
+
+    for name in [server.strip() for server in args.servers.split(',')]:
+        command, port, extra_env = commands[name]
+        print(f"== {name}", flush=True)
+        process, url = start_server(command, port, extra_env, args.database)
+        try:
+            report['servers'][name] = run(app, HTTPTarget(url), endpoints, levels, args.requests, samples, args.seed)
+        finally:
+            stop_server(process)
+
+    if len(report['servers']) == 2:
+        baseline, candidate = report['servers'].values()
+        print(f"\n{'endpoint':<40} {'c':>4} {'run.py rps':>11} {'gunicorn rps':>13} {'p95 ms':>15}")
+        for before, after in zip(baseline, candidate):
+            print(f"{before['endpoint']:<40} {before['concurrency']:>4} {before['throughput_rps']:>11} "
+                  f"{after['throughput_rps']:>13} {before['p95_ms']:>7}->{after['p95_ms']:<7}")
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
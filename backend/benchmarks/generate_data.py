@@ -0,0 +1,177 @@
+"""
+Build a large, reproducible SQLite database for benchmarking.
+
+    python -m benchmarks.generate_data --output instance/benchmark.db
+    python -m benchmarks.generate_data --users 1000 --books 2000 --shelf-rows 20000 --output /tmp/small.db
+
+The same --seed always produces the same database. Book popularity and
+group sizes follow power laws so that a few books and groups are much
+hotter than the rest, like real usage.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from config import Config
+
+SHELF_TYPES = ('reading', 'wantToRead', 'finished')
+CATEGORIES = ['Fiction', 'Science', 'Technology', 'History', 'Biography', 'Fantasy',
+              'Mystery', 'Romance', 'Poetry', 'Philosophy', 'Business', 'Travel']
+WORDS = ('the of and river night garden stone secret light house city winter machine '
+         'ocean memory silver empire letters shadow journey forest theory mind fire').split()
+
+# Every generated user can log in with this password
+BENCHMARK_PASSWORD = 'benchmark'
+
+
+def _timestamp(base, rng, max_days):
+    moment = base - timedelta(seconds=rng.randint(0, max_days * 86400))
+    return moment.strftime('%Y-%m-%d %H:%M:%S.%f')
+
+
+def _skewed_index(rng, size, skew):
+    """Pick an index in [0, size) where low indexes are much more likely (power law)"""
+    return min(int(size * rng.random() ** skew), size - 1)
+
+
+def create_schema(db_path):
+    from app import create_app, db
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{db_path}"
+        EMAIL_DISPATCHER_ENABLED = False
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.engine.dispose()
+
+
+def generate(db_path, users, books, shelf_rows, groups, seed, batch_size=50000):
+    from app import bcrypt
+
+    rng = random.Random(seed)
+    base_time = datetime(2025, 1, 1)
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    create_schema(db_path)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA journal_mode=OFF')
+    conn.execute('PRAGMA synchronous=OFF')
+
+    started = time.perf_counter()
+    password_hash = bcrypt.generate_password_hash(BENCHMARK_PASSWORD).decode('utf-8')
+
+    # Users
+    conn.executemany(
+        'INSERT INTO users (id, name, email, password_hash, created_at) VALUES (?, ?, ?, ?, ?)',
+        ((i, f'Reader {i}', f'reader{i}@bench.bookifyme.com', password_hash,
+          _timestamp(base_time, rng, 730)) for i in range(1, users + 1))
+    )
+
+    # Books
+    def book_rows():
+        for i in range(1, books + 1):
+            title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))).title()
+            description = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(40, 200)))
+            yield (
+                i, f'bench{i:08d}', title, json.dumps([f'Author {rng.randint(1, books // 3 + 1)}']),
+                description, json.dumps(rng.sample(CATEGORIES, rng.randint(1, 3))),
+                f'http://books.google.com/books/content?id=bench{i:08d}&printsec=frontcover&img=1&zoom=1',
+                round(rng.uniform(1, 5), 1), rng.randint(0, 5000), str(rng.randint(1900, 2025)),
+                rng.randint(80, 1200), 'en',
+                f'http://books.google.com/books?id=bench{i:08d}&printsec=frontcover',
+                f'http://books.google.com/books?id=bench{i:08d}',
+                _timestamp(base_time, rng, 365)
+            )
+
+    conn.executemany(
+        'INSERT INTO books (id, google_books_id, title, authors, description, categories, thumbnail, '
+        'average_rating, ratings_count, published_date, page_count, language, preview_link, info_link, '
+        'created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+        book_rows()
+    )
+    conn.commit()
+
+    # Bookshelves: popular books are shelved far more often; each (user, book) pair at most once
+    seen = set()
+    batch = []
+    row_id = 0
+    attempts = 0
+    while row_id < shelf_rows and attempts < shelf_rows * 3:
+        attempts += 1
+        user_id = rng.randint(1, users)
+        book_id = _skewed_index(rng, books, 2.5) + 1
+        if (user_id, book_id) in seen:
+            continue
+        seen.add((user_id, book_id))
+        row_id += 1
+        added_at = _timestamp(base_time, rng, 365)
+        batch.append((row_id, user_id, book_id, rng.choice(SHELF_TYPES), added_at, added_at))
+        if len(batch) >= batch_size:
+            conn.executemany(
+                'INSERT INTO bookshelves (id, user_id, book_id, shelf_type, added_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)', batch)
+            batch = []
+    if batch:
+        conn.executemany(
+            'INSERT INTO bookshelves (id, user_id, book_id, shelf_type, added_at, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)', batch)
+    seen.clear()
+    conn.commit()
+
+    # Reading groups with power-law sizes: a handful of huge groups, a long tail of small ones
+    memberships = 0
+    for group_id in range(1, groups + 1):
+        creator = rng.randint(1, users)
+        conn.execute(
+            'INSERT INTO reading_groups (id, name, description, created_by, created_at, is_public) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (group_id, f'Group {group_id}', f'Benchmark reading group {group_id}', creator,
+             _timestamp(base_time, rng, 365), rng.random() < 0.9)
+        )
+        size = min(users, max(1, int(rng.paretovariate(1.2) * 3)))
+        members = {creator} | {rng.randint(1, users) for _ in range(size - 1)}
+        conn.executemany(
+            'INSERT INTO group_members (group_id, user_id, joined_at, role) VALUES (?, ?, ?, ?)',
+            ((group_id, user_id, _timestamp(base_time, rng, 300),
+              'admin' if user_id == creator else 'member') for user_id in members)
+        )
+        memberships += len(members)
+    conn.commit()
+    conn.execute('ANALYZE')
+    conn.close()
+
+    return {
+        'database': os.path.abspath(db_path),
+        'seed': seed,
+        'users': users,
+        'books': books,
+        'bookshelf_rows': row_id,
+        'groups': groups,
+        'group_memberships': memberships,
+        'seconds': round(time.perf_counter() - started, 2)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a synthetic BookifyMe benchmark database')
+    parser.add_argument('--output', default=os.path.join(Config.basedir, 'instance', 'benchmark.db'))
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--books', type=int, default=200000)
+    parser.add_argument('--shelf-rows', type=int, default=2000000)
+    parser.add_argument('--groups', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    summary = generate(args.output, args.users, args.books, args.shelf_rows, args.groups, args.seed)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Compare ORM loading with the Core read models for large listings.
+
+    python -m benchmarks.read_models --rows 5000 --runs 7
+
+Builds a temporary database with one user shelving --rows books, one group
+with --rows members and --rows public groups, then assembles the bookshelf
+listing, a page of groups, the group details and a local search both ways:
+ORM instances serialized with to_dict, as the endpoints used to, and the
+read models in app.read_models. For each it reports the median latency and
+the peak memory allocated while building one response (tracemalloc), as JSON.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+
+def _seed(db, rows):
+    from app.models import Book, Bookshelf, GroupMember, ReadingGroup, User
+
+    now = datetime.utcnow()
+    db.session.execute(User.__table__.insert(), [
+        {'id': i, 'name': f'Reader {i}', 'email': f'reader{i}@example.com', 'password_hash': 'x', 'created_at': now}
+        for i in range(1, rows + 1)
+    ])
+    db.session.execute(Book.__table__.insert(), [
+        {'id': i, 'google_books_id': f'bench{i:08d}', 'title': f'Book {i}', 'authors': json.dumps([f'Author {i % 500}']),
+         'description': 'A synthetic book. ' * 20, 'categories': json.dumps(['Fiction']),
+         'thumbnail': f'http://books.example.com/{i}.jpg', 'average_rating': 3.5, 'ratings_count': i,
+         'page_count': 300, 'language': 'en', 'created_at': now, 'refreshed_at': now}
+        for i in range(1, rows + 1)
+    ])
+    db.session.execute(Bookshelf.__table__.insert(), [
+        {'user_id': 1, 'book_id': i, 'shelf_type': ('reading', 'wantToRead', 'finished')[i % 3],
+         'added_at': now, 'updated_at': now}
+        for i in range(1, rows + 1)
+    ])
+    db.session.execute(ReadingGroup.__table__.insert(), [
+        {'id': i, 'name': f'Group {i}', 'description': 'A reading group.', 'created_by': 1, 'created_at': now,
+         'is_public': True}
+        for i in range(1, rows + 1)
+    ])
+    db.session.execute(GroupMember.__table__.insert(), [
+        {'group_id': 1, 'user_id': i, 'joined_at': now, 'role': 'member'} for i in range(1, rows + 1)
+    ])
+    db.session.commit()
+
+
+def _orm_cases(db, rows):
+    """The listings as the endpoints assembled them from ORM instances"""
+    from sqlalchemy.orm import joinedload, load_only
+    from app.models import Book, Bookshelf, GroupMember, ReadingGroup
+    from app.utils.helpers import paginate_query
+
+    def bookshelf():
+        entries = Bookshelf.query.options(
+            joinedload(Bookshelf.book).load_only(*Book.columns_for(None))
+        ).filter_by(user_id=1).all()
+        return [entry.to_shelf_dict() for entry in entries]
+
+    def groups():
+        return paginate_query(ReadingGroup.query.filter_by(is_public=True), 1, rows)
+
+    def group_details():
+        data = db.session.get(ReadingGroup, 1).to_dict()
+        members = GroupMember.query.options(joinedload(GroupMember.user)).filter_by(group_id=1).all()
+        data['members'] = [member.to_dict() for member in members]
+        return data
+
+    def search():
+        books = Book.query.options(load_only(*Book.columns_for(None))).filter(
+            Book.title.ilike('%Book%')
+        ).order_by(Book.ratings_count.desc().nullslast(), Book.id).limit(rows).all()
+        return [book.to_dict() for book in books]
+
+    return {'bookshelf': bookshelf, 'groups': groups, 'group_details': group_details, 'search': search}
+
+
+def _read_model_cases(rows):
+    from app import read_models
+
+    return {
+        'bookshelf': lambda: [entry for _, entry in read_models.shelf_entries(1)],
+        'groups': lambda: read_models.public_groups('', 1, rows),
+        'group_details': lambda: read_models.group_details(1),
+        'search': lambda: read_models.search_books('Book', rows)
+    }
+
+
+def _measure(db, build, runs):
+    timings = []
+    for _ in range(runs):
+        db.session.remove()
+        start = time.perf_counter()
+        build()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    db.session.remove()
+    tracemalloc.start()
+    build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.session.remove()
+    return {'median_ms': round(statistics.median(timings), 1), 'peak_kib': round(peak / 1024)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare ORM and read-model listings on large result sets')
+    parser.add_argument('--rows', type=int, default=5000, help='Shelf entries, group members and groups to list')
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'read_models.db')}",
+                          START_BACKGROUND_TASKS='false', EMAIL_DISPATCHER_ENABLED='false')
+        from app import create_app, db
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            _seed(db, args.rows)
+
+            orm, read_models = _orm_cases(db, args.rows), _read_model_cases(args.rows)
+            results = {}
+            for name in orm:
+                if json.dumps(orm[name](), sort_keys=True) != json.dumps(read_models[name](), sort_keys=True):
+                    raise SystemExit(f"{name}: read model output differs from the ORM output")
+                results[name] = {'orm': _measure(db, orm[name], args.runs),
+                                 'read_model': _measure(db, read_models[name], args.runs)}
+                results[name]['speedup'] = round(results[name]['orm']['median_ms'] /
+                                                 max(results[name]['read_model']['median_ms'], 0.1), 2)
+            db.session.remove()
+            db.engine.dispose()
+
+    output = json.dumps({'rows': args.rows, 'runs': args.runs, 'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
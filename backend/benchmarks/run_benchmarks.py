@@ -0,0 +1,261 @@
+"""
+Drive every /api endpoint at fixed concurrency levels and report latency percentiles.
+
+    # In-process through the Flask test client against a generated database
+    python -m benchmarks.run_benchmarks --database instance/benchmark.db --concurrency 1,8,32
+
+    # Against a running server
+    python -m benchmarks.run_benchmarks --url http://127.0.0.1:5000 --database instance/benchmark.db
+
+Results are written as JSON (stdout or --output) with p50/p95/p99 latency in
+milliseconds, throughput in requests per second and the error count for each
+endpoint and concurrency level. Endpoints that call Google Books are skipped
+unless --include-upstream is given.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+from config import Config
+
+
+class Endpoint:
+    def __init__(self, name, method, make_request, auth=False, upstream=False):
+        self.name = name
+        self.method = method
+        self.make_request = make_request  # rng, sample -> (path, json_body)
+        self.auth = auth
+        self.upstream = upstream
+
+
+def _sample_ids(db_path, seed, size=1000):
+    """Read real ids from the database so requests hit existing rows"""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    try:
+        max_user = conn.execute('SELECT MAX(id) FROM users').fetchone()[0] or 1
+        books = [row[0] for row in conn.execute(
+            'SELECT google_books_id FROM books ORDER BY id LIMIT ?', (size,))]
+        groups = [row[0] for row in conn.execute(
+            'SELECT group_id FROM group_members GROUP BY group_id ORDER BY COUNT(*) DESC LIMIT ?', (size,))]
+        words = [row[0].split()[0] for row in conn.execute('SELECT title FROM books LIMIT 200')]
+    finally:
+        conn.close()
+    return {
+        'user_ids': [rng.randint(1, max_user) for _ in range(size)],
+        'book_ids': books or ['unknown'],
+        'group_ids': groups or [1],
+        'words': words or ['python']
+    }
+
+
+def build_endpoints():
+    return [
+        Endpoint('GET /api/bookshelf', 'GET', lambda rng, s: ('/api/bookshelf', None), auth=True),
+        Endpoint('GET /api/bookshelf/stats', 'GET', lambda rng, s: ('/api/bookshelf/stats', None), auth=True),
+        Endpoint('POST /api/bookshelf/add', 'POST', lambda rng, s: ('/api/bookshelf/add', {
+            'book_id': rng.choice(s['book_ids']),
+            'shelf_type': rng.choice(['reading', 'wantToRead', 'finished'])
+        }), auth=True),
+        Endpoint('POST /api/bookshelf/move', 'POST', lambda rng, s: ('/api/bookshelf/move', {
+            'book_id': rng.choice(s['book_ids']),
+            'to_shelf': rng.choice(['reading', 'wantToRead', 'finished'])
+        }), auth=True),
+        Endpoint('GET /api/community/groups', 'GET',
+                 lambda rng, s: (f"/api/community/groups?page={rng.randint(1, 20)}", None)),
+        Endpoint('GET /api/community/groups/joined', 'GET',
+                 lambda rng, s: ('/api/community/groups/joined', None), auth=True),
+        Endpoint('GET /api/community/groups/<id>', 'GET',
+                 lambda rng, s: (f"/api/community/groups/{rng.choice(s['group_ids'])}", None)),
+        Endpoint('GET /api/auth/me', 'GET', lambda rng, s: ('/api/auth/me', None), auth=True),
+        Endpoint('GET /api/books/search', 'GET',
+                 lambda rng, s: (f"/api/books/search?q={rng.choice(s['words'])}", None), upstream=True),
+        Endpoint('GET /api/books/categories/<category>', 'GET',
+                 lambda rng, s: (f"/api/books/categories/{rng.choice(['fiction', 'history', 'science'])}", None),
+                 upstream=True),
+        Endpoint('GET /api/books/<id>', 'GET',
+                 lambda rng, s: (f"/api/books/{rng.choice(s['book_ids'])}", None), upstream=True),
+        Endpoint('GET /api/books/bestsellers', 'GET', lambda rng, s: ('/api/books/bestsellers', None)),
+    ]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies, errors, wall_time):
+    latencies.sort()
+    total = len(latencies)
+    return {
+        'requests': total,
+        'errors': errors,
+        'throughput_rps': round(total / wall_time, 2) if wall_time else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+        'max_ms': round(latencies[-1] * 1000, 3) if latencies else None,
+    }
+
+
+class TestClientTarget:
+    """Sends requests through Flask's test client, one client per worker thread"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def send(self, method, path, body, headers):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body, headers=headers)
+        return response.status_code
+
+
+class HTTPTarget:
+    """Sends requests to a running server, one keep-alive session per worker thread"""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def send(self, method, path, body, headers):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        response = session.request(method, self.base_url + path, json=body, headers=headers,
+                                   timeout=self.timeout)
+        return response.status_code
+
+
+def run_level(target, endpoint, concurrency, requests_per_level, samples, tokens, seed):
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    counter = iter(range(requests_per_level))
+    counter_lock = threading.Lock()
+
+    def worker(worker_id):
+        nonlocal errors
+        rng = random.Random(seed * 1000 + worker_id)
+        local_latencies = []
+        local_errors = 0
+        while True:
+            with counter_lock:
+                if next(counter, None) is None:
+                    break
+            path, body = endpoint.make_request(rng, samples)
+            headers = {'Accept-Encoding': 'gzip'}
+            if endpoint.auth:
+                headers['Authorization'] = f"Bearer {rng.choice(tokens)}"
+            start = time.perf_counter()
+            try:
+                status = target.send(endpoint.method, path, body, headers)
+                if status >= 500:
+                    local_errors += 1
+            except Exception:
+                local_errors += 1
+            local_latencies.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def make_tokens(app, user_ids):
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        return [create_access_token(identity=user_id) for user_id in user_ids]
+
+
+def create_benchmark_app(db_path):
+    from app import create_app
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{os.path.abspath(db_path)}"
+        EMAIL_DISPATCHER_ENABLED = False
+        JWT_ACCESS_TOKEN_EXPIRES = 24 * 3600
+
+    return create_app(BenchmarkConfig)
+
+
+def run(app, target, endpoints, concurrency_levels, requests_per_level, samples, seed, warmup=20):
+    tokens = make_tokens(app, samples['user_ids'][:200])
+    results = []
+    for endpoint in endpoints:
+        # Warm caches and connection pools before measuring
+        run_level(target, endpoint, 1, warmup, samples, tokens, seed)
+        for concurrency in concurrency_levels:
+            summary = run_level(target, endpoint, concurrency, requests_per_level, samples, tokens, seed)
+            summary.update({'endpoint': endpoint.name, 'concurrency': concurrency})
+            results.append(summary)
+            print(f"{endpoint.name:<40} c={concurrency:<4} p50={summary['p50_ms']}ms "
+                  f"p95={summary['p95_ms']}ms p99={summary['p99_ms']}ms "
+                  f"{summary['throughput_rps']} req/s errors={summary['errors']}", flush=True)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark BookifyMe API endpoints')
+    parser.add_argument('--database', default=os.path.join(Config.basedir, 'instance', 'benchmark.db'),
+                        help='Generated database (see benchmarks.generate_data)')
+    parser.add_argument('--url', help='Benchmark a running server instead of the in-process test client')
+    parser.add_argument('--concurrency', default='1,4,16', help='Comma separated concurrency levels')
+    parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint and level')
+    parser.add_argument('--endpoints', help='Only run endpoints whose name contains one of these (comma separated)')
+    parser.add_argument('--include-upstream', action='store_true', help='Also run endpoints that call Google Books')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write JSON results to this file')
+    args = parser.parse_args()
+
+    app = create_benchmark_app(args.database)
+    samples = _sample_ids(args.database, args.seed)
+    target = HTTPTarget(args.url) if args.url else TestClientTarget(app)
+
+    endpoints = [e for e in build_endpoints() if args.include_upstream or not e.upstream]
+    if args.endpoints:
+        wanted = [name.strip() for name in args.endpoints.split(',')]
+        endpoints = [e for e in endpoints if any(name in e.name for name in wanted)]
+
+    levels = [int(level) for level in args.concurrency.split(',')]
+    results = run(app, target, endpoints, levels, args.requests, samples, args.seed)
+
+    report = {
+        'generated_at': datetime.utcnow().isoformat() + 'Z',
+        'target': args.url or 'flask-test-client',
+        'database': os.path.abspath(args.database),
+        'python': platform.python_version(),
+        'seed': args.seed,
+        'requests_per_level': args.requests,
+        'results': results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
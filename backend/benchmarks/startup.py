@@ -0,0 +1,124 @@
+"""
+Measure cold start and fail when it exceeds a budget.
+
+    python -m benchmarks.startup --runs 5 --max-startup-ms 800 --max-first-request-ms 300
+
+Every run is a fresh interpreter that imports the app package, calls
+create_app() and serves a first request through the test client, so module
+imports, extension setup and lazily built services are all counted. Medians
+are compared with the budgets; the exit status is 1 when one is exceeded,
+which makes this usable as a CI check. --importtime lists the slowest imports.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+client = application.test_client()
+status = client.get(sys.argv[1]).status_code
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (served - created) * 1000,
+    'status': status,
+    'modules': len(sys.modules)
+}))
+"""
+
+SETUP = """
+from app import create_app, db
+with create_app().app_context():
+    db.create_all()
+"""
+
+
+def _env(database):
+    return dict(os.environ, DATABASE_URL=f"sqlite:///{database}", START_BACKGROUND_TASKS='false',
+                EMAIL_DISPATCHER_ENABLED='false')
+
+
+def measure(path, runs, database):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', PROBE, path], cwd=BACKEND_DIR, env=_env(database),
+                                capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return samples
+
+
+def slowest_imports(database, limit=15):
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app; app.create_app()'],
+                            cwd=BACKEND_DIR, env=_env(database), capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            rows.append((int(parts[1]), parts[2].rstrip()))
+    # Top-level imports and their direct children; deeper levels are already in those totals.
+    # importtime indents each nesting level by two more spaces after the one that follows '|'
+    shallow = [(us, name) for us, name in rows if len(name) - len(name.lstrip(' ')) <= 3]
+    return sorted(shallow, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure BookifyMe cold start against a budget')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/api/books/bestsellers', help='Path of the first request')
+    parser.add_argument('--max-startup-ms', type=float, default=800,
+                        help='Budget for importing the app and running create_app()')
+    parser.add_argument('--max-first-request-ms', type=float, default=300,
+                        help='Budget for the first request after create_app()')
+    parser.add_argument('--importtime', action='store_true', help='Also list the slowest imports')
+    parser.add_argument('--output', help='Write JSON results to this file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'startup.db')
+        subprocess.run([sys.executable, '-c', SETUP], cwd=BACKEND_DIR, env=_env(database), check=True,
+                       capture_output=True)
+        samples = measure(args.path, args.runs, database)
+        imports = slowest_imports(database) if args.importtime else []
+
+    median = {key: round(statistics.median(sample[key] for sample in samples), 1)
+              for key in ('import_ms', 'create_app_ms', 'first_request_ms', 'modules')}
+    startup_ms = round(median['import_ms'] + median['create_app_ms'], 1)
+    over_budget = []
+    if startup_ms > args.max_startup_ms:
+        over_budget.append(f"startup {startup_ms}ms > {args.max_startup_ms}ms")
+    if median['first_request_ms'] > args.max_first_request_ms:
+        over_budget.append(f"first request {median['first_request_ms']}ms > {args.max_first_request_ms}ms")
+
+    report = {
+        'runs': args.runs,
+        'path': args.path,
+        'median': dict(median, startup_ms=startup_ms),
+        'budget': {'startup_ms': args.max_startup_ms, 'first_request_ms': args.max_first_request_ms},
+        'over_budget': over_budget,
+        'slowest_imports_ms': [{'module': name.strip(), 'ms': round(us / 1000, 1)} for us, name in imports]
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+    if over_budget:
+        print('Startup budget exceeded: ' + '; '.join(over_budget), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -17,7 +17,81 @@ class Config:
     
     # Google Books API
     GOOGLE_BOOKS_API_KEY = os.environ.get('GOOGLE_BOOKS_API_KEY') or 'your-google-books-api-key'
-    GOOGLE_BOOKS_BASE_URL = 'https://www.googleapis.com/books/v1/volumes'
+    GOOGLE_BOOKS_BASE_URL = os.environ.get('GOOGLE_BOOKS_BASE_URL') or 'https://www.googleapis.com/books/v1/volumes'
+    
+    # Books stored locally are served without calling Google until they are this old (seconds)
+    BOOK_CACHE_MAX_AGE = int(os.environ.get('BOOK_CACHE_MAX_AGE', 7 * 24 * 3600))
+    BOOKS_BATCH_MAX_IDS = int(os.environ.get('BOOKS_BATCH_MAX_IDS', 40))  # IDs accepted by GET /api/books/batch
+    
+    # Upstream timeout and circuit breaker: open when over the rolling window at least
+    # MIN_CALLS calls were made and the failure or slow-call rate reached its threshold
+    GOOGLE_BOOKS_TIMEOUT = float(os.environ.get('GOOGLE_BOOKS_TIMEOUT', 5))
+    GOOGLE_BOOKS_BREAKER_WINDOW = 30  # seconds
+    GOOGLE_BOOKS_BREAKER_MIN_CALLS = 10
+    GOOGLE_BOOKS_BREAKER_FAILURE_RATE = 0.5
+    GOOGLE_BOOKS_BREAKER_SLOW_CALL_SECONDS = 2.0
+    GOOGLE_BOOKS_BREAKER_SLOW_CALL_RATE = 0.5
+    GOOGLE_BOOKS_BREAKER_OPEN_SECONDS = 30  # before half-open probing
+    
+    # Seconds a request waits on an identical in-flight Google Books call before giving up
+    GOOGLE_BOOKS_COALESCE_TIMEOUT = float(os.environ.get('GOOGLE_BOOKS_COALESCE_TIMEOUT', 10))
+    
+    # Google Books calls one batch lookup makes at once, and the keep-alive connections pooled for them
+    GOOGLE_BOOKS_BATCH_CONCURRENCY = int(os.environ.get('GOOGLE_BOOKS_BATCH_CONCURRENCY', 8))
+    GOOGLE_BOOKS_MAX_CONNECTIONS = int(os.environ.get('GOOGLE_BOOKS_MAX_CONNECTIONS', 20))
+    
+    # 'live' calls the API, 'record' also saves responses as fixtures, 'replay' serves only fixtures
+    GOOGLE_BOOKS_TRANSPORT = os.environ.get('GOOGLE_BOOKS_TRANSPORT', 'live')
+    GOOGLE_BOOKS_FIXTURES_DIR = os.environ.get('GOOGLE_BOOKS_FIXTURES_DIR') or os.path.join(basedir, 'instance', 'google_books_fixtures')
+    GOOGLE_BOOKS_REPLAY_LATENCY_MS = int(os.environ.get('GOOGLE_BOOKS_REPLAY_LATENCY_MS', 0))
+    GOOGLE_BOOKS_REPLAY_JITTER_MS = int(os.environ.get('GOOGLE_BOOKS_REPLAY_JITTER_MS', 0))
+    GOOGLE_BOOKS_REPLAY_ERROR_RATE = float(os.environ.get('GOOGLE_BOOKS_REPLAY_ERROR_RATE', 0))
+    
+    # Book cover cache
+    COVER_CACHE_DIR = os.environ.get('COVER_CACHE_DIR') or os.path.join(basedir, 'instance', 'covers')
+    COVER_CACHE_MAX_BYTES = int(os.environ.get('COVER_CACHE_MAX_BYTES', 500 * 1024 * 1024))
+    COVER_CACHE_SWEEP_INTERVAL = 600  # seconds between LRU eviction sweeps
+    # Hosts covers may be fetched from; a leading dot matches any subdomain
+    COVER_ALLOWED_HOSTS = tuple(
+        host.strip() for host in os.environ.get('COVER_ALLOWED_HOSTS', 'books.google.com,.googleusercontent.com').split(',')
+        if host.strip()
+    )
+    COVER_MAX_IMAGE_BYTES = 2 * 1024 * 1024
+    COVER_FETCH_TIMEOUT = 5
+    COVER_MAX_AGE = 30 * 24 * 3600  # Cache-Control max-age for served covers
+    
+    # Item-to-item recommendations (rebuilt with `flask recommendations rebuild`)
+    RECOMMENDATIONS_TOP_K = int(os.environ.get('RECOMMENDATIONS_TOP_K', 20))
+    RECOMMENDATIONS_BLOCK_SIZE = int(os.environ.get('RECOMMENDATIONS_BLOCK_SIZE', 64))  # books per similarity block; bounds memory
+    RECOMMENDATIONS_MIN_SCORE = 0.01
+    
+    # Trending books from time-decayed shelving activity
+    TRENDING_HALF_LIFE = int(os.environ.get('TRENDING_HALF_LIFE', 3 * 24 * 3600))  # seconds
+    TRENDING_CAPACITY = int(os.environ.get('TRENDING_CAPACITY', 1000))  # books tracked in memory
+    TRENDING_SIZE = 50  # books kept in the served ranking
+    TRENDING_FLUSH_INTERVAL = int(os.environ.get('TRENDING_FLUSH_INTERVAL', 60))  # seconds between saves; 0 disables
+    TRENDING_SNAPSHOT_TTL = 1.0  # seconds a ranking is reused while counters change
+    
+    # Group reading dashboards, cached per group until a member's shelf or the membership changes
+    GROUP_READING_SIZE = 20  # books kept per shelf
+    GROUP_READING_CACHE_MAX_ENTRIES = int(os.environ.get('GROUP_READING_CACHE_MAX_ENTRIES', 512))
+    GROUP_READING_CACHE_TTL = int(os.environ.get('GROUP_READING_CACHE_TTL', 300))
+    
+    # Group activity feeds: timelines keep the newest entries; bigger groups merge shelf activity at read time
+    GROUP_FEED_MAX_ENTRIES = int(os.environ.get('GROUP_FEED_MAX_ENTRIES', 500))
+    GROUP_FEED_FANOUT_MAX_MEMBERS = int(os.environ.get('GROUP_FEED_FANOUT_MAX_MEMBERS', 1000))
+    
+    # Server-Sent Events at /api/events/stream
+    EVENTS_HEARTBEAT_INTERVAL = int(os.environ.get('EVENTS_HEARTBEAT_INTERVAL', 15))  # seconds
+    EVENTS_MAX_STREAM_SECONDS = int(os.environ.get('EVENTS_MAX_STREAM_SECONDS', 600))  # clients reconnect and resume after this
+    EVENTS_RETRY_MS = 3000
+    EVENTS_TICKET_SECONDS = 60  # how long a ticket from /api/events/ticket can open a stream
+    EVENTS_POLL_INTERVAL = float(os.environ.get('EVENTS_POLL_INTERVAL', 0.5))  # seconds between reads of live_events
+    EVENTS_RETENTION_SECONDS = int(os.environ.get('EVENTS_RETENTION_SECONDS', 300))  # how long a client can be gone and resume
+    EVENTS_MAX_QUEUE = 1000  # undelivered events before a slow client is told to resync
+    EVENTS_MAX_STREAMS = int(os.environ.get('EVENTS_MAX_STREAMS', 4))  # open streams per process; each holds a thread
+    EVENTS_BIND = os.environ.get('EVENTS_BIND', '0.0.0.0:5001')  # gunicorn -c gunicorn_events.conf.py wsgi:app
+    EVENTS_WORKER_CONNECTIONS = int(os.environ.get('EVENTS_WORKER_CONNECTIONS', 1000))
     
     # CORS - Fixed to match your frontend
     FRONTEND_URL = os.environ.get('FRONTEND_URL') or 'http://127.0.0.1:5500'
@@ -27,4 +101,59 @@ class Config:
     SMTP_PORT = int(os.environ.get('SMTP_PORT', 587))
     SMTP_USERNAME = os.environ.get('SMTP_USERNAME')
     SMTP_PASSWORD = os.environ.get('SMTP_PASSWORD')
-    FROM_EMAIL = os.environ.get('FROM_EMAIL', 'noreply@bookifyme.com')
\ No newline at end of file
+    SMTP_USE_TLS = os.environ.get('SMTP_USE_TLS', 'true').lower() == 'true'
+    SMTP_TIMEOUT = int(os.environ.get('SMTP_TIMEOUT', 10))
+    FROM_EMAIL = os.environ.get('FROM_EMAIL', 'noreply@bookifyme.com')
+    EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND')  # 'smtp' or 'console'; defaults to smtp when SMTP_USERNAME is set
+    
+    # Outbox dispatcher
+    EMAIL_DISPATCHER_ENABLED = os.environ.get('EMAIL_DISPATCHER_ENABLED', 'true').lower() == 'true'
+    EMAIL_BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', 50))
+    EMAIL_MAX_ATTEMPTS = int(os.environ.get('EMAIL_MAX_ATTEMPTS', 5))
+    EMAIL_RETRY_BASE_DELAY = 30  # seconds, doubled after each failed attempt
+    EMAIL_RETRY_MAX_DELAY = 3600
+    EMAIL_POLL_INTERVAL = 5
+    EMAIL_CLAIM_SECONDS = 300  # a claimed batch is retried after this if its dispatcher died
+    
+    # Response compression (brotli is used when the package is installed)
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE', 500))  # bytes
+    COMPRESS_LEVEL = int(os.environ.get('COMPRESS_LEVEL', 6))  # gzip level 1-9
+    COMPRESS_BROTLI_QUALITY = int(os.environ.get('COMPRESS_BROTLI_QUALITY', 4))  # brotli quality 0-11
+    
+    # Request and SQL metrics exported at /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    
+    # Per-route SQL query budgets: 'off', 'log' (warn with stack traces) or 'raise'
+    QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'off')
+    
+    # Response caching (seconds)
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 1024))
+    RESPONSE_CACHE_TTL = 300
+    SEARCH_CACHE_TTL = int(os.environ.get('SEARCH_CACHE_TTL', 300))
+    BESTSELLERS_CACHE_TTL = int(os.environ.get('BESTSELLERS_CACHE_TTL', 30))
+    
+    # Background re-sync of stale books with Google Books (flask catalog refresh)
+    CATALOG_REFRESH_BUDGET = int(os.environ.get('CATALOG_REFRESH_BUDGET', 500))  # books per run
+    CATALOG_REFRESH_CONCURRENCY = int(os.environ.get('CATALOG_REFRESH_CONCURRENCY', 4))
+    CATALOG_REFRESH_RATE = float(os.environ.get('CATALOG_REFRESH_RATE', 5.0))  # Google requests per second
+    CATALOG_REFRESH_BATCH_SIZE = 50  # books written per transaction
+    CATALOG_REFRESH_INTERVAL = int(os.environ.get('CATALOG_REFRESH_INTERVAL', 0))  # seconds between scheduled runs; 0 disables
+    CATALOG_INGEST_BATCH_SIZE = int(os.environ.get('CATALOG_INGEST_BATCH_SIZE', 5000))  # rows per insert in flask catalog ingest
+    
+    # Group commit: request writes are batched into one transaction per window
+    WRITE_QUEUE_ENABLED = os.environ.get('WRITE_QUEUE_ENABLED', 'true').lower() == 'true'
+    WRITE_QUEUE_WINDOW_MS = float(os.environ.get('WRITE_QUEUE_WINDOW_MS', 2))  # wait for more writes after the first
+    WRITE_QUEUE_MAX_BATCH = int(os.environ.get('WRITE_QUEUE_MAX_BATCH', 64))
+    WRITE_QUEUE_TIMEOUT = 10  # seconds a request waits for its write to commit
+    
+    # Production server (gunicorn -c gunicorn.conf.py wsgi:app)
+    WEB_BIND = os.environ.get('WEB_BIND', '0.0.0.0:5000')
+    # One worker by default: the response and group reading caches and the trending counters live in process memory,
+    # and a write in one worker only clears its own caches. Raise it only if a few minutes of stale caches are acceptable.
+    WEB_WORKERS = int(os.environ.get('WEB_WORKERS', 1))
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', 32))  # per worker; an open event stream holds one (see EVENTS_MAX_STREAMS)
+    # Enough pooled connections for every request thread (SQLAlchemy's default is 5 plus 10 overflow)
+    SQLALCHEMY_ENGINE_OPTIONS = {'pool_size': WEB_THREADS, 'max_overflow': 8}
+    WEB_TIMEOUT = int(os.environ.get('WEB_TIMEOUT', 30))
+    START_BACKGROUND_TASKS = os.environ.get('START_BACKGROUND_TASKS', 'true').lower() == 'true'
\ No newline at end of file
@@ -0,0 +1,108 @@
+import argparse
+import socketserver
+import threading
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Speaks just enough SMTP for smtplib to deliver messages"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        sink = self.server.sink
+        sender, recipients = None, []
+        self.reply('220 bookifyme debug SMTP sink')
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+
+            if verb == 'EHLO':
+                self.wfile.write(b'250-localhost\r\n')
+                self.reply('250 8BITMIME')
+            elif verb == 'HELO':
+                self.reply('250 localhost')
+            elif verb == 'MAIL':
+                sender, recipients = command.split(':', 1)[1].strip(' <>'), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command.split(':', 1)[1].strip(' <>'))
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                data = []
+                for raw in iter(self.rfile.readline, b''):
+                    if raw in (b'.\r\n', b'.\n'):
+                        break
+                    data.append(raw[1:] if raw.startswith(b'..') else raw)
+                sink.record(sender, recipients, b''.join(data).decode(errors='replace'))
+                self.reply('250 OK: queued')
+            elif verb == 'RSET':
+                sender, recipients = None, []
+                self.reply('250 OK')
+            elif verb == 'NOOP':
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class DebugSMTPSink:
+    """
+    Local SMTP server that accepts every message and keeps it in memory.
+    Point SMTP_SERVER/SMTP_PORT at it with SMTP_USE_TLS=false and EMAIL_BACKEND=smtp.
+    """
+
+    def __init__(self, host='127.0.0.1', port=1025, echo=False):
+        self.messages = []
+        self.echo = echo
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer((host, port), _SMTPHandler)
+        self._server.daemon_threads = True
+        self._server.sink = self
+        self._thread = None
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def record(self, sender, recipients, data):
+        with self._lock:
+            self.messages.append({'from': sender, 'to': recipients, 'data': data})
+        if self.echo:
+            print(f"📧 {sender} -> {', '.join(recipients)}")
+            print(data)
+            print("=" * 60)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a local SMTP sink that prints every message')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=1025)
+    args = parser.parse_args()
+
+    sink = DebugSMTPSink(args.host, args.port, echo=True)
+    print(f"📬 Debug SMTP sink listening on {args.host}:{args.port}")
+    try:
+        sink._server.serve_forever()
+    except KeyboardInterrupt:
+        sink._server.server_close()
@@ -0,0 +1,195 @@
+"""
+Local Google Books-compatible server for offline development and load tests.
+
+    python google_books_stub.py --fixtures instance/google_books_fixtures --port 5055
+    python google_books_stub.py --database instance/benchmark.db --latency-ms 80 --error-rate 0.02
+
+Then point the app at it:
+
+    GOOGLE_BOOKS_BASE_URL=http://127.0.0.1:5055/books/v1/volumes python run.py
+
+Recorded fixtures (GOOGLE_BOOKS_TRANSPORT=record) are replayed exactly. Other
+searches are answered from the volumes found in the fixtures, or from the
+books table of a database such as one built by benchmarks.generate_data.
+"""
+import argparse
+import json
+import random
+import sqlite3
+import threading
+import time
+from flask import Flask, jsonify, request
+
+from app.services.google_books_transport import FixtureStore, fixture_key
+
+
+def _matches(volume, terms, subject):
+    info = volume.get('volumeInfo', {})
+    if subject and not any(subject in c.lower() for c in info.get('categories', [])):
+        return False
+    text = ' '.join([info.get('title', '')] + info.get('authors', []) + info.get('categories', [])).lower()
+    return all(term in text for term in terms)
+
+
+def parse_query(query):
+    """Split a Google Books query into plain terms and an optional subject filter"""
+    terms, subject = [], None
+    for token in query.lower().split():
+        key, _, value = token.partition(':')
+        if value and key == 'subject':
+            subject = value
+        elif value and key in ('intitle', 'inauthor'):
+            terms.append(value)
+        else:
+            terms.append(token)
+    return terms, subject
+
+
+class FixtureCatalog:
+    def __init__(self, store):
+        self.volumes = store.volumes()
+
+    def get(self, volume_id):
+        return self.volumes.get(volume_id)
+
+    def search(self, terms, subject, start, limit):
+        found = [v for v in self.volumes.values() if _matches(v, terms, subject)]
+        return len(found), found[start:start + limit]
+
+
+class SQLiteCatalog:
+    """Serves volumes straight from a BookifyMe books table"""
+
+    COLUMNS = ('google_books_id, title, authors, description, categories, thumbnail, average_rating, '
+               'ratings_count, published_date, page_count, language, preview_link, info_link')
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        return conn
+
+    @staticmethod
+    def _volume(row):
+        (volume_id, title, authors, description, categories, thumbnail, rating, ratings_count,
+         published_date, page_count, language, preview_link, info_link) = row
+        info = {
+            'title': title,
+            'authors': json.loads(authors) if authors else [],
+            'description': description,
+            'categories': json.loads(categories) if categories else [],
+            'averageRating': rating,
+            'ratingsCount': ratings_count,
+            'publishedDate': published_date,
+            'pageCount': page_count,
+            'language': language,
+            'previewLink': preview_link,
+            'infoLink': info_link
+        }
+        if thumbnail:
+            info['imageLinks'] = {'thumbnail': thumbnail, 'smallThumbnail': thumbnail}
+        return {'kind': 'books#volume', 'id': volume_id, 'volumeInfo': info}
+
+    def get(self, volume_id):
+        row = self.conn.execute(
+            f"SELECT {self.COLUMNS} FROM books WHERE google_books_id = ?", (volume_id,)).fetchone()
+        return self._volume(row) if row else None
+
+    def search(self, terms, subject, start, limit):
+        clauses, args = [], []
+        for term in terms:
+            clauses.append("(title LIKE ? OR authors LIKE ?)")
+            args.extend([f"%{term}%", f"%{term}%"])
+        if subject:
+            clauses.append("categories LIKE ?")
+            args.append(f"%{subject}%")
+        where = ' AND '.join(clauses) or '1'
+        rows = self.conn.execute(
+            f"SELECT {self.COLUMNS} FROM books WHERE {where} ORDER BY id LIMIT ? OFFSET ?",
+            args + [limit + 1, start]).fetchall()
+        # Counting every match is expensive on big tables; report a lower bound like Google does
+        total = start + len(rows)
+        return total, [self._volume(row) for row in rows[:limit]]
+
+
+def create_stub_app(fixtures_dir=None, database=None, latency_ms=0, jitter_ms=0, error_rate=0.0, seed=None):
+    app = Flask(__name__)
+    store = FixtureStore(fixtures_dir) if fixtures_dir else None
+    catalog = SQLiteCatalog(database) if database else FixtureCatalog(store) if store else None
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+
+    @app.before_request
+    def inject_latency_and_errors():
+        with rng_lock:
+            delay = latency_ms + (rng.uniform(0, jitter_ms) if jitter_ms else 0)
+            fail = error_rate and rng.random() < error_rate
+        if delay:
+            time.sleep(delay / 1000.0)
+        if fail:
+            return jsonify({'error': {'code': 503, 'message': 'Injected failure'}}), 503
+
+    def recorded(path):
+        if store is None:
+            return None
+        fixture = store.load(fixture_key(path, request.args.to_dict()))
+        if fixture is None:
+            return None
+        return jsonify(fixture['body']), fixture.get('status', 200)
+
+    @app.route('/books/v1/volumes')
+    def search():
+        response = recorded('')
+        if response:
+            return response
+
+        query = request.args.get('q', '')
+        if not query:
+            return jsonify({'error': {'code': 400, 'message': 'Missing query.'}}), 400
+        start = int(request.args.get('startIndex', 0))
+        limit = min(int(request.args.get('maxResults', 10)), 40)
+
+        total, items = catalog.search(*parse_query(query), start, limit) if catalog else (0, [])
+        body = {'kind': 'books#volumes', 'totalItems': total}
+        if items:
+            body['items'] = items
+        return jsonify(body)
+
+    @app.route('/books/v1/volumes/<volume_id>')
+    def volume(volume_id):
+        response = recorded(f"/{volume_id}")
+        if response:
+            return response
+
+        found = catalog.get(volume_id) if catalog else None
+        if not found:
+            return jsonify({'error': {'code': 404, 'message': 'The volume ID could not be found.'}}), 404
+        return jsonify(found)
+
+    return app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a local Google Books API stand-in')
+    parser.add_argument('--fixtures', help='Directory of recorded fixtures')
+    parser.add_argument('--database', help='SQLite database whose books table is served')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    if not args.fixtures and not args.database:
+        parser.error('Provide --fixtures and/or --database')
+
+    stub = create_stub_app(args.fixtures, args.database, args.latency_ms, args.jitter_ms,
+                           args.error_rate, args.seed)
+    print(f"📚 Google Books stub on http://{args.host}:{args.port}/books/v1/volumes")
+    stub.run(host=args.host, port=args.port, threaded=True)
@@ -0,0 +1,39 @@
+"""
+Production server settings.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is built once in the master (preload_app) and forked into WEB_WORKERS
+processes of WEB_THREADS threads each. post_fork gives every worker its own
+database and HTTP connections, background threads and warm caches.
+
+WEB_WORKERS defaults to 1. The response caches, the group reading cache and
+the trending counters are per process, and a write only invalidates the
+caches of the worker that handled it, so with more workers the others serve
+stale listings until their TTLs run out and trending lags until the next
+flush. Scale with WEB_THREADS instead; SQLite takes one writer at a time
+anyway. Live events are shared through the database and work with any
+number of workers.
+"""
+import os
+
+# Threads started while preloading wouldn't survive the fork; workers start their own
+os.environ.setdefault('START_BACKGROUND_TASKS', 'false')
+
+from config import Config
+
+bind = Config.WEB_BIND
+workers = Config.WEB_WORKERS
+threads = Config.WEB_THREADS
+worker_class = 'gthread'
+preload_app = True
+timeout = Config.WEB_TIMEOUT
+graceful_timeout = 30
+keepalive = 5
+accesslog = '-'
+
+
+def post_fork(server, worker):
+    from wsgi import app
+    from app.worker import init_worker
+    init_worker(app)
@@ -0,0 +1,31 @@
+"""
+Server for the live event streams (/api/events/).
+
+    gunicorn -c gunicorn_events.conf.py wsgi:app
+
+An event stream stays open for minutes. On the gthread server
+(gunicorn.conf.py) each one holds a worker thread, so those workers only
+accept EVENTS_MAX_STREAMS of them and answer 503 beyond that. Route
+/api/events/ to this server instead: its gevent worker keeps each stream in a
+greenlet and serves up to EVENTS_WORKER_CONNECTIONS at once. Events reach
+every process through the live_events table, so the two servers can run side
+by side with any number of workers. Requires gevent (pip install gevent).
+"""
+import os
+
+# This server only streams events; the main server runs the background tasks
+os.environ.setdefault('START_BACKGROUND_TASKS', 'false')
+os.environ.setdefault('EVENTS_MAX_STREAMS', os.environ.get('EVENTS_WORKER_CONNECTIONS', '1000'))
+
+from config import Config
+
+bind = Config.EVENTS_BIND
+workers = 1
+worker_class = 'gevent'
+worker_connections = Config.EVENTS_WORKER_CONNECTIONS
+# gevent patches threading and sockets when the worker starts, so the app is loaded after that, in the worker
+preload_app = False
+timeout = Config.WEB_TIMEOUT
+graceful_timeout = 30
+keepalive = 5
+accesslog = '-'
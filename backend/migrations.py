@@ -3,6 +3,12 @@ from app.models.user import User
 from app.models.book import Book
 from app.models.bookshelf import Bookshelf
 from app.models.group import ReadingGroup, GroupMember
+from app.models.email_outbox import EmailOutbox
+from app.models.job_state import JobState
+from app.models.recommendation import BookSimilarity
+from app.models.popularity import BookPopularity
+from app.models.activity import GroupActivity
+from app.models.live_event import LiveEvent
 
 def create_tables():
     """Create all database tables"""
@@ -21,6 +27,12 @@ def create_tables():
         print("   - bookshelves")
         print("   - reading_groups")
         print("   - group_members")
+        print("   - email_outbox")
+        print("   - job_states")
+        print("   - book_similarities")
+        print("   - book_popularity")
+        print("   - group_activities")
+        print("   - live_events")
 
 if __name__ == '__main__':
     create_tables()
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""baseline schema
+
+Revision ID: 3f1a9c2d7b10
+Revises: 
+Create Date: 2026-10-19 01:10:00.000000
+
+The tables as they were before migrations existed. Databases created
+then (including instance/bookifyme.db) already have them, so each table
+is only created when it is missing and `flask db upgrade` can start from
+any of those databases.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1a9c2d7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _missing(table):
+    return not sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade():
+    if _missing('users'):
+        op.create_table('users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('email', sa.String(length=120), nullable=False),
+        sa.Column('password_hash', sa.String(length=255), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('reset_token', sa.String(length=100), nullable=True),
+        sa.Column('reset_token_expires', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email'),
+        sa.UniqueConstraint('reset_token')
+        )
+    if _missing('books'):
+        op.create_table('books',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('google_books_id', sa.String(length=50), nullable=False),
+        sa.Column('title', sa.String(length=500), nullable=False),
+        sa.Column('authors', sa.Text(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('categories', sa.Text(), nullable=True),
+        sa.Column('thumbnail', sa.String(length=500), nullable=True),
+        sa.Column('average_rating', sa.Float(), nullable=True),
+        sa.Column('ratings_count', sa.Integer(), nullable=True),
+        sa.Column('published_date', sa.String(length=50), nullable=True),
+        sa.Column('page_count', sa.Integer(), nullable=True),
+        sa.Column('language', sa.String(length=10), nullable=True),
+        sa.Column('preview_link', sa.String(length=500), nullable=True),
+        sa.Column('info_link', sa.String(length=500), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('google_books_id')
+        )
+    if _missing('bookshelves'):
+        op.create_table('bookshelves',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('book_id', sa.Integer(), nullable=False),
+        sa.Column('shelf_type', sa.Enum('reading', 'wantToRead', 'finished'), nullable=False),
+        sa.Column('added_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['book_id'], ['books.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'book_id', name='unique_user_book')
+        )
+    if _missing('reading_groups'):
+        op.create_table('reading_groups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('is_public', sa.Boolean(), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if _missing('group_members'):
+        op.create_table('group_members',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('group_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('joined_at', sa.DateTime(), nullable=True),
+        sa.Column('role', sa.Enum('admin', 'member'), nullable=True),
+        sa.ForeignKeyConstraint(['group_id'], ['reading_groups.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('group_id', 'user_id', name='unique_group_member')
+        )
+
+
+def downgrade():
+    op.drop_table('group_members')
+    op.drop_table('reading_groups')
+    op.drop_table('bookshelves')
+    op.drop_table('books')
+    op.drop_table('users')
@@ -0,0 +1,155 @@
+"""outbox, jobs, recommendations, trending, feeds and live events
+
+Revision ID: 8c4e2b6a9d31
+Revises: 3f1a9c2d7b10
+Create Date: 2026-10-19 01:12:00.000000
+
+Adds the email outbox, job state, book similarity, book popularity, group
+activity and live event tables, books.refreshed_at and the group_members
+user_id index. Tables, columns and indexes that already exist (databases
+built with db.create_all()) are left alone.
+
+Existing books get a NULL refreshed_at, which the catalog refresher treats
+as never synced, so they are re-checked against Google Books.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4e2b6a9d31'
+down_revision = '3f1a9c2d7b10'
+branch_labels = None
+depends_on = None
+
+
+def _missing(table):
+    return not sa.inspect(op.get_bind()).has_table(table)
+
+
+def _missing_column(table, column):
+    return column not in {c['name'] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _missing_index(table, index):
+    return index not in {i['name'] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    if _missing('email_outbox'):
+        op.create_table('email_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('recipient', sa.String(length=120), nullable=False),
+        sa.Column('subject', sa.String(length=200), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('status', sa.Enum('pending', 'sent', 'failed'), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if _missing_index('email_outbox', 'ix_email_outbox_due'):
+        with op.batch_alter_table('email_outbox', schema=None) as batch_op:
+            batch_op.create_index('ix_email_outbox_due', ['status', 'next_attempt_at'], unique=False)
+
+    if _missing('job_states'):
+        op.create_table('job_states',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('value', sa.Text(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+        )
+
+    if _missing('live_events'):
+        op.create_table('live_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('channels', sa.String(length=500), nullable=False),
+        sa.Column('type', sa.String(length=20), nullable=False),
+        sa.Column('data', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sqlite_autoincrement=True
+        )
+    if _missing_index('live_events', 'ix_live_events_created_at'):
+        with op.batch_alter_table('live_events', schema=None) as batch_op:
+            batch_op.create_index('ix_live_events_created_at', ['created_at'], unique=False)
+
+    if _missing('book_popularity'):
+        op.create_table('book_popularity',
+        sa.Column('book_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['book_id'], ['books.id'], ),
+        sa.PrimaryKeyConstraint('book_id')
+        )
+
+    if _missing('book_similarities'):
+        op.create_table('book_similarities',
+        sa.Column('book_id', sa.Integer(), nullable=False),
+        sa.Column('similar_book_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Float(), nullable=False),
+        sa.Column('rank', sa.Integer(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['book_id'], ['books.id'], ),
+        sa.ForeignKeyConstraint(['similar_book_id'], ['books.id'], ),
+        sa.PrimaryKeyConstraint('book_id', 'similar_book_id')
+        )
+    if _missing_index('book_similarities', 'ix_book_similarities_book_rank'):
+        with op.batch_alter_table('book_similarities', schema=None) as batch_op:
+            batch_op.create_index('ix_book_similarities_book_rank', ['book_id', 'rank'], unique=False)
+
+    if _missing('group_activities'):
+        op.create_table('group_activities',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('group_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('action', sa.Enum('added', 'moved', 'removed', 'joined', 'left'), nullable=False),
+        sa.Column('book_id', sa.Integer(), nullable=True),
+        sa.Column('shelf_type', sa.String(length=20), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['book_id'], ['books.id'], ),
+        sa.ForeignKeyConstraint(['group_id'], ['reading_groups.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if _missing_index('group_activities', 'ix_group_activities_group_id'):
+        with op.batch_alter_table('group_activities', schema=None) as batch_op:
+            batch_op.create_index('ix_group_activities_group_id', ['group_id', 'id'], unique=False)
+
+    if _missing_column('books', 'refreshed_at'):
+        with op.batch_alter_table('books', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('refreshed_at', sa.DateTime(), nullable=True))
+
+    if _missing_index('group_members', 'ix_group_members_user_id'):
+        with op.batch_alter_table('group_members', schema=None) as batch_op:
+            batch_op.create_index('ix_group_members_user_id', ['user_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('group_members', schema=None) as batch_op:
+        batch_op.drop_index('ix_group_members_user_id')
+
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.drop_column('refreshed_at')
+
+    with op.batch_alter_table('group_activities', schema=None) as batch_op:
+        batch_op.drop_index('ix_group_activities_group_id')
+
+    op.drop_table('group_activities')
+    with op.batch_alter_table('book_similarities', schema=None) as batch_op:
+        batch_op.drop_index('ix_book_similarities_book_rank')
+
+    op.drop_table('book_similarities')
+    op.drop_table('book_popularity')
+    with op.batch_alter_table('live_events', schema=None) as batch_op:
+        batch_op.drop_index('ix_live_events_created_at')
+
+    op.drop_table('live_events')
+    op.drop_table('job_states')
+    with op.batch_alter_table('email_outbox', schema=None) as batch_op:
+        batch_op.drop_index('ix_email_outbox_due')
+
+    op.drop_table('email_outbox')
@@ -0,0 +1,62 @@
+import time
+import pytest
+from app.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def _fail():
+    raise ConnectionError('upstream down')
+
+
+def _open(breaker):
+    for _ in range(breaker.min_calls):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+    assert breaker.state == OPEN
+
+
+def test_opens_then_half_opens_then_closes():
+    breaker = CircuitBreaker('test-recovers', min_calls=3, failure_rate=0.5, open_seconds=0.05)
+    _open(breaker)
+
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.call(lambda: 'ok')
+    assert error.value.retry_after == 1
+
+    time.sleep(0.06)
+    breaker.allow()
+    assert breaker.state == HALF_OPEN
+    # One probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    breaker.record(False, 0.01)
+    assert breaker.state == CLOSED
+    assert breaker.call(lambda: 'ok') == 'ok'
+
+
+def test_failed_probe_opens_again():
+    breaker = CircuitBreaker('test-probe-fails', min_calls=3, open_seconds=0.05)
+    _open(breaker)
+
+    time.sleep(0.06)
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+
+def test_errors_that_are_not_failures_keep_it_closed():
+    breaker = CircuitBreaker('test-client-errors', min_calls=3)
+    for _ in range(5):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail, is_failure=lambda e: False)
+    assert breaker.state == CLOSED
+
+
+def test_slow_calls_open_it():
+    breaker = CircuitBreaker('test-slow', min_calls=3, slow_call_seconds=2.0, slow_call_rate=0.5)
+    for _ in range(3):
+        breaker.allow()
+        breaker.record(False, 3.0)
+    assert breaker.state == OPEN
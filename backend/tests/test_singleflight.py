@@ -0,0 +1,77 @@
+import threading
+import time
+import pytest
+from app.utils.singleflight import SingleFlight, SingleFlightTimeout
+
+
+def _run_concurrently(flight, fn, waiters, timeout=5):
+    """Start a leader running fn, then `waiters` callers for the same key; returns each one's result or exception"""
+    started = threading.Event()
+    release = threading.Event()
+    outcomes = []
+
+    def call():
+        try:
+            outcomes.append(flight.do('key', fn_wrapper, timeout))
+        except Exception as e:
+            outcomes.append(e)
+
+    def fn_wrapper():
+        started.set()
+        release.wait(5)
+        return fn()
+
+    threads = [threading.Thread(target=call)]
+    threads[0].start()
+    started.wait(5)
+    threads += [threading.Thread(target=call) for _ in range(waiters)]
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while flight._calls['key'].waiters < waiters and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        return 'value'
+
+    assert _run_concurrently(flight, fn, waiters=4) == ['value'] * 5
+    assert calls == [1]
+    assert flight.in_flight() == 0
+
+
+def test_every_caller_gets_the_error_and_the_next_call_runs_again():
+    flight = SingleFlight()
+    error = ValueError('upstream failed')
+
+    def fn():
+        raise error
+
+    assert _run_concurrently(flight, fn, waiters=3) == [error] * 4
+    assert flight.do('key', lambda: 'retried') == 'retried'
+
+
+def test_waiter_gives_up_after_its_timeout():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader = threading.Thread(target=flight.do, args=('key', lambda: release.wait(5)))
+    leader.start()
+    while not flight.in_flight():
+        time.sleep(0.001)
+
+    with pytest.raises(SingleFlightTimeout):
+        flight.do('key', lambda: 'not run', timeout=0.01)
+
+    release.set()
+    leader.join(5)
+    assert flight.in_flight() == 0
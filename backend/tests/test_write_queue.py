@@ -0,0 +1,69 @@
+import threading
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.job_state import JobState
+from app.services.write_queue import PendingChangesError, WriteQueue
+
+
+@pytest.fixture
+def queue(app):
+    return WriteQueue(app)
+
+
+def _insert(name):
+    db.session.add(JobState(name=name, value='{}'))
+    db.session.flush()
+    # Operations of one batch share the writer's transaction
+    return id(db.session().get_transaction())
+
+
+def _stored_names():
+    return sorted(db.session.execute(select(JobState.name)).scalars())
+
+
+def test_batch_commits_together_and_rolls_back_only_the_failing_operation(queue):
+    queue.window = 0.2
+    first = queue.enqueue(_insert, 'a')
+    duplicate = queue.enqueue(_insert, 'a')
+    last = queue.enqueue(_insert, 'c')
+
+    assert first.result(5) == last.result(5)
+    with pytest.raises(IntegrityError):
+        duplicate.result(5)
+    assert _stored_names() == ['a', 'c']
+
+
+def test_submit_returns_the_committed_result(queue):
+    assert isinstance(queue.submit(_insert, 'a'), int)
+    assert _stored_names() == ['a']
+
+
+def test_submit_refuses_pending_changes_in_the_callers_session(queue):
+    db.session.add(JobState(name='pending', value='{}'))
+    with pytest.raises(PendingChangesError):
+        queue.submit(_insert, 'a')
+    db.session.rollback()
+
+
+def test_submit_timeout_cancels_the_operation(queue):
+    release = threading.Event()
+    blocker = queue.enqueue(release.wait, 5)
+    queue.timeout = 0.1
+    with pytest.raises(TimeoutError):
+        queue.submit(_insert, 'late')
+
+    release.set()
+    blocker.result(5)
+    queue.timeout = 5
+    # Runs after the cancelled operation was skipped
+    queue.submit(_insert, 'after')
+    assert _stored_names() == ['after']
+
+
+def test_disabled_queue_runs_operations_inline(queue):
+    queue.enabled = False
+    future = queue.enqueue(_insert, 'a')
+    assert future.done()
+    assert _stored_names() == ['a']